@@ -0,0 +1,69 @@
+"""
+Route instrumentation shared by the API routers
+"""
+import time
+import inspect
+import functools
+import contextvars
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.services.tracing_service import tracing_service
+from app.services import timing_service
+
+# Per-request timing record written by the wrapped endpoint
+_endpoint_timing: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    "endpoint_timing", default=None
+)
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    """
+    Wrap an async endpoint to note when it returns, keeping its signature for FastAPI
+    """
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timing = _endpoint_timing.get()
+            if timing is not None:
+                timing["endpoint_finished_ns"] = time.time_ns()
+
+    return wrapper
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    APIRoute that splits handler time into the endpoint itself and the
+    response validation/serialization FastAPI does afterwards
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def instrumented_handler(request: Request) -> Response:
+            timing: Dict[str, int] = {}
+            token = _endpoint_timing.set(timing)
+            try:
+                response = await handler(request)
+            finally:
+                _endpoint_timing.reset(token)
+            finished = timing.get("endpoint_finished_ns")
+            if finished is not None:
+                now = time.time_ns()
+                timing_service.record('serialize', (now - finished) / 1e9)
+                tracing_service.record_span("serialize_response", finished, now, {
+                    "http.response.body.size": len(getattr(response, "body", b"") or b""),
+                })
+            return response
+
+        return instrumented_handler
+
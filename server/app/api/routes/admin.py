@@ -0,0 +1,138 @@
+"""
+Admin API routes for operational diagnostics
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from typing import Dict, Any, Optional
+import os
+import hmac
+import logging
+
+from app.services.query_profiler_service import query_profiler
+from app.services.snapshot_service import catalog_snapshot
+from app.services.database_service import database_service
+from app.services.dataset_service import dataset_service
+from app.services.databricks_service import databricks_service
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.recommendation_service import recommendation_service
+from app.services.ingestion_service import (
+    DEFAULT_BATCH_SIZE, IngestionError, detect_format, ingestion_service, iter_records_from_bytes,
+)
+from app.api.instrumentation import InstrumentedRoute
+
+logger = logging.getLogger(__name__)
+router = APIRouter(route_class=InstrumentedRoute)
+
+# Bearer token for admin endpoints that write; unset disables them
+ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN', '')
+
+def require_admin_token(authorization: Optional[str] = Header(None, description="Bearer <ADMIN_API_TOKEN>")):
+    """
+    Reject the request unless it carries the admin token; writes are disabled while none is configured
+    """
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin write endpoints are disabled; set ADMIN_API_TOKEN to enable them")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_API_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing admin token", headers={"WWW-Authenticate": "Bearer"})
+
+@router.get("/queries", response_model=Dict[str, Any])
+async def get_query_profile(
+    limit: int = Query(20, ge=1, le=200, description="Number of statements to return"),
+    sort: str = Query("p95", pattern="^(p95|max|mean|total|calls)$", description="Ranking over the rolling window")
+):
+    """
+    Slowest normalized database statements with timing, row and byte statistics
+    """
+    return {
+        **query_profiler.get_overview(),
+        "queries": query_profiler.get_top_queries(limit, sort)
+    }
+
+@router.get("/queries/slow", response_model=Dict[str, Any])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=200, description="Number of slow executions to return")
+):
+    """
+    Most recent executions over the slow-query threshold
+    """
+    return {
+        "slow_threshold_ms": query_profiler.slow_threshold_ms,
+        "queries": query_profiler.get_slow_queries(limit)
+    }
+
+@router.get("/queries/{fingerprint}", response_model=Dict[str, Any])
+async def get_query_details(fingerprint: str):
+    """
+    Statistics, an example statement and the last captured plan for one fingerprint
+    """
+    details = query_profiler.get_query(fingerprint)
+    if not details:
+        raise HTTPException(status_code=404, detail="Query fingerprint not found")
+    return details
+
+@router.post("/queries/reset")
+async def reset_query_profile():
+    """
+    Clear collected query statistics and the slow-query log
+    """
+    query_profiler.reset()
+    logger.info("Query profiler statistics reset")
+    return {"message": "Query profiler statistics reset"}
+
+@router.get("/catalog/snapshot", response_model=Dict[str, Any])
+async def get_catalog_snapshot():
+    """
+    On-disk last-known-good catalog snapshot: age, size, checksum and last write/load
+    """
+    return catalog_snapshot.get_info()
+
+@router.get("/catalog/related", response_model=Dict[str, Any])
+async def get_related_index():
+    """
+    Related-datasets model: generation, vocabulary size, build time and whether the last build was full
+    """
+    return recommendation_service.get_stats()
+
+@router.get("/search-cache", response_model=Dict[str, Any])
+async def get_search_cache():
+    """
+    Search result cache size, hits, misses and evictions since startup
+    """
+    return dataset_service.search_cache.get_stats()
+
+@router.get("/circuits", response_model=Dict[str, Any])
+async def get_circuits():
+    """
+    Circuit breaker state for the database primary and the SQL warehouse
+    """
+    return {
+        "postgres": database_service.get_circuit_stats(),
+        "sql_warehouse": databricks_service.circuit.get_stats(),
+    }
+
+@router.post("/catalog/ingest", response_model=Dict[str, Any], dependencies=[Depends(require_admin_token)])
+async def ingest_catalog(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv|json)$", description="Input format (detected when omitted)"),
+    dry_run: bool = Query(False, description="Validate only, without writing"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=100, le=100000, description="Rows validated and copied per batch")
+):
+    """
+    Bulk upsert listings from an NDJSON, CSV or JSON array request body
+    
+    Requires `Authorization: Bearer <ADMIN_API_TOKEN>`; disabled while no token is set.
+    """
+    payload = await request.body()
+    if not payload.strip():
+        raise HTTPException(status_code=400, detail="Request body is empty")
+    
+    fmt = format or detect_format(content_type=request.headers.get("content-type"), head=payload[:64])
+    try:
+        return await ingestion_service.ingest(iter_records_from_bytes(payload, fmt), batch_size, dry_run)
+    except IngestionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"Catalog ingestion failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Catalog ingestion failed: {str(e)}")
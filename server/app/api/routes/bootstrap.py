@@ -0,0 +1,49 @@
+"""
+Bootstrap API route: everything the marketplace needs to render its first view
+"""
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response
+from typing import Optional
+
+from app.models.dataset import BootstrapResponse
+from app.services.bootstrap import BOOTSTRAP_PAGE_SIZE, etag_matches
+from app.services.dataset_service import dataset_service
+from app.services.projections import resolve_projection
+from app.services.sorting import SORT_DESCRIPTION, resolve_sort
+from app.api.instrumentation import InstrumentedRoute
+
+router = APIRouter(route_class=InstrumentedRoute)
+
+# Clients may keep the payload but must revalidate it, which costs a 304 while the catalog is unchanged
+CACHE_CONTROL = "no-cache"
+
+# The body is pre-encoded bytes, so its shape is documented rather than validated
+@router.get("/bootstrap", response_model=None, responses={
+    200: {"model": BootstrapResponse, "description": "First page, stats, facets and categories"},
+    304: {"description": "Not modified"},
+})
+async def get_bootstrap(
+    limit: int = Query(BOOTSTRAP_PAGE_SIZE, ge=1, le=100, description="Listings in the first page"),
+    view: Optional[str] = Query(None, description="Predefined projection for the page: full (default) or summary"),
+    sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None, description="ETag of a cached bootstrap payload")
+):
+    """
+    First catalog page, stats, facet counts and the category list in one response
+
+    The payload is assembled once per catalog load and carries an ETag; a
+    request whose If-None-Match names the current ETag gets 304 Not Modified.
+    """
+    try:
+        projection = resolve_projection(view=view)
+        sort_key = resolve_sort(sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        payload = await dataset_service.get_bootstrap(projection, sort_key, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building bootstrap payload: {str(e)}")
+    headers = {"ETag": payload.etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
@@ -1,30 +1,105 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
-from app.models.dataset import Dataset, DatasetListResponse, DatasetCategory, DatasetStatsResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+from datetime import datetime
+from typing import List, Optional
+from app.models.dataset import (
+    Dataset, ProjectedDatasetListResponse, DatasetCategory, DatasetStatsResponse, DatasetBatchRequest, DatasetBatchResponse, MAX_BATCH_IDS,
+    RelatedDatasetsResponse, SuggestResponse, DataFrequency, PricingModel, AccessLevel,
+)
 from app.services.dataset_service import dataset_service
+from app.services.projections import resolve_projection
+from app.services.catalog_columns import CatalogFilter
+from app.services.sorting import SORT_DESCRIPTION, resolve_sort
+from app.services.recommendation_service import recommendation_service
+from app.services.suggest_index import MAX_SUGGESTIONS
+from app.api.instrumentation import InstrumentedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
-@router.get("", response_model=DatasetListResponse)
-async def get_datasets(
+FIELDS_DESCRIPTION = "Comma-separated Dataset fields to return (id is always included)"
+VIEW_DESCRIPTION = "Predefined projection: full (default) or summary (flat card fields, short description)"
+# The routes below return pre-encoded bytes, so the response shape is documented rather than validated
+PROJECTED_LIST_RESPONSES = {
+    200: {
+        "model": ProjectedDatasetListResponse,
+        "description": "Dataset listings by default, DatasetSummary with view=summary, DatasetFields with fields=",
+    }
+}
+
+def _projection(fields: Optional[str], view: Optional[str]):
+    try:
+        return resolve_projection(fields, view)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _sort(sort: Optional[str]):
+    try:
+        return resolve_sort(sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def catalog_filter(
     category: Optional[DatasetCategory] = Query(None, description="Filter by category"),
+    frequency: Optional[DataFrequency] = Query(None, description="Filter by update frequency"),
+    pricingModel: Optional[PricingModel] = Query(None, description="Filter by pricing model"),
+    accessLevel: Optional[AccessLevel] = Query(None, description="Filter by access level"),
+    minPrice: Optional[float] = Query(None, ge=0, description="Lowest price"),
+    maxPrice: Optional[float] = Query(None, ge=0, description="Highest price"),
+    minRating: Optional[float] = Query(None, ge=0, le=5, description="Lowest rating"),
+    minRatingsCount: Optional[int] = Query(None, ge=0, description="Fewest ratings"),
+    minDownloads: Optional[int] = Query(None, ge=0, description="Fewest downloads"),
+    minQualityScore: Optional[int] = Query(None, ge=0, le=100, description="Lowest quality score"),
+    updatedSince: Optional[datetime] = Query(None, description="Last updated at or after (ISO 8601)"),
+    updatedBefore: Optional[datetime] = Query(None, description="Last updated at or before (ISO 8601)"),
+    sampleAvailable: Optional[bool] = Query(None, description="Only listings with (or without) a sample"),
+    verified: Optional[bool] = Query(None, description="Only verified (or unverified) listings"),
+    coverageStart: Optional[datetime] = Query(None, description="Start of the period the data must cover (ISO 8601)"),
+    coverageEnd: Optional[datetime] = Query(None, description="End of the period the data must cover (ISO 8601)"),
+    coverageMode: Optional[str] = Query(
+        None, pattern="^(overlaps|covers)$",
+        description="overlaps (default): time range intersects the period; covers: spans all of it"
+    ),
+    region: Optional[str] = Query(
+        None, max_length=100, description="Region or country; matches places within it and regions containing it"
+    )
+) -> CatalogFilter:
+    """
+    Listing filters shared by the list and search routes; bounds are inclusive
+    """
+    # Compared as instants so a naive bound and an offset-aware one can be mixed
+    if coverageStart and coverageEnd and coverageStart.timestamp() > coverageEnd.timestamp():
+        raise HTTPException(status_code=422, detail="coverageStart must not be after coverageEnd")
+    return CatalogFilter(
+        category, frequency, pricingModel, accessLevel, minPrice, maxPrice, minRating, minRatingsCount,
+        minDownloads, minQualityScore, updatedSince, updatedBefore, sampleAvailable, verified,
+        coverageStart, coverageEnd, coverageMode, region,
+    )
+
+@router.get("", response_model=None, responses=PROJECTED_LIST_RESPONSES)
+async def get_datasets(
+    conditions: CatalogFilter = Depends(catalog_filter),
     page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(50, ge=1, le=100, description="Items per page")
+    limit: int = Query(50, ge=1, le=100, description="Items per page"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    view: Optional[str] = Query(None, description=VIEW_DESCRIPTION),
+    sort: Optional[str] = Query(None, description=SORT_DESCRIPTION)
 ):
     """
-    Get all datasets with optional category filtering and pagination
+    Get all datasets with optional filtering, sorting and pagination
     """
+    projection = _projection(fields, view)
+    sort_key = _sort(sort)
     try:
-        if category:
-            datasets, total = await dataset_service.get_datasets_by_category(category, page, limit)
+        if not conditions.only_category():
+            datasets, total = await dataset_service.filter_datasets(conditions, page, limit, sort_key)
+        elif conditions.category:
+            datasets, total = await dataset_service.get_datasets_by_category(conditions.category, page, limit, sort_key)
         else:
-            datasets, total = await dataset_service.get_all_datasets(page, limit)
+            datasets, total = await dataset_service.get_all_datasets(page, limit, sort_key)
         
-        return DatasetListResponse(
-            data=datasets,
-            total=total,
-            page=page,
-            limit=limit
+        return Response(
+            content=dataset_service.render_list(datasets, total, page, limit, projection),
+            media_type="application/json"
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching datasets: {str(e)}")
@@ -40,27 +115,74 @@ async def get_dataset_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching dataset statistics: {str(e)}")
 
-@router.get("/search", response_model=DatasetListResponse)
+@router.get("/search", response_model=None, responses=PROJECTED_LIST_RESPONSES)
 async def search_datasets(
     q: str = Query(..., description="Search query"),
+    conditions: CatalogFilter = Depends(catalog_filter),
     page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(50, ge=1, le=100, description="Items per page")
+    limit: int = Query(50, ge=1, le=100, description="Items per page"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    view: Optional[str] = Query(None, description=VIEW_DESCRIPTION),
+    sort: Optional[str] = Query(None, description=SORT_DESCRIPTION)
 ):
     """
     Search datasets by query string
     """
+    projection = _projection(fields, view)
+    sort_key = _sort(sort)
     try:
-        datasets, total = await dataset_service.search_datasets(q, page, limit)
+        datasets, total = await dataset_service.search_datasets(q, page, limit, sort_key, conditions)
         
-        return DatasetListResponse(
-            data=datasets,
-            total=total,
-            page=page,
-            limit=limit
+        return Response(
+            content=dataset_service.render_list(datasets, total, page, limit, projection),
+            media_type="application/json"
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching datasets: {str(e)}")
 
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest_datasets(
+    q: str = Query(..., max_length=200, description="What has been typed so far"),
+    limit: int = Query(8, ge=1, le=MAX_SUGGESTIONS, description="Number of suggestions")
+):
+    """
+    Type-ahead suggestions from titles, provider names and tags, ranked by popularity and tolerant of typos
+    """
+    try:
+        suggestions = await dataset_service.suggest(q, limit)
+        return {"query": q, "suggestions": suggestions}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching suggestions: {str(e)}")
+
+@router.post("/batch", response_model=DatasetBatchResponse)
+async def get_datasets_batch(request: DatasetBatchRequest):
+    """
+    Get many datasets by ID in one call, in request order, with the IDs that were not found
+    """
+    try:
+        datasets, missing = await dataset_service.get_datasets_by_ids(request.ids)
+        return DatasetBatchResponse(data=datasets, missing=missing)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching datasets: {str(e)}")
+
+@router.get("/batch", response_model=DatasetBatchResponse)
+async def get_datasets_batch_by_query(
+    ids: List[str] = Query(..., description="Dataset IDs, comma-separated or repeated")
+):
+    """
+    GET variant of the batch lookup, e.g. /api/datasets/batch?ids=a,b,c
+    """
+    dataset_ids = [dataset_id.strip() for value in ids for dataset_id in value.split(",") if dataset_id.strip()]
+    if not dataset_ids:
+        raise HTTPException(status_code=400, detail="No dataset IDs given")
+    if len(dataset_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} dataset IDs per request")
+    try:
+        datasets, missing = await dataset_service.get_datasets_by_ids(dataset_ids)
+        return DatasetBatchResponse(data=datasets, missing=missing)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching datasets: {str(e)}")
+
 @router.get("/{dataset_id}", response_model=Dataset)
 async def get_dataset_by_id(dataset_id: str):
     """
@@ -71,6 +193,26 @@ async def get_dataset_by_id(dataset_id: str):
         raise HTTPException(status_code=404, detail="Dataset not found")
     return dataset
 
+@router.get("/{dataset_id}/related", response_model=RelatedDatasetsResponse)
+async def get_related_datasets(
+    dataset_id: str,
+    limit: int = Query(6, ge=1, le=50, description="Number of related datasets (at most RELATED_TOP_K)")
+):
+    """
+    Most similar datasets by tags, sub-category, category and description
+    """
+    try:
+        related = await recommendation_service.get_related(dataset_id, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching related datasets: {str(e)}")
+    if related is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return RelatedDatasetsResponse(
+        datasetId=dataset_id,
+        data=[dataset for dataset, _ in related],
+        scores=[score for _, score in related]
+    )
+
 @router.post("/refresh")
 async def refresh_datasets():
     """
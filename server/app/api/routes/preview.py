@@ -6,9 +6,10 @@ from typing import Dict, Any
 import logging
 
 from app.services.databricks_service import databricks_service
+from app.api.instrumentation import InstrumentedRoute
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
 @router.get("/preview", response_model=Dict[str, Any])
 async def get_table_preview(
@@ -68,4 +69,14 @@ async def test_databricks_connection():
         raise HTTPException(
             status_code=500,
             detail=f"Connection test failed: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/preview/stats", response_model=Dict[str, Any])
+async def get_preview_executor_stats():
+    """
+    Get SQL warehouse executor statistics
+    
+    Returns:
+        Executor size, active/queued statements, queue wait percentiles and thread counts
+    """
+    return databricks_service.get_executor_stats()
@@ -1,32 +1,91 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import json
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 import uvicorn
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-from app.api.routes import datasets, preview
+from app.api.routes import datasets, preview, admin, bootstrap
 from app.services.database_service import database_service
+from app.services.databricks_service import databricks_service
+from app.services.dataset_service import dataset_service
+from app.services.readiness_service import readiness_service
+from app.services.recommendation_service import recommendation_service
+from app.services import metrics_service
+from app.services.tracing_service import tracing_service
+from app.services import timing_service
+from app.services.circuit_breaker import CircuitOpenError
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Configuration
 API_V1_PREFIX = "/api"
 # Updated path for Databricks Apps deployment - dist folder at root level
 CLIENT_BUILD_PATH = Path(__file__).parent.parent.parent.parent / "dist"
+# Create service clients during startup instead of on the first request that needs them
+STARTUP_WARMUP = os.getenv('STARTUP_WARMUP', 'true').lower() == 'true'
+
+async def initialize_services():
+    """
+    Initialize independent services concurrently; each may block on credential calls
+    """
+    started = time.perf_counter()
+    steps = {
+        "database": database_service.initialize,
+        "databricks": databricks_service.initialize,
+        "catalog snapshot": dataset_service.load_snapshot,
+    }
+    results = await asyncio.gather(
+        *(asyncio.to_thread(step) for step in steps.values()),
+        return_exceptions=True
+    )
+    for name, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Startup initialization of the {name} failed: {result}")
+    logger.info(f"Services initialized in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def start_background_loads():
+    """
+    Start the catalog load and preview warm-up that readiness waits for
+    """
+    # Serve the snapshot (if any) while the database load runs
+    if not dataset_service.cache_is_fresh():
+        dataset_service.start_background_refresh()
+    # A snapshot is swapped in off the event loop, so its related lists start here
+    recommendation_service.refresh()
+    readiness_service.start_preview_warmup()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up services before serving and release database connections on shutdown
+    """
+    if STARTUP_WARMUP:
+        await initialize_services()
+    start_background_loads()
+    yield
+    await readiness_service.shutdown()
+    await database_service.close()
 
 app = FastAPI(
     title="Databricks Marketplace API",
     description="Backend API for the Databricks Financial Data Marketplace with PostgreSQL integration and Databricks SQL warehouse preview",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware - allow production domains
@@ -38,14 +97,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Record request latency per route template (not per raw path, to keep cardinality bounded)
+    """
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        metrics_service.http_request_duration.labels(
+            method=request.method,
+            route=metrics_service.route_template(request.scope),
+            status=str(status_code)
+        ).observe(time.perf_counter() - started)
+        metrics_service.maybe_refresh_sampled_metrics()
+
+@app.middleware("http")
+async def add_server_timing(request: Request, call_next):
+    """
+    Collect per-phase timings for the request and expose them as a Server-Timing header
+    """
+    token = timing_service.start_request()
+    try:
+        timer = timing_service.current_timer()
+        response = await call_next(request)
+        if timing_service.HEADER_ENABLED:
+            response.headers["Server-Timing"] = timer.header_value()
+            response.headers["Timing-Allow-Origin"] = "*"
+        if timing_service.should_log():
+            timing_service.log_request(
+                timer, request.method, metrics_service.route_template(request.scope), response.status_code
+            )
+        return response
+    finally:
+        timing_service.end_request(token)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Open the server span for each request; service spans nest under it
+    """
+    if not tracing_service.enabled:
+        return await call_next(request)
+    
+    with tracing_service.request_span(request.method, request.url.path, request.headers) as span:
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            tracing_service.record_error(span, e)
+            raise
+        route = metrics_service.route_template(request.scope)
+        span.update_name(f"{request.method} {route}")
+        span.set_attribute("http.route", route)
+        span.set_attribute("http.response.status_code", response.status_code)
+        return response
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    """
+    A dependency behind an open circuit: fail fast and tell the client when to retry
+    """
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+    )
+
 # Include API routes
 app.include_router(datasets.router, prefix=f"{API_V1_PREFIX}/datasets", tags=["datasets"])
 app.include_router(preview.router, prefix=f"{API_V1_PREFIX}", tags=["preview"])
+app.include_router(admin.router, prefix=f"{API_V1_PREFIX}/admin", tags=["admin"])
+app.include_router(bootstrap.router, prefix=f"{API_V1_PREFIX}", tags=["datasets"])
+
+@app.get("/api/health/live")
+async def liveness_probe():
+    """
+    Liveness probe: answers while the worker's event loop is serving, without any I/O
+    """
+    return readiness_service.liveness()
+
+@app.get("/api/health/ready")
+async def readiness_probe():
+    """
+    Readiness probe: 200 once the catalog and its index are in memory and the
+    optional preview warm-up has reached its threshold, 503 until then. Reads
+    in-memory state only; the loads it waits for are started by the lifespan.
+    """
+    ready, state = readiness_service.readiness()
+    return JSONResponse(status_code=200 if ready else 503, content=state)
 
 @app.get("/api/health")
 async def health_check():
     """
     Health check endpoint with database connectivity test and credential info
+    (probes the database on every call; orchestrators should use /api/health/live and /api/health/ready)
     """
     try:
         # Test database connection
@@ -58,6 +207,10 @@ async def health_check():
             "status": "healthy",
             "service": "databricks-marketplace-api",
             "database": "connected" if db_healthy else "disconnected",
+            "circuits": {
+                "postgres": database_service.circuit.state,
+                "sql_warehouse": databricks_service.circuit.state
+            },
             "database_auth": {
                 "method": credential_info.get("auth_method", "unknown"),
                 "status": credential_info.get("status", "unknown"),
@@ -170,6 +323,39 @@ async def test_database():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database test failed: {str(e)}")
 
+@app.get("/api/database/pool")
+async def get_database_pool():
+    """
+    Connection pool limits, checkout wait percentiles and saturation
+    """
+    return database_service.get_pool_stats()
+
+@app.get("/api/database/replicas")
+async def get_database_replicas():
+    """
+    Read replica routing state: replay lag, latency estimate and failures per replica
+    """
+    return database_service.get_replica_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics exposition (aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set)
+    """
+    content, content_type = metrics_service.render_metrics()
+    return Response(content=content, media_type=content_type)
+
+@app.get("/api/traces")
+async def get_recent_traces(limit: int = 20):
+    """
+    Recent request waterfalls from the in-memory trace buffer (TRACING_EXPORTER=memory)
+    """
+    return {
+        "exporter": tracing_service.exporter_kind,
+        "enabled": tracing_service.enabled,
+        "traces": tracing_service.get_recent_traces(limit)
+    }
+
 # Serve static files in production
 if CLIENT_BUILD_PATH.exists():
     app.mount("/assets", StaticFiles(directory=CLIENT_BUILD_PATH / "assets"), name="assets")
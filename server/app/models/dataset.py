@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 from enum import Enum
 
@@ -73,11 +73,109 @@ class DatasetListResponse(BaseModel):
     page: int = 1
     limit: int = 50
 
+# A listing as returned by view=summary: flat card fields, description cut short
+class DatasetSummary(BaseModel):
+    id: str
+    title: str
+    description: str
+    providerName: str
+    providerVerified: bool
+    category: DatasetCategory
+    frequency: DataFrequency
+    # Day only (YYYY-MM-DD)
+    lastUpdated: str
+    pricingModel: PricingModel
+    price: float
+    currency: str
+    rating: float
+    ratingsCount: int
+    downloadCount: int
+    tags: List[str]
+    qualityScore: int
+    verified: bool
+
+# A listing as returned with fields=: id plus the requested Dataset fields
+class DatasetFields(BaseModel):
+    id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    provider: Optional[Provider] = None
+    category: Optional[DatasetCategory] = None
+    subCategory: Optional[str] = None
+    frequency: Optional[DataFrequency] = None
+    lastUpdated: Optional[datetime] = None
+    pricingModel: Optional[PricingModel] = None
+    price: Optional[float] = None
+    currency: Optional[str] = None
+    accessLevel: Optional[AccessLevel] = None
+    rating: Optional[float] = None
+    ratingsCount: Optional[int] = None
+    downloadCount: Optional[int] = None
+    tags: Optional[List[str]] = None
+    formats: Optional[List[str]] = None
+    geographicCoverage: Optional[List[str]] = None
+    timeRange: Optional[TimeRange] = None
+    sampleAvailable: Optional[bool] = None
+    sampleUrl: Optional[str] = None
+    previewImage: Optional[str] = None
+    qualityScore: Optional[int] = None
+    verified: Optional[bool] = None
+
+# List responses of routes taking fields= and view=; listings are Dataset (the
+# default), DatasetSummary (view=summary) or DatasetFields (fields=)
+class ProjectedDatasetListResponse(BaseModel):
+    data: List[Union[Dataset, DatasetSummary, DatasetFields]]
+    total: int
+    page: int = 1
+    limit: int = 50
+
+# Most datasets one batch request may ask for
+MAX_BATCH_IDS = 200
+
+class DatasetBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+
+class DatasetBatchResponse(BaseModel):
+    data: List[Dataset]
+    missing: List[str] = []
+
+class RelatedDatasetsResponse(BaseModel):
+    datasetId: str
+    data: List[Dataset]
+    # Cosine similarity of each entry in data, highest first
+    scores: List[float]
+
+class Suggestion(BaseModel):
+    text: str
+    # dataset, provider or tag
+    type: str
+    datasetId: Optional[str] = None
+    score: float
+    # Matched only after correcting a typo
+    corrected: bool = False
+
+class SuggestResponse(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
+
 class DatasetStatsResponse(BaseModel):
     totalDatasets: int
     totalProviders: int
     categoryCounts: Dict[str, int]
 
+class CategoryCount(BaseModel):
+    name: str
+    count: int
+
+class BootstrapResponse(BaseModel):
+    # First page of the catalog, projected by view=
+    datasets: ProjectedDatasetListResponse
+    stats: DatasetStatsResponse
+    # Field -> value -> listing count (category, frequency, pricingModel, accessLevel, sampleAvailable, verified, region)
+    facets: Dict[str, Dict[str, int]]
+    # Every category, including those without listings
+    categories: List[CategoryCount]
+
 class DatasetSearchParams(BaseModel):
     q: Optional[str] = None
     category: Optional[DatasetCategory] = None
@@ -0,0 +1,100 @@
+"""
+Initial page payload for GET /api/bootstrap
+
+The marketplace and dashboard pages need the first page of the catalog,
+the catalog stats, facet counts and the category list before they can
+render. A bootstrap payload carries all four in one response. Its parts are
+computed from the CatalogIndex of the catalog load being served: the facet
+counts and stats once per load, the page from the listings already encoded
+for that load. The assembled body is cached on the index per projection,
+sort and page size, so repeated bootstraps are a dictionary lookup until
+the next catalog swap.
+
+The ETag is a hash of the body rather than the catalog generation, so
+workers serving the same catalog agree on it and a reload that changes
+nothing keeps clients' cached copies valid.
+"""
+import os
+import json
+import hashlib
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
+
+from app.models.dataset import DatasetCategory
+from app.services import projections
+from app.services.catalog_columns import ENUM_COLUMNS, FLAG_COLUMNS
+from app.services.sorting import SortKey
+
+if TYPE_CHECKING:
+    from app.services.catalog_index import CatalogIndex
+
+BOOTSTRAP_PAGE_SIZE = int(os.getenv('BOOTSTRAP_PAGE_SIZE', '50'))
+# Places listed in the region facet, most covered first
+BOOTSTRAP_TOP_REGIONS = int(os.getenv('BOOTSTRAP_TOP_REGIONS', '20'))
+
+
+class BootstrapPayload(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def facet_counts(index: "CatalogIndex") -> Dict[str, Dict[str, int]]:
+    """
+    Listing counts per value of each enum field, flag and most covered region
+    """
+    import numpy as np
+
+    facets: Dict[str, Dict[str, int]] = {}
+    for column, enum in ENUM_COLUMNS.items():
+        members = list(enum)
+        counts = np.bincount(index.columns[column], minlength=len(members))
+        facets[column] = {member.value: int(count) for member, count in zip(members, counts) if count}
+    for column in FLAG_COLUMNS:
+        present = int(np.count_nonzero(index.columns[column]))
+        facets[column] = {"true": present, "false": len(index) - present}
+    places = sorted(index.geography.places.items(), key=lambda item: (-len(item[1]), item[0]))
+    facets["region"] = {place: len(positions) for place, positions in places[:BOOTSTRAP_TOP_REGIONS]}
+    return facets
+
+
+def category_list(index: "CatalogIndex") -> List[Dict[str, Any]]:
+    """
+    Every category in declaration order with its listing count, including empty ones
+    """
+    return [{"name": category.value, "count": index.category_counts.get(category.value, 0)}
+            for category in DatasetCategory]
+
+
+def build_payload(index: "CatalogIndex", projection: projections.Projection, sort: Optional[SortKey],
+                  limit: int) -> BootstrapPayload:
+    """
+    Assemble the bootstrap body from the index's precomputed parts
+    """
+    import numpy as np
+
+    positions = index.orders[sort.key][:limit] if sort is not None else np.arange(min(limit, len(index)))
+    page = projections.render_list(index.encode(projection, positions), len(index), 1, limit)
+    body = b"".join([
+        b'{"datasets":', page,
+        b',"stats":', _dumps(index.stats()),
+        b',"facets":', _dumps(index.facets),
+        b',"categories":', _dumps(index.categories),
+        b'}',
+    ])
+    return BootstrapPayload(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header names this ETag (weak comparison, as for GET)
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == etag:
+            return True
+    return False
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
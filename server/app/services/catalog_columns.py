@@ -0,0 +1,135 @@
+"""
+Columnar side-store for vectorized catalog filters
+
+Each CatalogIndex copies the numeric and date fields of every listing into
+NumPy arrays, and its enum fields into small integer code arrays, when it is
+built. A CatalogFilter is then evaluated as a handful of whole-array
+comparisons combined into one boolean mask over catalog positions, instead
+of a Python loop over Dataset models; sort permutations are read from the
+same arrays.
+"""
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+from app.models.dataset import AccessLevel, DataFrequency, Dataset, DatasetCategory, PricingModel
+
+ENUM_COLUMNS = {
+    "category": DatasetCategory,
+    "frequency": DataFrequency,
+    "pricingModel": PricingModel,
+    "accessLevel": AccessLevel,
+}
+# Enum member -> code in its column
+ENUM_CODES = {name: {member: code for code, member in enumerate(enum)} for name, enum in ENUM_COLUMNS.items()}
+# Column -> NumPy dtype; lastUpdated is held as epoch seconds
+NUMERIC_COLUMNS = {
+    "price": "float64",
+    "rating": "float64",
+    "ratingsCount": "int64",
+    "downloadCount": "int64",
+    "qualityScore": "int16",
+    "lastUpdated": "int64",
+}
+FLAG_COLUMNS = ("sampleAvailable", "verified")
+
+
+class CatalogFilter(NamedTuple):
+    """
+    Conditions on listing fields; None means no condition, bounds are inclusive
+    """
+    category: Optional[DatasetCategory] = None
+    frequency: Optional[DataFrequency] = None
+    pricingModel: Optional[PricingModel] = None
+    accessLevel: Optional[AccessLevel] = None
+    minPrice: Optional[float] = None
+    maxPrice: Optional[float] = None
+    minRating: Optional[float] = None
+    minRatingsCount: Optional[int] = None
+    minDownloads: Optional[int] = None
+    minQualityScore: Optional[int] = None
+    updatedSince: Optional[datetime] = None
+    updatedBefore: Optional[datetime] = None
+    sampleAvailable: Optional[bool] = None
+    verified: Optional[bool] = None
+    # Answered by the coverage indexes (coverage_index.py) rather than the columns
+    coverageStart: Optional[datetime] = None
+    coverageEnd: Optional[datetime] = None
+    coverageMode: Optional[str] = None
+    region: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in self)
+
+    def only_category(self) -> bool:
+        """
+        Whether the category (if any) is the only condition, which the category buckets answer directly
+        """
+        return all(value is None for name, value in zip(self._fields, self) if name != "category")
+
+
+def _value(dataset: Dataset, column: str) -> Any:
+    value = getattr(dataset, column)
+    return int(value.timestamp()) if isinstance(value, datetime) else value
+
+
+class CatalogColumns:
+    """
+    Per-load NumPy arrays of the filterable listing fields, in catalog order
+    """
+
+    def __init__(self, datasets: Sequence[Dataset]):
+        import numpy as np
+
+        count = len(datasets)
+        self.size = count
+        self.columns: Dict[str, Any] = {}
+        for column, dtype in NUMERIC_COLUMNS.items():
+            self.columns[column] = np.fromiter((_value(dataset, column) for dataset in datasets), dtype=dtype, count=count)
+        for column, codes in ENUM_CODES.items():
+            self.columns[column] = np.fromiter(
+                (codes[getattr(dataset, column)] for dataset in datasets), dtype=np.int8, count=count
+            )
+        for column in FLAG_COLUMNS:
+            self.columns[column] = np.fromiter((getattr(dataset, column) for dataset in datasets), dtype=bool, count=count)
+
+    def __getitem__(self, column: str):
+        return self.columns[column]
+
+    def mask(self, conditions: CatalogFilter):
+        """
+        Boolean array over catalog positions: True where a listing meets every condition
+        """
+        import numpy as np
+
+        columns = self.columns
+        mask = np.ones(self.size, dtype=bool)
+        for column in ENUM_COLUMNS:
+            member = getattr(conditions, column)
+            if member is not None:
+                mask &= columns[column] == ENUM_CODES[column][member]
+        bounds = (
+            ("price", conditions.minPrice, conditions.maxPrice),
+            ("rating", conditions.minRating, None),
+            ("ratingsCount", conditions.minRatingsCount, None),
+            ("downloadCount", conditions.minDownloads, None),
+            ("qualityScore", conditions.minQualityScore, None),
+            (
+                "lastUpdated",
+                conditions.updatedSince.timestamp() if conditions.updatedSince else None,
+                conditions.updatedBefore.timestamp() if conditions.updatedBefore else None,
+            ),
+        )
+        for column, low, high in bounds:
+            if low is not None:
+                mask &= columns[column] >= low
+            if high is not None:
+                mask &= columns[column] <= high
+        for column in FLAG_COLUMNS:
+            flag = getattr(conditions, column)
+            if flag is not None:
+                mask &= columns[column] == flag
+        return mask
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.columns.values())
@@ -0,0 +1,253 @@
+"""
+Lookup structures over the cached catalog
+
+The listings themselves are held as a CompactCatalog (see
+compact_catalog.py); lookups map to catalog positions and Dataset models
+are only materialized for the listings a response returns.
+
+DatasetService builds a CatalogIndex each time it swaps in a newly loaded
+catalog and replaces it as a whole, never mutating its lookup structures,
+so requests always read one consistent view without locking. Caches derived
+from the catalog (such as encoded listings per projection) live on the index
+and are dropped with it. Every build gets a new generation number that other
+derived caches can key on.
+
+Filterable fields are copied into NumPy columns (see catalog_columns.py)
+and sort permutations (see sorting.py) are NumPy arrays of catalog
+positions, both computed when the index is built; NumPy is imported then
+rather than with the app.
+"""
+import time
+import itertools
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+from app.models.dataset import Dataset, DatasetCategory
+from app.services import projections
+from app.services.bootstrap import BootstrapPayload, build_payload, category_list, facet_counts
+from app.services.compact_catalog import CompactCatalog, CompactListing, ListingPage
+from app.services.catalog_columns import ENUM_CODES, CatalogColumns, CatalogFilter
+from app.services.coverage_index import GeoIndex, TimeRangeIndex
+from app.services.sorting import SORT_FIELDS, SortKey
+from app.services.suggest_index import SuggestIndex
+
+_generations = itertools.count(1)
+# Distinct bootstrap payloads (projection x sort x page size) kept per load
+MAX_BOOTSTRAP_PAYLOADS = 16
+# Category orderings (category x sort key) kept per load
+MAX_FILTERED_ORDERS = 64
+
+
+class CatalogIndex:
+    """
+    Immutable per-load view of the catalog: id lookup, category buckets, counts and type-ahead
+    """
+
+    def __init__(self, datasets: Sequence[Dataset], source: Optional[str] = None):
+        started = time.perf_counter()
+        self.generation = next(_generations)
+        self.datasets = datasets if isinstance(datasets, CompactCatalog) else CompactCatalog(datasets)
+        self.source = source
+        records = self.records
+        # Catalog position per id
+        self.by_id: Dict[str, int] = {}
+        providers = set()
+        for position, record in enumerate(records):
+            # The first listing with an id wins, as with the previous linear scan
+            self.by_id.setdefault(record.id, position)
+            providers.add(record.provider.name)
+        self.provider_count = len(providers)
+        self.columns = CatalogColumns(records)
+        self.by_category = self._build_categories()
+        self.category_counts = {category.value: len(positions) for category, positions in self.by_category.items()}
+        self.suggestions = SuggestIndex(records)
+        self.time_ranges = TimeRangeIndex(records)
+        self.geography = GeoIndex(records)
+        self.orders = self._build_orders()
+        self._ranks: Dict[str, object] = {}
+        self._category_orders: "OrderedDict[tuple, object]" = OrderedDict()
+        self._encoded = projections.EncodedCache()
+        self._facets: Optional[Dict[str, Dict[str, int]]] = None
+        self._categories: Optional[List[Dict[str, object]]] = None
+        self._bootstrap: "OrderedDict[tuple, BootstrapPayload]" = OrderedDict()
+        self.built_at = time.time()
+        self.build_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    def __len__(self) -> int:
+        return len(self.datasets)
+
+    @property
+    def records(self) -> List[CompactListing]:
+        return self.datasets.records
+
+    def get(self, dataset_id: str) -> Optional[Dataset]:
+        position = self.by_id.get(dataset_id)
+        return self.datasets[position] if position is not None else None
+
+    def in_category(self, category: DatasetCategory) -> ListingPage:
+        return self.datasets.page(self.by_category.get(category, ()))
+
+    def _build_categories(self):
+        """
+        Catalog positions per category present in the catalog
+        """
+        import numpy as np
+
+        codes = self.columns["category"]
+        by_category = {}
+        for category, code in ENUM_CODES["category"].items():
+            positions = np.flatnonzero(codes == code)
+            if len(positions):
+                by_category[category] = positions
+        return by_category
+
+    def _build_orders(self):
+        """
+        Catalog positions in each sort order; stable, so ties keep catalog order
+        """
+        import numpy as np
+
+        orders = {}
+        for field, column in SORT_FIELDS.items():
+            values = self.columns[column].astype(np.float64)
+            orders[SortKey(field, False).key] = np.argsort(values, kind="stable").astype(np.int32)
+            orders[SortKey(field, True).key] = np.argsort(-values, kind="stable").astype(np.int32)
+        return orders
+
+    def _rank(self, sort: SortKey):
+        """
+        Position of each listing within a sort order (the inverse permutation)
+        """
+        import numpy as np
+
+        rank = self._ranks.get(sort.key)
+        if rank is None:
+            order = self.orders[sort.key]
+            rank = np.empty(len(order), dtype=np.int32)
+            rank[order] = np.arange(len(order), dtype=np.int32)
+            self._ranks[sort.key] = rank
+        return rank
+
+    def sorted_page(self, sort: SortKey, start: int, stop: int) -> ListingPage:
+        """
+        One page of the whole catalog in sort order
+        """
+        return self.page(self.orders[sort.key], start, stop)
+
+    def sorted_category_page(self, category: DatasetCategory, sort: SortKey, start: int, stop: int) -> ListingPage:
+        """
+        One page of a category in sort order; the category's ordering is derived once per load
+        """
+        key = (category, sort.key)
+        order = self._category_orders.get(key)
+        if order is None:
+            full = self.orders[sort.key]
+            categories = self.columns["category"]
+            order = self._category_orders[key] = full[categories[full] == ENUM_CODES["category"][category]]
+            while len(self._category_orders) > MAX_FILTERED_ORDERS:
+                self._category_orders.popitem(last=False)
+        else:
+            self._category_orders.move_to_end(key)
+        return self.page(order, start, stop)
+
+    def sort_positions(self, positions: Sequence[int], sort: SortKey) -> List[int]:
+        """
+        Catalog positions (e.g. search matches) reordered by a sort key
+        """
+        import numpy as np
+
+        positions = np.asarray(positions, dtype=np.int32)
+        ranks = self._rank(sort)[positions]
+        return positions[np.argsort(ranks)].tolist()
+
+    def filter_mask(self, conditions: CatalogFilter):
+        """
+        Boolean array over catalog positions: True where a listing meets every condition
+        """
+        mask = self.columns.mask(conditions)
+        if conditions.coverageStart is not None or conditions.coverageEnd is not None:
+            mask &= self.time_ranges.mask(conditions.coverageStart, conditions.coverageEnd, conditions.coverageMode)
+        if conditions.region:
+            mask &= self.geography.mask(conditions.region)
+        return mask
+
+    def filter_positions(self, conditions: CatalogFilter, sort: Optional[SortKey] = None):
+        """
+        Catalog positions of the listings meeting every condition, in catalog or sort order
+        """
+        import numpy as np
+
+        mask = self.filter_mask(conditions)
+        if sort is None:
+            return np.flatnonzero(mask)
+        order = self.orders[sort.key]
+        return order[mask[order]]
+
+    def filter_subset(self, positions: Sequence[int], conditions: CatalogFilter) -> List[int]:
+        """
+        The catalog positions (e.g. search matches) of listings meeting every condition, order kept
+        """
+        import numpy as np
+
+        positions = np.asarray(positions, dtype=np.int64)
+        return positions[self.filter_mask(conditions)[positions]].tolist()
+
+    def page(self, positions, start: int, stop: int) -> ListingPage:
+        """
+        Listings at a slice of an array of catalog positions
+        """
+        return self.datasets.page(positions[start:stop])
+
+    def encode(self, projection: projections.Projection, positions: Sequence[int]) -> List[bytes]:
+        """
+        JSON bytes for the listings at catalog positions under a projection, served from the encoded-listing cache
+        """
+        return self._encoded.encode(projection, self.datasets, positions)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "totalDatasets": len(self),
+            "totalProviders": self.provider_count,
+            "categoryCounts": dict(self.category_counts),
+        }
+
+    @property
+    def facets(self) -> Dict[str, Dict[str, int]]:
+        if self._facets is None:
+            self._facets = facet_counts(self)
+        return self._facets
+
+    @property
+    def categories(self) -> List[Dict[str, object]]:
+        if self._categories is None:
+            self._categories = category_list(self)
+        return self._categories
+
+    def bootstrap(self, projection: projections.Projection, sort: Optional[SortKey],
+                  limit: int) -> BootstrapPayload:
+        """
+        Bootstrap body and ETag, assembled once per load, projection, sort and page size
+        """
+        key = (projection.key, sort, limit)
+        payload = self._bootstrap.get(key)
+        if payload is None:
+            payload = self._bootstrap[key] = build_payload(self, projection, sort, limit)
+            while len(self._bootstrap) > MAX_BOOTSTRAP_PAYLOADS:
+                self._bootstrap.popitem(last=False)
+        return payload
+
+    def get_info(self):
+        return {
+            "generation": self.generation,
+            "source": self.source,
+            "datasets": len(self.datasets),
+            "compressed_descriptions": self.datasets.compressed,
+            "built_at": self.built_at,
+            "build_ms": self.build_ms,
+            "suggest": self.suggestions.get_info(),
+            "column_bytes": self.columns.nbytes,
+            "time_ranges": len(self.time_ranges),
+            "places": len(self.geography.places),
+            "encoded_listings": self._encoded.get_info(),
+            "bootstrap_payloads": len(self._bootstrap),
+        }
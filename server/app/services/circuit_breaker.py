@@ -0,0 +1,171 @@
+"""
+Circuit breakers for the database and the SQL warehouse
+
+A circuit opens after CIRCUIT_FAILURE_THRESHOLD consecutive failures and then
+rejects calls immediately with CircuitOpenError, so callers can serve
+last-known-good data (or a fast error) instead of queueing on a dependency
+that is down. After a jittered backoff, starting at CIRCUIT_RESET_SECONDS and
+doubling up to CIRCUIT_MAX_RESET_SECONDS while probes keep failing, one call
+is let through as a half-open probe: success closes the circuit, failure opens
+it again.
+
+Only errors that mean the dependency is unavailable should be recorded as
+failures; a bad statement proves the dependency is answering.
+"""
+import os
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.services import metrics_service
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '5'))
+MAX_RESET_SECONDS = float(os.getenv('CIRCUIT_MAX_RESET_SECONDS', '60'))
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+# Gauge values per state
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open, retry in {retry_after:.1f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probing; safe to use from threads
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 reset_seconds: Optional[float] = None, max_reset_seconds: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold or FAILURE_THRESHOLD)
+        self.reset_seconds = reset_seconds or RESET_SECONDS
+        self.max_reset_seconds = max(self.reset_seconds, max_reset_seconds or MAX_RESET_SECONDS)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        # Times the circuit has opened since it was last closed; drives the backoff
+        self.open_count = 0
+        self.open_until = 0.0
+        self.probe_started: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.opened_total = 0
+        self.rejected_total = 0
+        self._lock = threading.Lock()
+        metrics_service.circuit_state.labels(circuit=name).set(STATE_CODES[CLOSED])
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Whether calls are currently being rejected (a half-open probe is in flight or the backoff is running)
+        """
+        with self._lock:
+            return self._rejecting(time.monotonic())
+
+    def _rejecting(self, now: float) -> bool:
+        if self.state == OPEN:
+            return now < self.open_until
+        if self.state == HALF_OPEN:
+            # A probe that never reported back does not hold the circuit forever
+            return self.probe_started is not None and now - self.probe_started < self.max_reset_seconds
+        return False
+
+    def allow(self):
+        """
+        Raise CircuitOpenError unless a call may go through now
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self._rejecting(now):
+                self.rejected_total += 1
+                retry_after = max(0.0, self.open_until - now) if self.state == OPEN else self.reset_seconds
+            else:
+                # Backoff elapsed (or the last probe went missing): this call is the probe
+                self._set_state(HALF_OPEN)
+                self.probe_started = now
+                return
+        metrics_service.circuit_rejections.labels(circuit=self.name).inc()
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info(f"Circuit {self.name} closed: dependency recovered")
+                self.open_count = 0
+                self.probe_started = None
+                self._set_state(CLOSED)
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = str(error)[:500] if error is not None else None
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.open_count += 1
+        self.opened_total += 1
+        backoff = min(self.max_reset_seconds, self.reset_seconds * 2 ** (self.open_count - 1))
+        # Jitter spreads the probes of many workers instead of having them retry in lockstep
+        delay = random.uniform(backoff / 2, backoff)
+        self.open_until = time.monotonic() + delay
+        self.probe_started = None
+        if self.state != OPEN:
+            logger.warning(
+                f"Circuit {self.name} opened after {self.consecutive_failures} consecutive failure(s); "
+                f"next probe in {delay:.1f}s: {self.last_error}"
+            )
+        self._set_state(OPEN)
+
+    def _set_state(self, state: str):
+        self.state = state
+        metrics_service.circuit_state.labels(circuit=self.name).set(STATE_CODES[state])
+
+    @contextmanager
+    def guard(self, is_failure: Optional[Callable[[BaseException], bool]] = None) -> Iterator[None]:
+        """
+        Run a block as one call through the circuit
+
+        Raises CircuitOpenError without running the block while the circuit is
+        open. Exceptions from the block count as failures unless is_failure
+        says otherwise; they are always re-raised.
+        """
+        self.allow()
+        try:
+            yield
+        except Exception as e:
+            if is_failure is None or is_failure(e):
+                self.record_failure(e)
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in_seconds": round(max(0.0, self.open_until - now), 1) if self.state == OPEN else None,
+                "opened_total": self.opened_total,
+                "rejected_total": self.rejected_total,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,472 @@
+"""
+Compact in-memory representation of the catalog
+
+A Dataset model carries its own copy of every string and nested model, so a
+catalog decoded from the database repeats each provider, currency, tag list
+and date once per listing. CompactCatalog keeps each listing as a
+CompactListing with __slots__ instead: repeated strings, tag/format/coverage
+tuples, dates and prices are deduplicated through per-load pools, providers
+and time ranges are shared model instances, and enum fields are stored as
+small integer codes. With CATALOG_COMPRESS_DESCRIPTIONS, descriptions are
+kept zlib-compressed and only expanded when a listing is read.
+
+A CompactCatalogBuilder compacts listings as they are decoded, so a catalog
+load never holds more than one batch of Dataset models at a time.
+
+CompactListing exposes the Dataset attributes the index builders, search and
+recommendations read, so they run over the compact records directly. Full
+Dataset models are materialized on demand when a listing leaves through the
+API: indexing the catalog returns a Dataset, slicing it returns a
+ListingPage that materializes as it is iterated.
+"""
+import os
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from app.models.dataset import AccessLevel, DataFrequency, Dataset, DatasetCategory, PricingModel, Provider, TimeRange
+
+COMPRESS_DESCRIPTIONS = os.getenv('CATALOG_COMPRESS_DESCRIPTIONS', 'false').lower() == 'true'
+# Shorter descriptions do not shrink enough to be worth compressing
+MIN_COMPRESSED_LENGTH = 96
+
+_CATEGORIES = list(DatasetCategory)
+_FREQUENCIES = list(DataFrequency)
+_PRICING_MODELS = list(PricingModel)
+_ACCESS_LEVELS = list(AccessLevel)
+_CATEGORY_CODES = {member: code for code, member in enumerate(_CATEGORIES)}
+_FREQUENCY_CODES = {member: code for code, member in enumerate(_FREQUENCIES)}
+_PRICING_CODES = {member: code for code, member in enumerate(_PRICING_MODELS)}
+_ACCESS_CODES = {member: code for code, member in enumerate(_ACCESS_LEVELS)}
+
+
+# Per-listing columns of CompactCatalog.to_arrays(), in CompactListing slot order
+_RECORD_COLUMNS = {
+    "id": "int32", "title": "int32", "description": "int32", "provider": "int32", "category": "int8",
+    "subCategory": "int32", "frequency": "int8", "lastUpdated": "int32", "pricing": "int8", "price": "float64",
+    "currency": "int32", "access": "int8", "rating": "float64", "ratingsCount": "int64", "downloadCount": "int64",
+    "tags": "int32", "formats": "int32", "geographicCoverage": "int32", "timeRange": "int32",
+    "sampleAvailable": "bool", "sampleUrl": "int32", "previewImage": "int32", "qualityScore": "int16",
+    "verified": "bool",
+}
+
+
+class CompactListing:
+    """
+    One listing with shared values and enum codes; reads like a Dataset for the fields it keeps
+    """
+    __slots__ = (
+        "id", "title", "_description", "provider", "_category", "subCategory", "_frequency", "lastUpdated",
+        "_pricing", "price", "currency", "_access", "rating", "ratingsCount", "downloadCount", "tags", "formats",
+        "geographicCoverage", "timeRange", "sampleAvailable", "sampleUrl", "previewImage", "qualityScore", "verified",
+    )
+
+    @property
+    def description(self) -> str:
+        description = self._description
+        if isinstance(description, bytes):
+            return zlib.decompress(description).decode()
+        return description
+
+    @property
+    def category(self) -> DatasetCategory:
+        return _CATEGORIES[self._category]
+
+    @property
+    def frequency(self) -> DataFrequency:
+        return _FREQUENCIES[self._frequency]
+
+    @property
+    def pricingModel(self) -> PricingModel:
+        return _PRICING_MODELS[self._pricing]
+
+    @property
+    def accessLevel(self) -> AccessLevel:
+        return _ACCESS_LEVELS[self._access]
+
+    def to_dataset(self) -> Dataset:
+        """
+        Full Dataset model; the values were validated when the catalog was loaded
+        """
+        return Dataset.model_construct(
+            id=self.id,
+            title=self.title,
+            description=self.description,
+            provider=self.provider,
+            category=self.category,
+            subCategory=self.subCategory,
+            frequency=self.frequency,
+            lastUpdated=self.lastUpdated,
+            pricingModel=self.pricingModel,
+            price=self.price,
+            currency=self.currency,
+            accessLevel=self.accessLevel,
+            rating=self.rating,
+            ratingsCount=self.ratingsCount,
+            downloadCount=self.downloadCount,
+            tags=list(self.tags),
+            formats=list(self.formats),
+            geographicCoverage=list(self.geographicCoverage),
+            timeRange=self.timeRange,
+            sampleAvailable=self.sampleAvailable,
+            sampleUrl=self.sampleUrl,
+            previewImage=self.previewImage,
+            qualityScore=self.qualityScore,
+            verified=self.verified,
+        )
+
+
+class _Pools:
+    """
+    Deduplication tables used while one catalog is compacted
+    """
+
+    def __init__(self):
+        self.strings: Dict[str, str] = {}
+        self.tuples: Dict[tuple, tuple] = {}
+        self.values: Dict[tuple, object] = {}
+        self.providers: Dict[tuple, Provider] = {}
+        self.time_ranges: Dict[tuple, TimeRange] = {}
+
+    def string(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        return self.strings.setdefault(value, value)
+
+    def strings_tuple(self, values: List[str]) -> tuple:
+        shared = tuple(self.string(value) for value in values)
+        return self.tuples.setdefault(shared, shared)
+
+    def value(self, value):
+        # Keyed with the type so that 1, 1.0 and True stay distinct
+        return self.values.setdefault((type(value), value), value)
+
+    def provider(self, provider: Provider) -> Provider:
+        key = (provider.name, provider.logo, provider.verified)
+        shared = self.providers.get(key)
+        if shared is None:
+            shared = self.providers[key] = Provider.model_construct(
+                name=self.string(provider.name), logo=self.string(provider.logo), verified=provider.verified
+            )
+        return shared
+
+    def time_range(self, time_range: Optional[TimeRange]) -> Optional[TimeRange]:
+        if time_range is None:
+            return None
+        key = (time_range.start, time_range.end)
+        shared = self.time_ranges.get(key)
+        if shared is None:
+            shared = self.time_ranges[key] = TimeRange.model_construct(
+                start=self.value(time_range.start), end=self.value(time_range.end)
+            )
+        return shared
+
+
+def _compact_description(description: str, compress: bool) -> Union[str, bytes]:
+    if compress and len(description) >= MIN_COMPRESSED_LENGTH:
+        packed = zlib.compress(description.encode(), 6)
+        if len(packed) < len(description):
+            return packed
+    return description
+
+
+def compact_listing(dataset: Dataset, pools: _Pools, compress: bool = COMPRESS_DESCRIPTIONS) -> CompactListing:
+    listing = CompactListing()
+    listing.id = dataset.id
+    listing.title = dataset.title
+    listing._description = _compact_description(dataset.description, compress)
+    listing.provider = pools.provider(dataset.provider)
+    listing._category = _CATEGORY_CODES[dataset.category]
+    listing.subCategory = pools.string(dataset.subCategory)
+    listing._frequency = _FREQUENCY_CODES[dataset.frequency]
+    listing.lastUpdated = pools.value(dataset.lastUpdated)
+    listing._pricing = _PRICING_CODES[dataset.pricingModel]
+    listing.price = pools.value(dataset.price)
+    listing.currency = pools.string(dataset.currency)
+    listing._access = _ACCESS_CODES[dataset.accessLevel]
+    listing.rating = pools.value(dataset.rating)
+    listing.ratingsCount = dataset.ratingsCount
+    listing.downloadCount = dataset.downloadCount
+    listing.tags = pools.strings_tuple(dataset.tags)
+    listing.formats = pools.strings_tuple(dataset.formats)
+    listing.geographicCoverage = pools.strings_tuple(dataset.geographicCoverage)
+    listing.timeRange = pools.time_range(dataset.timeRange)
+    listing.sampleAvailable = dataset.sampleAvailable
+    listing.sampleUrl = dataset.sampleUrl
+    listing.previewImage = pools.string(dataset.previewImage)
+    listing.qualityScore = dataset.qualityScore
+    listing.verified = dataset.verified
+    return listing
+
+
+class ListingPage(Sequence):
+    """
+    Listings at some catalog positions, materialized as Dataset models when read
+    """
+
+    def __init__(self, catalog: "CompactCatalog", positions: Sequence[int]):
+        self.catalog = catalog
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return ListingPage(self.catalog, self.positions[item])
+        return self.catalog.records[int(self.positions[item])].to_dataset()
+
+    def __iter__(self) -> Iterator[Dataset]:
+        records = self.catalog.records
+        for position in self.positions:
+            yield records[int(position)].to_dataset()
+
+
+class CompactCatalogBuilder:
+    """
+    Compacts listings one at a time into a CompactCatalog, sharing values across all of them
+    """
+
+    def __init__(self, compress: bool = COMPRESS_DESCRIPTIONS):
+        self.compress = compress
+        self.records: List[CompactListing] = []
+        self._pools = _Pools()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, dataset: Dataset):
+        self.records.append(compact_listing(dataset, self._pools, self.compress))
+
+    @property
+    def shared_values(self) -> int:
+        pools = self._pools
+        return sum(
+            len(pool) for pool in (pools.strings, pools.tuples, pools.values, pools.providers, pools.time_ranges)
+        )
+
+    def build(self) -> "CompactCatalog":
+        return CompactCatalog.from_records(self.records, self.compress, self.shared_values)
+
+
+class CompactCatalog(Sequence):
+    """
+    The listings of one catalog load as CompactListing records, read as Dataset models
+    """
+
+    def __init__(self, datasets: Iterable[Dataset], compress: bool = COMPRESS_DESCRIPTIONS):
+        builder = CompactCatalogBuilder(compress)
+        for dataset in datasets:
+            builder.add(dataset)
+        self.records: List[CompactListing] = builder.records
+        self.compressed = compress
+        self.shared_values = builder.shared_values
+
+    @classmethod
+    def from_records(cls, records: List[CompactListing], compressed: bool, shared_values: int) -> "CompactCatalog":
+        catalog = cls.__new__(cls)
+        catalog.records = records
+        catalog.compressed = compressed
+        catalog.shared_values = shared_values
+        return catalog
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """
+        The catalog as flat NumPy arrays, the layout of an on-disk snapshot
+
+        Strings, tuples, providers, time ranges and dates are written once to
+        shared tables and listings refer to them by position (-1 for None).
+        Compressed descriptions go to a separate bytes table and are referred
+        to by negative positions, starting at -2.
+        """
+        import numpy as np
+
+        strings: Dict[str, int] = {}
+        tuples: Dict[tuple, int] = {}
+        tuple_items: List[int] = []
+        tuple_ends: List[int] = []
+        providers: Dict[int, int] = {}
+        provider_columns: Dict[str, list] = {"provider_name": [], "provider_logo": [], "provider_verified": []}
+        time_ranges: Dict[int, int] = {}
+        time_range_columns: Dict[str, list] = {"time_range_start": [], "time_range_end": []}
+        blobs: List[bytes] = []
+
+        def string(value: Optional[str]) -> int:
+            if value is None:
+                return -1
+            position = strings.get(value)
+            if position is None:
+                position = strings[value] = len(strings)
+            return position
+
+        def strings_tuple(values: tuple) -> int:
+            position = tuples.get(values)
+            if position is None:
+                position = tuples[values] = len(tuples)
+                tuple_items.extend(string(value) for value in values)
+                tuple_ends.append(len(tuple_items))
+            return position
+
+        def provider(value: Provider) -> int:
+            # Providers are shared instances, so identity finds the repeats
+            position = providers.get(id(value))
+            if position is None:
+                position = providers[id(value)] = len(providers)
+                provider_columns["provider_name"].append(string(value.name))
+                provider_columns["provider_logo"].append(string(value.logo))
+                provider_columns["provider_verified"].append(value.verified)
+            return position
+
+        def time_range(value: Optional[TimeRange]) -> int:
+            if value is None:
+                return -1
+            position = time_ranges.get(id(value))
+            if position is None:
+                position = time_ranges[id(value)] = len(time_ranges)
+                time_range_columns["time_range_start"].append(string(value.start.isoformat()))
+                time_range_columns["time_range_end"].append(string(value.end.isoformat()))
+            return position
+
+        def description(value: Union[str, bytes]) -> int:
+            if isinstance(value, bytes):
+                blobs.append(value)
+                return -1 - len(blobs)
+            return string(value)
+
+        columns: Dict[str, list] = {name: [] for name in _RECORD_COLUMNS}
+        for record in self.records:
+            columns["id"].append(string(record.id))
+            columns["title"].append(string(record.title))
+            columns["description"].append(description(record._description))
+            columns["provider"].append(provider(record.provider))
+            columns["category"].append(record._category)
+            columns["subCategory"].append(string(record.subCategory))
+            columns["frequency"].append(record._frequency)
+            columns["lastUpdated"].append(string(record.lastUpdated.isoformat()))
+            columns["pricing"].append(record._pricing)
+            columns["price"].append(record.price)
+            columns["currency"].append(string(record.currency))
+            columns["access"].append(record._access)
+            columns["rating"].append(record.rating)
+            columns["ratingsCount"].append(record.ratingsCount)
+            columns["downloadCount"].append(record.downloadCount)
+            columns["tags"].append(strings_tuple(record.tags))
+            columns["formats"].append(strings_tuple(record.formats))
+            columns["geographicCoverage"].append(strings_tuple(record.geographicCoverage))
+            columns["timeRange"].append(time_range(record.timeRange))
+            columns["sampleAvailable"].append(record.sampleAvailable)
+            columns["sampleUrl"].append(string(record.sampleUrl))
+            columns["previewImage"].append(string(record.previewImage))
+            columns["qualityScore"].append(record.qualityScore)
+            columns["verified"].append(record.verified)
+
+        arrays = {name: np.array(values, dtype=_RECORD_COLUMNS[name]) for name, values in columns.items()}
+        arrays.update({name: np.array(values, dtype=np.int32) for name, values in provider_columns.items()
+                       if name != "provider_verified"})
+        arrays["provider_verified"] = np.array(provider_columns["provider_verified"], dtype=np.bool_)
+        arrays.update({name: np.array(values, dtype=np.int32) for name, values in time_range_columns.items()})
+        arrays["tuple_items"] = np.array(tuple_items, dtype=np.int32)
+        arrays["tuple_ends"] = np.array(tuple_ends, dtype=np.int64)
+        encoded = [value.encode() for value in strings]
+        arrays["string_data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        arrays["string_ends"] = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+        arrays["blob_data"] = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+        arrays["blob_ends"] = np.cumsum([len(blob) for blob in blobs], dtype=np.int64)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, Any], compress: bool = COMPRESS_DESCRIPTIONS) -> "CompactCatalog":
+        """
+        Rebuild a catalog from to_arrays() output, such as arrays over a memory-mapped snapshot
+
+        Every value is copied out of the arrays, so the caller may release
+        their buffer as soon as this returns.
+        """
+        from datetime import datetime
+
+        def table(data, ends) -> List[bytes]:
+            data = data.tobytes()
+            starts = [0] + ends[:-1]
+            return [data[start:end] for start, end in zip(starts, ends)]
+
+        strings: List[Optional[str]] = [value.decode() for value in
+                                        table(arrays["string_data"], arrays["string_ends"].tolist())]
+        blobs = table(arrays["blob_data"], arrays["blob_ends"].tolist())
+        # Position -1 reads the appended None
+        strings.append(None)
+
+        moments: Dict[int, datetime] = {}
+
+        def moment(position: int) -> datetime:
+            value = moments.get(position)
+            if value is None:
+                value = moments[position] = datetime.fromisoformat(strings[position])
+            return value
+
+        tuple_items = [strings[position] for position in arrays["tuple_items"].tolist()]
+        tuple_ends = arrays["tuple_ends"].tolist()
+        tuples = [tuple(tuple_items[start:end]) for start, end in zip([0] + tuple_ends[:-1], tuple_ends)]
+        providers = [
+            Provider.model_construct(name=strings[name], logo=strings[logo], verified=verified)
+            for name, logo, verified in zip(arrays["provider_name"].tolist(), arrays["provider_logo"].tolist(),
+                                            arrays["provider_verified"].tolist())
+        ]
+        time_ranges: List[Optional[TimeRange]] = [
+            TimeRange.model_construct(start=moment(start), end=moment(end))
+            for start, end in zip(arrays["time_range_start"].tolist(), arrays["time_range_end"].tolist())
+        ]
+        time_ranges.append(None)
+
+        def description(position: int) -> Union[str, bytes]:
+            if position >= -1:
+                return _compact_description(strings[position], compress)
+            blob = blobs[-2 - position]
+            return blob if compress else zlib.decompress(blob).decode()
+
+        records: List[CompactListing] = []
+        columns = [arrays[name].tolist() for name in _RECORD_COLUMNS]
+        for (id, title, text, provider, category, sub_category, frequency, last_updated, pricing, price, currency,
+             access, rating, ratings_count, download_count, tags, formats, coverage, time_range, sample_available,
+             sample_url, preview_image, quality_score, verified) in zip(*columns):
+            listing = CompactListing()
+            listing.id = strings[id]
+            listing.title = strings[title]
+            listing._description = description(text)
+            listing.provider = providers[provider]
+            listing._category = category
+            listing.subCategory = strings[sub_category]
+            listing._frequency = frequency
+            listing.lastUpdated = moment(last_updated)
+            listing._pricing = pricing
+            listing.price = price
+            listing.currency = strings[currency]
+            listing._access = access
+            listing.rating = rating
+            listing.ratingsCount = ratings_count
+            listing.downloadCount = download_count
+            listing.tags = tuples[tags]
+            listing.formats = tuples[formats]
+            listing.geographicCoverage = tuples[coverage]
+            listing.timeRange = time_ranges[time_range]
+            listing.sampleAvailable = sample_available
+            listing.sampleUrl = strings[sample_url]
+            listing.previewImage = strings[preview_image]
+            listing.qualityScore = quality_score
+            listing.verified = verified
+            records.append(listing)
+        shared_values = len(strings) + len(tuples) + len(providers) + len(time_ranges) + len(moments)
+        return cls.from_records(records, compress, shared_values)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return ListingPage(self, range(len(self.records))[item])
+        return self.records[item].to_dataset()
+
+    def __iter__(self) -> Iterator[Dataset]:
+        for record in self.records:
+            yield record.to_dataset()
+
+    def page(self, positions: Sequence[int]) -> ListingPage:
+        return ListingPage(self, positions)
@@ -0,0 +1,178 @@
+"""
+Coverage indexes: the time span and the places each listing covers
+
+TimeRangeIndex keeps the listings with a timeRange sorted twice, by start
+and by end. A listing spans a window when it starts no later than the
+window's start point and ends no earlier than its end point, so every
+time query is two binary searches, and the listings failing either bound
+are struck from the mask as two contiguous slices of the sorted orders:
+
+- overlaps [a, b]: start <= b and end >= a
+- covers [a, b]: start <= a and end >= b
+
+GeoIndex maps each place in GEO_HIERARCHY (with aliases such as "US" or
+"EMEA") to the listings naming it. A place matches listings that name it,
+a place inside it ("Europe" finds "Germany") or a place containing it
+("Germany" finds "Europe" and "Global"). Places outside the hierarchy
+match by name only. Both indexes are built with each CatalogIndex.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set
+
+from app.models.dataset import Dataset
+
+OVERLAPS = "overlaps"
+COVERS = "covers"
+
+# Region -> the regions or countries inside it
+GEO_HIERARCHY: Dict[str, List[str]] = {
+    "Global": ["North America", "Latin America", "Europe", "Middle East", "Africa", "Asia Pacific"],
+    "North America": ["United States", "Canada", "Mexico"],
+    "Latin America": ["Brazil", "Argentina", "Chile", "Colombia", "Peru", "Mexico"],
+    "Europe": [
+        "European Union", "United Kingdom", "Switzerland", "Norway", "Iceland", "Ukraine", "Turkey",
+    ],
+    "European Union": [
+        "Austria", "Belgium", "Bulgaria", "Croatia", "Cyprus", "Czech Republic", "Denmark", "Estonia", "Finland",
+        "France", "Germany", "Greece", "Hungary", "Ireland", "Italy", "Latvia", "Lithuania", "Luxembourg", "Malta",
+        "Netherlands", "Poland", "Portugal", "Romania", "Slovakia", "Slovenia", "Spain", "Sweden",
+    ],
+    "Middle East": ["Saudi Arabia", "United Arab Emirates", "Israel", "Qatar", "Turkey"],
+    "Africa": ["South Africa", "Nigeria", "Egypt", "Kenya", "Morocco"],
+    "Asia Pacific": [
+        "China", "Japan", "India", "South Korea", "Singapore", "Hong Kong", "Taiwan", "Australia", "New Zealand",
+        "Indonesia", "Malaysia", "Thailand", "Philippines", "Vietnam",
+    ],
+}
+GEO_ALIASES = {
+    "worldwide": "Global", "world": "Global", "international": "Global",
+    "us": "United States", "usa": "United States", "united states of america": "United States",
+    "uk": "United Kingdom", "great britain": "United Kingdom", "eu": "European Union",
+    "apac": "Asia Pacific", "latam": "Latin America", "mena": "Middle East", "uae": "United Arab Emirates",
+    "emea": "Europe",
+}
+
+
+def _place_key(place: str) -> str:
+    return " ".join(place.lower().split())
+
+
+_CANONICAL = {_place_key(place): place for region, places in GEO_HIERARCHY.items() for place in [region, *places]}
+_CANONICAL.update({alias: place for alias, place in GEO_ALIASES.items()})
+_PARENTS: Dict[str, Set[str]] = {}
+for _region, _places in GEO_HIERARCHY.items():
+    for _place in _places:
+        _PARENTS.setdefault(_place, set()).add(_region)
+
+
+def canonical_place(place: str) -> str:
+    """
+    Hierarchy name for a place or alias; other places keep their own name (case-folded)
+    """
+    key = _place_key(place)
+    return _CANONICAL.get(key, key)
+
+
+def _closure(place: str, edges) -> Set[str]:
+    found = set()
+    frontier = [place]
+    while frontier:
+        for related in edges(frontier.pop()):
+            if related not in found:
+                found.add(related)
+                frontier.append(related)
+    return found
+
+
+def related_places(place: str) -> Set[str]:
+    """
+    A place with every region containing it and every place inside it
+    """
+    canonical = canonical_place(place)
+    ancestors = _closure(canonical, lambda node: _PARENTS.get(node, ()))
+    descendants = _closure(canonical, lambda node: GEO_HIERARCHY.get(node, ()))
+    return {canonical} | ancestors | descendants
+
+
+def _epoch(moment: datetime) -> int:
+    return int(moment.timestamp())
+
+
+class TimeRangeIndex:
+    """
+    Listings with a timeRange, sorted by start and by end, as NumPy arrays
+    """
+
+    def __init__(self, datasets: Sequence[Dataset]):
+        import numpy as np
+
+        self.size = len(datasets)
+        positions = [position for position, dataset in enumerate(datasets) if dataset.timeRange is not None]
+        starts = np.array([_epoch(datasets[position].timeRange.start) for position in positions], dtype=np.int64)
+        ends = np.array([_epoch(datasets[position].timeRange.end) for position in positions], dtype=np.int64)
+        positions = np.array(positions, dtype=np.int64)
+        by_start = np.argsort(starts, kind="stable")
+        by_end = np.argsort(ends, kind="stable")
+        self.starts, self.start_positions = starts[by_start], positions[by_start]
+        self.ends, self.end_positions = ends[by_end], positions[by_end]
+        self.has_range = np.zeros(self.size, dtype=bool)
+        self.has_range[positions] = True
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def spanning(self, start_point: int, end_point: int):
+        """
+        Mask of listings starting at or before start_point and ending at or after end_point
+        """
+        import numpy as np
+
+        mask = self.has_range.copy()
+        mask[self.start_positions[np.searchsorted(self.starts, start_point, side="right"):]] = False
+        mask[self.end_positions[:np.searchsorted(self.ends, end_point, side="left")]] = False
+        return mask
+
+    def mask(self, start: Optional[datetime], end: Optional[datetime], mode: Optional[str] = None):
+        """
+        Mask of listings whose time range overlaps (default) or covers the window
+
+        A missing bound leaves the window open on that side when overlapping;
+        when covering, the window shrinks to the given date.
+        """
+        if (mode or OVERLAPS) == COVERS:
+            return self.spanning(_epoch(start or end), _epoch(end or start))
+        if not len(self):
+            return self.has_range.copy()
+        # Overlapping: listings must start by the window's end and end after its start
+        start_point = _epoch(end) if end is not None else int(self.starts[-1])
+        end_point = _epoch(start) if start is not None else int(self.ends[0])
+        return self.spanning(start_point, end_point)
+
+
+class GeoIndex:
+    """
+    Listing positions per place named in geographicCoverage
+    """
+
+    def __init__(self, datasets: Sequence[Dataset]):
+        import numpy as np
+
+        self.size = len(datasets)
+        places: Dict[str, List[int]] = {}
+        for position, dataset in enumerate(datasets):
+            for place in {canonical_place(place) for place in dataset.geographicCoverage}:
+                places.setdefault(place, []).append(position)
+        self.places = {place: np.array(positions, dtype=np.int64) for place, positions in places.items()}
+
+    def mask(self, place: str):
+        """
+        Mask of listings covering a place through the hierarchy
+        """
+        import numpy as np
+
+        mask = np.zeros(self.size, dtype=bool)
+        for related in related_places(place):
+            positions = self.places.get(related)
+            if positions is not None:
+                mask[positions] = True
+        return mask
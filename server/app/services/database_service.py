@@ -1,13 +1,28 @@
 import os
+import re
+import json
+import time
+import asyncio
 import asyncpg
 import uuid
-from typing import List, Dict, Any, Optional
+import threading
+from contextlib import asynccontextmanager, nullcontext
+from typing import List, Dict, Any, Optional, Sequence, AsyncIterator
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import text
+from sqlalchemy import exc as sqlalchemy_exc
 import logging
 from dotenv import load_dotenv
-from databricks.sdk import WorkspaceClient
+
+from app.services import metrics_service
+from app.services.tracing_service import tracing_service
+from app.services import timing_service
+from app.services.query_profiler_service import query_profiler, estimate_result_bytes
+from app.services.pool_service import pool_manager
+from app.services.replica_service import ReplicaRouter, is_read_only, is_failover_error, primary_reads
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.workspace import workspace_host
 
 # Load environment variables at module import time
 load_dotenv()
@@ -19,20 +34,99 @@ class DatabaseService:
     Service for managing PostgreSQL database connections with Databricks SDK OAuth authentication
     """
     def __init__(self):
-        self.engine = None
-        self.session_factory = None
-        self.databricks_client = None
+        # Created on first use (or by initialize() at startup) unless STARTUP_MODE=eager
+        self._engine = None
+        self._session_factory = None
+        self._databricks_client = None
+        self._databricks_client_ready = False
+        self._init_lock = threading.RLock()
         self._cached_credentials = None
         self._credentials_cache_duration = 3600  # 1 hour cache
         self._credentials_timestamp = None
-        self._initialize_databricks_client()
-        self._initialize_connection()
+        # Direct asyncpg pool for hot read queries, created on first use
+        self.fast_path_enabled = os.getenv('PG_FAST_PATH', 'true').lower() == 'true'
+        # PgBouncer in transaction mode cannot keep named prepared statements
+        self.pgbouncer_mode = os.getenv('PG_PGBOUNCER_MODE', 'false').lower() == 'true'
+        self.statement_cache_size = 0 if self.pgbouncer_mode else int(os.getenv('PG_STATEMENT_CACHE_SIZE', '256'))
+        self._fast_pool = None
+        self._fast_pool_lock = None
+        self.stream_batch_size = int(os.getenv('PG_STREAM_BATCH_SIZE', '2000'))
+        # Read replicas from PGREPLICA_HOSTS; empty means every read hits the primary
+        self.replicas = ReplicaRouter(self)
+        # Fails calls to the primary fast while it is unreachable
+        self.circuit = CircuitBreaker('postgres')
+        if os.getenv('STARTUP_MODE', 'lazy').lower() == 'eager':
+            self.initialize()
+    
+    def initialize(self):
+        """
+        Create the Databricks client and the engine now rather than on first use
+        
+        Blocking (credential generation may call the workspace); the lifespan
+        handler runs it on a thread alongside the other services.
+        """
+        self.databricks_client
+        self.engine
+    
+    @property
+    def databricks_client(self):
+        """
+        Databricks client for credential generation, created on first use
+        
+        Blocking; async code reaches it through a worker thread, and monitoring
+        reads _databricks_client instead so it never builds one. A failed
+        initialization is retried on the next use.
+        """
+        if not self._databricks_client_ready:
+            with self._init_lock:
+                if not self._databricks_client_ready:
+                    self._databricks_client_ready = self._initialize_databricks_client()
+        return self._databricks_client
+    
+    @databricks_client.setter
+    def databricks_client(self, client):
+        self._databricks_client = client
+    
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._init_lock:
+                if self._engine is None:
+                    self._initialize_connection()
+        return self._engine
+    
+    @engine.setter
+    def engine(self, engine):
+        self._engine = engine
+    
+    @property
+    def session_factory(self):
+        if self._session_factory is None:
+            self.engine
+        return self._session_factory
+    
+    async def primary_session_factory(self):
+        """
+        Session factory for the primary; created on a worker thread, as credential generation blocks
+        """
+        if self._session_factory is None:
+            await asyncio.to_thread(lambda: self.session_factory)
+        return self._session_factory
     
-    def _initialize_databricks_client(self):
+    @session_factory.setter
+    def session_factory(self, session_factory):
+        self._session_factory = session_factory
+    
+    def _initialize_databricks_client(self) -> bool:
         """
         Initialize Databricks SDK client for credential generation with OAuth client credentials support
+        
+        Returns False when the client could not be created, so that it is retried.
         """
         try:
+            # Deferred: the SDK is a heavy import and only needed for OAuth credentials
+            from databricks.sdk import WorkspaceClient
+            
             server_hostname = os.getenv('DATABRICKS_HOST')
             access_token = os.getenv('DATABRICKS_ACCESS_TOKEN')
             client_id = os.getenv('DATABRICKS_CLIENT_ID')
@@ -48,8 +142,8 @@ class DatabaseService:
             # Priority 1: OAuth client credentials (production)
             if client_id and client_secret:
                 logger.info("Using OAuth client credentials for database credential generation")
-                self.databricks_client = WorkspaceClient(
-                    host=f"https://{server_hostname}",
+                client = WorkspaceClient(
+                    host=workspace_host(server_hostname),
                     client_id=client_id,
                     client_secret=client_secret
                 )
@@ -58,8 +152,8 @@ class DatabaseService:
             # Priority 2: Access token authentication  
             elif access_token:
                 logger.info("Using access token for database credential generation")
-                self.databricks_client = WorkspaceClient(
-                    host=f"https://{server_hostname}",
+                client = WorkspaceClient(
+                    host=workspace_host(server_hostname),
                     token=access_token
                 )
                 logger.info("✅ Databricks client initialized with access token for database credentials")
@@ -67,8 +161,8 @@ class DatabaseService:
             # Priority 3: CLI profile authentication (development)
             else:
                 logger.info(f"Using CLI profile '{cli_profile}' for database credential generation")
-                self.databricks_client = WorkspaceClient(
-                    host=f"https://{server_hostname}",
+                client = WorkspaceClient(
+                    host=workspace_host(server_hostname),
                     profile=cli_profile
                 )
                 logger.info(f"✅ Databricks client initialized with CLI profile '{cli_profile}' for database credentials")
@@ -76,19 +170,23 @@ class DatabaseService:
             # Test if the database API is available
             try:
                 # Just check if the API exists without making a full call
-                if hasattr(self.databricks_client, 'database') and hasattr(self.databricks_client.database, 'generate_database_credential'):
+                if hasattr(client, 'database') and hasattr(client.database, 'generate_database_credential'):
                     logger.info("Database credential generation API is available")
                 else:
                     logger.warning("Database credential generation API is not available on this client")
-                    self.databricks_client = None
+                    client = None
             except Exception as api_test_error:
                 logger.warning(f"Database credential API test failed: {api_test_error}")
+            
+            self._databricks_client = client
+            return True
                 
         except Exception as e:
             logger.error(f"Failed to initialize Databricks client for database credentials: {e}")
             logger.error(f"Error type: {type(e).__name__}")
             logger.info("Falling back to static password authentication")
-            self.databricks_client = None
+            self._databricks_client = None
+            return False
     
     def _resolve_instance_name(self) -> Optional[str]:
         """
@@ -154,10 +252,11 @@ class DatabaseService:
             
             # Generate database credential using Databricks SDK
             logger.info("Calling Databricks SDK generate_database_credential...")
-            credential_response = self.databricks_client.database.generate_database_credential(
-                request_id=request_id,
-                instance_names=[instance_name]
-            )
+            with tracing_service.span("db.generate_credentials", attributes={"db.instance": instance_name}):
+                credential_response = self.databricks_client.database.generate_database_credential(
+                    request_id=request_id,
+                    instance_names=[instance_name]
+                )
             
             logger.info(f"Credential response received: {type(credential_response).__name__}")
             
@@ -285,13 +384,15 @@ class DatabaseService:
             logger.info("To use static password, set PGPASSWORD environment variable")
             return static_creds
     
-    def _get_database_url(self) -> str:
+    def _get_database_url(self, host: Optional[str] = None, port: Optional[int] = None) -> str:
         """
         Construct database URL using dynamic OAuth credentials or static configuration
+        
+        host/port override PGHOST/PGPORT, e.g. for a read replica.
         """
         # Get connection parameters from environment variables
-        host = os.getenv('PGHOST', 'localhost')
-        port = os.getenv('PGPORT', '5432')
+        host = host or os.getenv('PGHOST', 'localhost')
+        port = port or os.getenv('PGPORT', '5432')
         database = os.getenv('PGDATABASE', 'marketplace')
         sslmode = os.getenv('PGSSLMODE', 'require')
         
@@ -329,26 +430,31 @@ class DatabaseService:
         
         return database_url
     
+    def _create_engine(self, database_url: str, name: str = 'primary'):
+        """
+        Create an engine and session factory for one server (primary or replica)
+        
+        Pool limits and liveness checks come from the pool manager.
+        """
+        engine = create_async_engine(
+            database_url,
+            echo=False,  # Set to True for SQL query logging
+            **pool_manager.engine_options()
+        )
+        pool_manager.register_engine(name, engine)
+        session_factory = async_sessionmaker(
+            engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+        return engine, session_factory
+    
     def _initialize_connection(self):
         """
         Initialize database engine and session factory
         """
         try:
-            database_url = self._get_database_url()
-            self.engine = create_async_engine(
-                database_url,
-                echo=False,  # Set to True for SQL query logging
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,
-                pool_recycle=3600,
-            )
-            
-            self.session_factory = async_sessionmaker(
-                self.engine,
-                class_=AsyncSession,
-                expire_on_commit=False
-            )
+            self.engine, self.session_factory = self._create_engine(self._get_database_url())
             
             logger.info("Database connection initialized successfully")
             
@@ -356,29 +462,359 @@ class DatabaseService:
             logger.error(f"Failed to initialize database connection: {e}")
             raise
     
-    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None,
+                            read_only: Optional[bool] = None) -> List[Dict[str, Any]]:
         """
         Execute a raw SQL query and return results
+        
+        Read-only statements (detected from the SQL unless read_only is given)
+        go to a read replica when one is configured and fresh enough, and are
+        retried on the primary if the replica fails.
         """
-        try:
-            async with self.session_factory() as session:
-                result = await session.execute(text(query), params or {})
-                
-                # Convert result to list of dictionaries
-                columns = result.keys()
-                rows = result.fetchall()
+        if read_only is None:
+            read_only = is_read_only(query)
+        replica = self.replicas.choose() if read_only else None
+        if replica is not None:
+            try:
+                with self.replicas.track(replica):
+                    return await self._execute_on(
+                        await self.replicas.session_factory(replica), query, params, replica.name
+                    )
+            except Exception as e:
+                if not is_failover_error(e):
+                    raise
+                self.replicas.mark_failed(replica, e)
+                metrics_service.db_routed_queries.labels(target='fallback').inc()
+        elif read_only and self.replicas.enabled:
+            metrics_service.db_routed_queries.labels(target='primary').inc()
+        return await self._execute_on(await self.primary_session_factory(), query, params, 'primary')
+    
+    async def _execute_on(self, session_factory, query: str, params: Optional[Dict[str, Any]],
+                          target: str) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        with self._guard(target), timing_service.phase('db'), tracing_service.span("db.execute_query", attributes={
+            "db.system": "postgresql",
+            "db.statement": tracing_service.db_statement(query),
+            "db.target": target,
+        }) as span:
+            try:
+                async with pool_manager.checkout(target), session_factory() as session:
+                    # Acquire the connection explicitly so pool wait is measured on its own
+                    with tracing_service.span("db.pool_acquire"):
+                        await session.connection()
+                    acquired = time.perf_counter()
+                    pool_manager.record_wait(target, acquired - started)
+                    
+                    result = await session.execute(text(query), params or {})
+                    
+                    # Convert result to list of dictionaries
+                    columns = result.keys()
+                    rows = [dict(zip(columns, row)) for row in result.fetchall()]
+                    
+                    metrics_service.db_query_duration.labels(outcome='success').observe(time.perf_counter() - started)
+                    span.set_attribute("db.rows", len(rows))
+                    query_profiler.record(
+                        query, time.perf_counter() - acquired, rows=rows, params=params, explain=self.explain_query
+                    )
+                    return rows
+                    
+            except Exception as e:
+                metrics_service.db_query_duration.labels(outcome='error').observe(time.perf_counter() - started)
+                if isinstance(e, sqlalchemy_exc.TimeoutError):
+                    pool_manager.record_wait(target, time.perf_counter() - started, timed_out=True)
+                query_profiler.record(query, time.perf_counter() - started, error=e, params=params)
+                tracing_service.record_error(span, e)
+                logger.error(f"Database query failed on {target}: {e}")
+                logger.error(f"Query: {query}")
+                raise
+    
+    def _guard(self, target: str):
+        """
+        Circuit breaker for calls to the primary; failing replicas are benched by the router instead
+        """
+        return self.circuit.guard(is_failover_error) if target == 'primary' else nullcontext()
+    
+    @staticmethod
+    async def _init_fast_connection(connection: asyncpg.Connection):
+        """
+        Decode json/jsonb like the SQLAlchemy path does
+        
+        Binary codecs so the same connection can also COPY json columns.
+        """
+        await connection.set_type_codec(
+            'json', schema='pg_catalog', format='binary',
+            encoder=lambda value: json.dumps(value).encode(), decoder=json.loads
+        )
+        # jsonb's binary form is a version byte followed by the JSON text
+        await connection.set_type_codec(
+            'jsonb', schema='pg_catalog', format='binary',
+            encoder=lambda value: b'\x01' + json.dumps(value).encode(), decoder=lambda data: json.loads(data[1:])
+        )
+    
+    async def _get_fast_pool(self) -> asyncpg.Pool:
+        """
+        Create the asyncpg pool on first use, with the same credentials as the engine
+        """
+        if self._fast_pool is not None:
+            return self._fast_pool
+        if self._fast_pool_lock is None:
+            self._fast_pool_lock = asyncio.Lock()
+        async with self._fast_pool_lock:
+            if self._fast_pool is None:
+                self._fast_pool = await self._create_fast_pool()
+        return self._fast_pool
+    
+    async def _create_fast_pool(self, host: Optional[str] = None, port: Optional[int] = None,
+                                name: str = 'primary') -> asyncpg.Pool:
+        # Credential generation may call the workspace
+        credentials = await asyncio.to_thread(self._get_database_credentials)
+        sslmode = os.getenv('PGSSLMODE', 'require')
+        host = host or os.getenv('PGHOST', 'localhost')
+        port = port or int(os.getenv('PGPORT', '5432'))
+        pool = await asyncpg.create_pool(
+            host=host,
+            port=port,
+            database=os.getenv('PGDATABASE', 'marketplace'),
+            user=credentials['username'],
+            password=credentials['password'] or None,
+            ssl=sslmode or None,
+            min_size=int(os.getenv('PG_FAST_POOL_MIN_SIZE', '1')),
+            max_size=pool_manager.fast_pool_max,
+            statement_cache_size=self.statement_cache_size,
+            max_inactive_connection_lifetime=300,
+            init=self._init_fast_connection,
+        )
+        logger.info(
+            f"asyncpg fast path pool initialized for {host}:{port} (statement cache: {self.statement_cache_size}, "
+            f"pgbouncer mode: {self.pgbouncer_mode})"
+        )
+        pool_manager.register_fast_pool(name, pool)
+        return pool
+    
+    @asynccontextmanager
+    async def fast_connection(self) -> AsyncIterator[asyncpg.Connection]:
+        """
+        Borrow a raw asyncpg connection from the fast path pool (e.g. for COPY)
+        """
+        with self.circuit.guard(is_failover_error):
+            pool = await self._get_fast_pool()
+            async with pool.acquire() as connection:
+                yield connection
+    
+    async def fetch_records(self, query: str, *args: Any) -> Sequence[Any]:
+        """
+        Run a read query on the asyncpg pool and return asyncpg.Record rows
+        
+        Uses $1-style positional parameters. Statements are prepared server-side
+        and kept in the per-connection statement cache (disabled in pgbouncer
+        mode). Records support key access and dict(), so callers that only read
+        rows can use either path; falls back to execute_query when the fast
+        path is disabled.
+        """
+        if not self.fast_path_enabled:
+            # SQLAlchemy text() binds by name: $1 -> :p1
+            params = {f"p{index}": value for index, value in enumerate(args, 1)}
+            return await self.execute_query(re.sub(r"\$(\d+)", r":p\1", query), params or None, read_only=True)
+        
+        replica = self.replicas.choose()
+        if replica is not None:
+            try:
+                with self.replicas.track(replica):
+                    return await self._fetch_on(lambda: self.replicas.fast_pool(replica), query, args, replica.name)
+            except Exception as e:
+                if not is_failover_error(e):
+                    raise
+                self.replicas.mark_failed(replica, e)
+                metrics_service.db_routed_queries.labels(target='fallback').inc()
+        elif self.replicas.enabled:
+            metrics_service.db_routed_queries.labels(target='primary').inc()
+        return await self._fetch_on(self._get_fast_pool, query, args, 'primary')
+    
+    async def _fetch_on(self, get_pool, query: str, args: Sequence[Any], target: str) -> Sequence[Any]:
+        started = time.perf_counter()
+        with self._guard(target), timing_service.phase('db'), tracing_service.span("db.fetch_records", attributes={
+            "db.system": "postgresql",
+            "db.statement": tracing_service.db_statement(query),
+            "db.target": target,
+        }) as span:
+            try:
+                pool = await get_pool()
+                async with pool.acquire() as connection:
+                    acquired = time.perf_counter()
+                    pool_manager.record_wait(f"{target}/asyncpg", acquired - started)
+                    records = await connection.fetch(query, *args)
                 
-                return [dict(zip(columns, row)) for row in rows]
+                metrics_service.db_query_duration.labels(outcome='success').observe(time.perf_counter() - started)
+                span.set_attribute("db.rows", len(records))
+                query_profiler.record(query, time.perf_counter() - acquired, rows=records)
+                return records
                 
+            except Exception as e:
+                metrics_service.db_query_duration.labels(outcome='error').observe(time.perf_counter() - started)
+                query_profiler.record(query, time.perf_counter() - started, error=e)
+                tracing_service.record_error(span, e)
+                logger.error(f"Fast path query failed on {target}: {e}")
+                logger.error(f"Query: {query}")
+                raise
+    
+    async def fetch_columns(self, query: str, *args: Any) -> Dict[str, List[Any]]:
+        """
+        Run a read query on the fast path and return one list per column
+        """
+        records = await self.fetch_records(query, *args)
+        if not records:
+            return {}
+        columns = list(records[0].keys())
+        return {name: list(values) for name, values in zip(columns, zip(*(tuple(r.values()) for r in records)))}
+    
+    async def stream_records(self, query: str, *args: Any,
+                             batch_size: Optional[int] = None) -> AsyncIterator[Sequence[Any]]:
+        """
+        Stream a read query in batches through a server-side cursor
+        
+        Yields lists of rows (asyncpg.Record on the fast path, mappings on the
+        SQLAlchemy path) so callers can process a table without holding all of
+        it. The next batch is fetched while the caller works on the current one.
+        Runs on a read replica when one is eligible; a replica that fails before
+        the first batch arrives is swapped for the primary.
+        """
+        batch_size = batch_size or self.stream_batch_size
+        started = time.perf_counter()
+        replica = self.replicas.choose()
+        if replica is None:
+            self.circuit.allow()
+        if replica is not None:
+            self.replicas.begin(replica)
+        elif self.replicas.enabled:
+            metrics_service.db_routed_queries.labels(target='primary').inc()
+        span = tracing_service.tracer.start_span("db.stream_records", attributes={
+            "db.system": "postgresql",
+            "db.statement": tracing_service.db_statement(query),
+            "db.batch_size": batch_size,
+            "db.target": replica.name if replica else 'primary',
+        })
+        rows = batches = result_bytes = 0
+        fetch_seconds = 0.0
+        error = None
+        batch_source = self._stream_source(query, args, batch_size, replica)
+        try:
+            while True:
+                fetch_started = time.perf_counter()
+                try:
+                    batch = await batch_source.__anext__()
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    if replica is None or batches or not is_failover_error(e):
+                        raise
+                    self.replicas.mark_failed(replica, e)
+                    self.replicas.end(replica)
+                    metrics_service.db_routed_queries.labels(target='fallback').inc()
+                    replica = None
+                    self.circuit.allow()
+                    span.set_attribute("db.target", 'primary')
+                    await batch_source.aclose()
+                    batch_source = self._stream_source(query, args, batch_size, None)
+                    continue
+                finally:
+                    waited = time.perf_counter() - fetch_started
+                    fetch_seconds += waited
+                    timing_service.record('db', waited)
+                rows += len(batch)
+                batches += 1
+                result_bytes += estimate_result_bytes(batch)
+                yield batch
         except Exception as e:
-            logger.error(f"Database query failed: {e}")
+            error = e
+            tracing_service.record_error(span, e)
+            logger.error(f"Streaming query failed: {e}")
             logger.error(f"Query: {query}")
             raise
+        finally:
+            await batch_source.aclose()
+            if replica is not None:
+                self.replicas.end(replica)
+            elif not isinstance(error, CircuitOpenError):
+                if error is not None and is_failover_error(error):
+                    self.circuit.record_failure(error)
+                else:
+                    self.circuit.record_success()
+            outcome = 'error' if error else 'success'
+            metrics_service.db_query_duration.labels(outcome=outcome).observe(time.perf_counter() - started)
+            query_profiler.record(query, fetch_seconds, error=error, row_count=rows, result_bytes=result_bytes)
+            span.set_attribute("db.rows", rows)
+            span.set_attribute("db.batches", batches)
+            span.end()
+    
+    def _stream_source(self, query: str, args: Sequence[Any], batch_size: int, replica=None) -> AsyncIterator[Sequence[Any]]:
+        if self.fast_path_enabled:
+            get_pool = (lambda: self.replicas.fast_pool(replica)) if replica else self._get_fast_pool
+            return self._stream_fast_path(query, args, batch_size, get_pool)
+        get_sessions = (lambda: self.replicas.session_factory(replica)) if replica else self.primary_session_factory
+        return self._stream_sqlalchemy(query, args, batch_size, get_sessions, replica.name if replica else 'primary')
+    
+    async def _stream_fast_path(self, query: str, args: Sequence[Any], batch_size: int,
+                                get_pool) -> AsyncIterator[Sequence[Any]]:
+        pool = await get_pool()
+        async with pool.acquire() as connection:
+            # Cursors only live inside a transaction
+            async with connection.transaction(readonly=True):
+                cursor = await connection.cursor(query, *args)
+                next_batch = asyncio.ensure_future(cursor.fetch(batch_size))
+                try:
+                    while True:
+                        batch = await next_batch
+                        if not batch:
+                            break
+                        next_batch = asyncio.ensure_future(cursor.fetch(batch_size)) if len(batch) == batch_size else None
+                        yield batch
+                        if next_batch is None:
+                            break
+                finally:
+                    if next_batch is not None and not next_batch.done():
+                        next_batch.cancel()
+                        try:
+                            await next_batch
+                        except (asyncio.CancelledError, Exception):
+                            pass
+    
+    async def _stream_sqlalchemy(self, query: str, args: Sequence[Any], batch_size: int,
+                                 get_sessions, target: str) -> AsyncIterator[Sequence[Any]]:
+        params = {f"p{index}": value for index, value in enumerate(args, 1)}
+        session_factory = await get_sessions()
+        async with pool_manager.checkout(target), session_factory() as session:
+            result = await session.stream(
+                text(re.sub(r"\$(\d+)", r":p\1", query)), params,
+                execution_options={"yield_per": batch_size}
+            )
+            async for partition in result.mappings().partitions(batch_size):
+                yield partition
+    
+    async def explain_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Run EXPLAIN (ANALYZE, BUFFERS) for a read-only statement and return the JSON plan
+        
+        ANALYZE executes the statement, so the transaction is always rolled back.
+        """
+        session_factory = await self.primary_session_factory()
+        async with pool_manager.checkout('primary'), session_factory() as session:
+            try:
+                result = await session.execute(
+                    text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"), params or {}
+                )
+                return result.scalar()
+            finally:
+                await session.rollback()
     
     async def test_connection(self) -> bool:
         """
         Test database connection with automatic credential refresh if needed
+        
+        Returns False right away while the circuit is open.
         """
+        if self.circuit.is_open:
+            logger.warning(f"Database circuit open, skipping connection test: {self.circuit.last_error}")
+            return False
         try:
             result = await self.execute_query("SELECT 1 as test")
             return len(result) == 1 and result[0]['test'] == 1
@@ -386,7 +822,7 @@ class DatabaseService:
             logger.error(f"Database connection test failed: {e}")
             
             # If connection failed, try refreshing OAuth credentials and reconnecting
-            if self.databricks_client:
+            if self._databricks_client and not self.circuit.is_open:
                 logger.info("Attempting to refresh OAuth credentials and reconnect...")
                 try:
                     await self.refresh_connection()
@@ -409,12 +845,14 @@ class DatabaseService:
             self._credentials_timestamp = None
             
             # Close existing connection
-            if self.engine:
-                await self.engine.dispose()
+            if self._engine:
+                await self._engine.dispose()
                 logger.info("Closed existing database connection")
+            await self._close_fast_pool()
+            await self.replicas.close()
             
-            # Reinitialize with fresh credentials
-            self._initialize_connection()
+            # Reinitialize with fresh credentials (credential generation blocks)
+            await asyncio.to_thread(self._initialize_connection)
             logger.info("Database connection refreshed successfully")
             
         except Exception as e:
@@ -442,8 +880,8 @@ class DatabaseService:
         """
         import time
         
-        # Basic info about Databricks client availability
-        databricks_available = self.databricks_client is not None
+        # Basic info about Databricks client availability; never creates the client
+        databricks_available = self._databricks_client is not None
         static_password_available = bool(os.getenv('PGPASSWORD'))
         auth_method = self.get_databricks_auth_method()
         
@@ -481,13 +919,60 @@ class DatabaseService:
             "environment": os.getenv("ENVIRONMENT", "unknown")
         }
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get SQLAlchemy connection pool usage, checkout waits and saturation (for monitoring)
+        """
+        if not self._engine:
+            return {}
+        pool = self._engine.pool
+        primary = pool_manager.get_stats('primary')
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": primary.get("max_overflow", 0),
+            "saturation": primary.get("saturation", 0.0),
+            "wait_p95_ms": primary.get("wait_p95_ms", 0.0),
+            "manager": pool_manager.get_stats(),
+        }
+    
+    def get_circuit_stats(self) -> Dict[str, Any]:
+        """
+        Get the primary's circuit breaker state (for monitoring)
+        """
+        return self.circuit.get_stats()
+    
+    def get_replica_stats(self) -> Dict[str, Any]:
+        """
+        Get read replica health, lag and load (for monitoring)
+        """
+        return self.replicas.get_stats()
+    
+    @staticmethod
+    def primary_reads():
+        """
+        Context manager that sends reads to the primary (read-your-writes)
+        """
+        return primary_reads()
+    
+    async def _close_fast_pool(self):
+        if self._fast_pool is not None:
+            pool, self._fast_pool = self._fast_pool, None
+            await pool.close()
+            logger.info("Closed asyncpg fast path pool")
+    
     async def close(self):
         """
         Close database connections
         """
-        if self.engine:
-            await self.engine.dispose()
+        if self._engine:
+            await self._engine.dispose()
+            self._engine = self._session_factory = None
             logger.info("Database connections closed")
+        await self._close_fast_pool()
+        await self.replicas.close()
 
 # Global database service instance
 database_service = DatabaseService() 
\ No newline at end of file
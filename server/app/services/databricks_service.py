@@ -5,18 +5,40 @@ import os
 import logging
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
-from databricks.sdk import WorkspaceClient
-from databricks.sdk.service.sql import StatementState
 import re
+import time
 import asyncio
+import threading
+from collections import deque, OrderedDict
 from concurrent.futures import ThreadPoolExecutor
-import pandas as pd
+
+from app.services import metrics_service
+from app.services.tracing_service import tracing_service
+from app.services import timing_service
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.workspace import workspace_host
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+def is_unavailable_error(error: BaseException) -> bool:
+    """
+    Errors that mean the warehouse is unreachable or failing rather than the statement or request being wrong
+    """
+    # Only reached after a statement was sent, so the SDK (and requests) are already imported
+    import requests
+    from databricks.sdk import errors
+
+    if isinstance(error, errors.DatabricksError):
+        # 500, 503 and 504 and the error codes the SDK maps onto them
+        if isinstance(error, (errors.InternalError, errors.TemporarilyUnavailable, errors.DeadlineExceeded)):
+            return True
+        # Statuses the SDK has no class for, such as a 502 from a gateway, carry no error code
+        return type(error) is errors.DatabricksError and not error.error_code
+    return isinstance(error, (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout))
+
 class DatabricksService:
     """
     Service for connecting to Databricks using the SDK and fetching preview data
@@ -30,11 +52,28 @@ class DatabricksService:
         self.client_secret = os.getenv('DATABRICKS_CLIENT_SECRET')
         self.cli_profile = os.getenv('DATABRICKS_CLI_PROFILE', 'DEFAULT')
         self.preview_limit = int(os.getenv('PREVIEW_DATA_LIMIT', '15'))
-        self.client = None
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        # Successful previews are reused for PREVIEW_CACHE_SECONDS (0, the default, disables)
+        self.preview_cache_seconds = float(os.getenv('PREVIEW_CACHE_SECONDS', '0'))
+        self.preview_cache_size = int(os.getenv('PREVIEW_CACHE_SIZE', '256'))
+        self._preview_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # Fails previews fast while the warehouse is unreachable
+        self.circuit = CircuitBreaker('sql_warehouse')
+        # Created on first use (or by initialize() at startup) unless STARTUP_MODE=eager
+        self._client = None
+        self._client_ready = False
+        self._client_lock = threading.Lock()
+        self.executor_workers = int(os.getenv('PREVIEW_EXECUTOR_WORKERS', '2'))
+        self.executor = ThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix='databricks-sql')
         
-        # Initialize client
-        self._initialize_client()
+        # Executor usage tracking (queue wait is the time a statement waits for a free thread)
+        self._executor_lock = threading.Lock()
+        self._executor_queued = 0
+        self._executor_active = 0
+        self._executor_completed = 0
+        self._queue_wait_samples = deque(maxlen=1024)
+        
+        if os.getenv('STARTUP_MODE', 'lazy').lower() == 'eager':
+            self.initialize()
         
         # Log configuration (without sensitive data)
         logger.info(f"Databricks SDK service initialized:")
@@ -44,17 +83,36 @@ class DatabricksService:
         logger.info(f"  Has Access Token: {bool(self.access_token)}")
         logger.info(f"  Has Client Credentials: {bool(self.client_id and self.client_secret)}")
         logger.info(f"  Preview Limit: {self.preview_limit}")
+        logger.info(f"  Executor Workers: {self.executor_workers}")
+    
+    def initialize(self):
+        """
+        Create the SDK client now rather than on the first preview
+        """
+        self.client
+    
+    @property
+    def client(self):
+        if not self._client_ready:
+            with self._client_lock:
+                if not self._client_ready:
+                    self._initialize_client()
+                    self._client_ready = True
+        return self._client
     
     def _initialize_client(self):
         """
         Initialize Databricks SDK client with OAuth client credentials support
         """
         try:
+            # Deferred: the SDK is a heavy import
+            from databricks.sdk import WorkspaceClient
+            
             # Priority 1: OAuth client credentials (production)
             if self.client_id and self.client_secret:
                 logger.info("Initializing Databricks client with OAuth client credentials")
-                self.client = WorkspaceClient(
-                    host=f"https://{self.server_hostname}",
+                self._client = WorkspaceClient(
+                    host=workspace_host(self.server_hostname),
                     client_id=self.client_id,
                     client_secret=self.client_secret
                 )
@@ -63,8 +121,8 @@ class DatabricksService:
             # Priority 2: Access token authentication  
             elif self.access_token:
                 logger.info("Initializing Databricks client with access token")
-                self.client = WorkspaceClient(
-                    host=f"https://{self.server_hostname}",
+                self._client = WorkspaceClient(
+                    host=workspace_host(self.server_hostname),
                     token=self.access_token
                 )
                 logger.info("✅ Databricks client initialized with access token")
@@ -72,15 +130,15 @@ class DatabricksService:
             # Priority 3: CLI profile authentication (development)
             else:
                 logger.info(f"Initializing Databricks client with CLI profile: {self.cli_profile}")
-                self.client = WorkspaceClient(
-                    host=f"https://{self.server_hostname}",
+                self._client = WorkspaceClient(
+                    host=workspace_host(self.server_hostname),
                     profile=self.cli_profile
                 )
                 logger.info(f"✅ Databricks client initialized with CLI profile '{self.cli_profile}'")
                 
         except Exception as e:
             logger.error(f"Failed to initialize Databricks client: {e}")
-            self.client = None
+            self._client = None
     
     def get_auth_method(self) -> str:
         """
@@ -131,7 +189,9 @@ class DatabricksService:
         """
         try:
             if not self.client:
-                raise Exception("Databricks client not initialized")
+                error = Exception("Databricks client not initialized")
+                self.circuit.record_failure(error)
+                raise error
             
             # Extract warehouse ID from HTTP path
             warehouse_id = self.http_path.split('/')[-1] if self.http_path else None
@@ -141,14 +201,42 @@ class DatabricksService:
             logger.info(f"Executing query on warehouse {warehouse_id}: {query[:100]}...")
             
             # Execute the statement
-            response = self.client.statement_execution.execute_statement(
-                statement=query,
-                warehouse_id=warehouse_id,
-                wait_timeout="30s"
-            )
+            started = time.perf_counter()
+            with timing_service.phase('warehouse'), tracing_service.span("warehouse.execute_statement", attributes={
+                "db.system": "databricks",
+                "db.statement": tracing_service.db_statement(query),
+                "databricks.warehouse_id": warehouse_id,
+            }) as span:
+                try:
+                    response = self.client.statement_execution.execute_statement(
+                        statement=query,
+                        warehouse_id=warehouse_id,
+                        wait_timeout="30s"
+                    )
+                    state = response.status.state.value if response.status and response.status.state else 'UNKNOWN'
+                except Exception as e:
+                    state = 'ERROR'
+                    tracing_service.record_error(span, e)
+                    # A rejected statement (bad SQL, missing table, no permission) proves the warehouse answered
+                    if is_unavailable_error(e):
+                        self.circuit.record_failure(e)
+                    else:
+                        self.circuit.record_success()
+                    raise
+                finally:
+                    span.set_attribute("databricks.statement_state", state)
+                    metrics_service.warehouse_statement_duration.labels(state=state).observe(time.perf_counter() - started)
+                    metrics_service.warehouse_statements.labels(state=state).inc()
+            
+            # A failed statement means the warehouse answered; a statement still
+            # pending after the wait timeout, or cancelled, means it did not
+            if state in ('SUCCEEDED', 'FAILED'):
+                self.circuit.record_success()
+            else:
+                self.circuit.record_failure(Exception(f"Statement ended in state {state}"))
             
             # Check if execution was successful
-            if response.status.state != StatementState.SUCCEEDED:
+            if state != 'SUCCEEDED':
                 error_msg = f"Query failed with state: {response.status.state}"
                 if response.status.error:
                     error_msg += f" - {response.status.error.message}"
@@ -195,10 +283,103 @@ class DatabricksService:
             logger.error(f"SQL execution failed: {e}")
             raise
     
+    async def _run_in_executor(self, func, *args):
+        """
+        Run a blocking SDK call on the executor while tracking queue time and thread usage
+        """
+        submitted = time.perf_counter()
+        with self._executor_lock:
+            self._executor_queued += 1
+        
+        def run():
+            started = time.perf_counter()
+            with self._executor_lock:
+                self._executor_queued -= 1
+                self._executor_active += 1
+                self._queue_wait_samples.append(started - submitted)
+            metrics_service.executor_queue_wait.observe(started - submitted)
+            try:
+                with tracing_service.span("preview.executor_task", attributes={
+                    "executor.queue_wait_ms": round((started - submitted) * 1000, 3),
+                }):
+                    return func(*args)
+            finally:
+                with self._executor_lock:
+                    self._executor_active -= 1
+                    self._executor_completed += 1
+        
+        # Carry the caller's trace context onto the worker thread
+        future = self.executor.submit(tracing_service.bind_context(run))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A statement cancelled before it started never reaches run()
+            if future.cancelled():
+                with self._executor_lock:
+                    self._executor_queued -= 1
+            raise
+    
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """
+        Get executor queue and thread usage statistics (for load testing/monitoring)
+        """
+        with self._executor_lock:
+            waits = sorted(self._queue_wait_samples)
+            stats = {
+                'max_workers': self.executor_workers,
+                'active': self._executor_active,
+                'queued': self._executor_queued,
+                'completed': self._executor_completed,
+            }
+        
+        def wait_percentile(pct: float) -> float:
+            if not waits:
+                return 0.0
+            index = min(len(waits) - 1, int(len(waits) * pct / 100))
+            return round(waits[index] * 1000, 3)
+        
+        stats.update({
+            'executor_threads': len(getattr(self.executor, '_threads', ())),
+            'process_threads': threading.active_count(),
+            'queue_wait_ms': {
+                'samples': len(waits),
+                'p50': wait_percentile(50),
+                'p95': wait_percentile(95),
+                'p99': wait_percentile(99),
+                'max': round(waits[-1] * 1000, 3) if waits else 0.0,
+            }
+        })
+        return stats
+    
+    def _cached_preview(self, table_name: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Cached preview for a table; expired entries are kept as last-known-good for outages
+        """
+        entry = self._preview_cache.get(table_name)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if not allow_stale and time.monotonic() - stored_at >= self.preview_cache_seconds:
+            return None
+        self._preview_cache.move_to_end(table_name)
+        return result
+    
+    def _store_preview(self, table_name: str, result: Dict[str, Any]):
+        if self.preview_cache_seconds <= 0:
+            return
+        self._preview_cache[table_name] = (time.monotonic(), result)
+        self._preview_cache.move_to_end(table_name)
+        while len(self._preview_cache) > self.preview_cache_size:
+            self._preview_cache.popitem(last=False)
+    
     async def get_table_preview(self, table_reference: str) -> Dict[str, Any]:
         """
         Get preview data from a Databricks table using SDK
+        
+        While the warehouse circuit is open, or when the statements fail, the
+        last cached preview of the table is returned (marked stale) if there is one.
         """
+        table_name = None
         try:
             # Sanitize and get actual table name
             table_name = self._sanitize_table_name(table_reference)
@@ -208,24 +389,22 @@ class DatabricksService:
             if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_.]*$', table_name):
                 raise ValueError(f"Invalid table name format: {table_name}")
             
+            cached = self._cached_preview(table_name)
+            if cached is not None:
+                return cached
+            
+            # Fail fast instead of queueing on the executor while the warehouse is down
+            self.circuit.allow()
+            
             # First, get table schema
             describe_query = f"DESCRIBE {table_name}"
             
             # Run describe query in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            schema_result = await loop.run_in_executor(
-                self.executor, 
-                self._execute_sql_sync, 
-                describe_query
-            )
+            schema_result = await self._run_in_executor(self._execute_sql_sync, describe_query)
             
             # Get preview data
             preview_query = f"SELECT * FROM {table_name} LIMIT {self.preview_limit}"
-            preview_result = await loop.run_in_executor(
-                self.executor,
-                self._execute_sql_sync,
-                preview_query
-            )
+            preview_result = await self._run_in_executor(self._execute_sql_sync, preview_query)
             
             result = {
                 'table_name': table_name,
@@ -236,10 +415,18 @@ class DatabricksService:
             }
             
             logger.info(f"Successfully retrieved {result['row_count']} rows from {table_name}")
+            self._store_preview(table_name, result)
             return result
                 
         except Exception as e:
-            logger.error(f"Failed to get table preview for {table_reference}: {e}")
+            stale = self._cached_preview(table_name, allow_stale=True) if table_name else None
+            if stale is not None:
+                logger.warning(f"Serving last cached preview of {table_name}: {e}")
+                return dict(stale, stale=True)
+            if isinstance(e, CircuitOpenError):
+                logger.warning(f"Preview of {table_reference} rejected: {e}")
+            else:
+                logger.error(f"Failed to get table preview for {table_reference}: {e}")
             # Return fallback data structure
             return {
                 'table_name': table_reference,
@@ -255,19 +442,17 @@ class DatabricksService:
         Test connection to Databricks using SDK
         """
         try:
-            if not self.client:
+            # Creating the client blocks on workspace calls
+            client = await asyncio.to_thread(lambda: self.client)
+            if not client:
                 logger.warning("Databricks client not initialized")
                 return False
             
             # Simple test query
             test_query = "SELECT 1 as test"
+            self.circuit.allow()
             
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor,
-                self._execute_sql_sync,
-                test_query
-            )
+            result = await self._run_in_executor(self._execute_sql_sync, test_query)
             
             success = result and result.get('row_count', 0) > 0
             if success:
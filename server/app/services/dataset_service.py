@@ -1,183 +1,307 @@
 import json
 import os
+import time
+import asyncio
+import contextvars
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 from datetime import datetime
 import logging
 from app.models.dataset import Dataset, DatasetCategory, DataFrequency, PricingModel, AccessLevel, Provider, TimeRange
 from app.services.database_service import database_service
+from app.services.snapshot_service import catalog_snapshot
+from app.services.catalog_index import CatalogIndex
+from app.services.catalog_columns import CatalogFilter
+from app.services.compact_catalog import CompactCatalogBuilder, ListingPage
+from app.services.bootstrap import BOOTSTRAP_PAGE_SIZE, BootstrapPayload
+from app.services.search_cache import SearchCache
+from app.services.sorting import SortKey
+from app.services import projections
+from app.services import metrics_service
+from app.services.tracing_service import tracing_service
+from app.services import timing_service
 
 logger = logging.getLogger(__name__)
 
 class DatasetService:
-    def __init__(self):
+    # Mapping from database values to enum values (built once, used for every row)
+    ENUM_MAPPINGS = {
+        'category': {
+            'MARKET_TRADING': DatasetCategory.MARKET_TRADING,
+            'ALTERNATIVE_DATA': DatasetCategory.ALTERNATIVE_DATA,
+            'REFERENCE_DATA': DatasetCategory.REFERENCE_DATA,
+            'RISK_COMPLIANCE': DatasetCategory.RISK_COMPLIANCE,
+            'CUSTOMER_ANALYTICS': DatasetCategory.CUSTOMER_ANALYTICS,
+            'ESG_SUSTAINABILITY': DatasetCategory.ESG_SUSTAINABILITY,
+            'CREDIT_RISK': DatasetCategory.CREDIT_RISK,
+            'FRAUD_DETECTION': DatasetCategory.FRAUD_DETECTION,
+            # Also handle the actual enum values from database
+            'Market Trading': DatasetCategory.MARKET_TRADING,
+            'Alternative Data': DatasetCategory.ALTERNATIVE_DATA,
+            'Reference Data': DatasetCategory.REFERENCE_DATA,
+            'Risk & Compliance': DatasetCategory.RISK_COMPLIANCE,
+            'Customer Analytics': DatasetCategory.CUSTOMER_ANALYTICS,
+            'ESG & Sustainability': DatasetCategory.ESG_SUSTAINABILITY,
+            'Credit Risk': DatasetCategory.CREDIT_RISK,
+            'Fraud Detection': DatasetCategory.FRAUD_DETECTION,
+        },
+        'frequency': {
+            'REAL_TIME': DataFrequency.REAL_TIME,
+            'DAILY': DataFrequency.DAILY,
+            'WEEKLY': DataFrequency.WEEKLY,
+            'MONTHLY': DataFrequency.MONTHLY,
+            'QUARTERLY': DataFrequency.QUARTERLY,
+            'ANNUALLY': DataFrequency.ANNUALLY,
+            # Also handle the actual enum values from database
+            'Real-time': DataFrequency.REAL_TIME,
+            'Daily': DataFrequency.DAILY,
+            'Weekly': DataFrequency.WEEKLY,
+            'Monthly': DataFrequency.MONTHLY,
+            'Quarterly': DataFrequency.QUARTERLY,
+            'Annual': DataFrequency.ANNUALLY,
+        },
+        'pricingModel': {
+            'FREE': PricingModel.FREE,
+            'ONE_TIME': PricingModel.ONE_TIME,
+            'SUBSCRIPTION': PricingModel.SUBSCRIPTION,
+            'PAY_PER_USE': PricingModel.PAY_PER_USE,
+            'CUSTOM': PricingModel.ONE_TIME,  # Map CUSTOM to ONE_TIME
+            # Also handle the actual enum values from database
+            'Free': PricingModel.FREE,
+            'One-time Purchase': PricingModel.ONE_TIME,
+            'Subscription': PricingModel.SUBSCRIPTION,
+            'Pay-per-use': PricingModel.PAY_PER_USE,
+        },
+        'accessLevel': {
+            'PUBLIC': AccessLevel.PUBLIC,
+            'PREMIUM': AccessLevel.PREMIUM,
+            'ENTERPRISE': AccessLevel.ENTERPRISE,
+            'RESTRICTED': AccessLevel.PREMIUM,  # Map RESTRICTED to PREMIUM
+            'PRIVATE': AccessLevel.ENTERPRISE,  # Map PRIVATE to ENTERPRISE
+            # Also handle the actual enum values from database
+            'Public': AccessLevel.PUBLIC,
+            'Premium': AccessLevel.PREMIUM,
+            'Enterprise': AccessLevel.ENTERPRISE,
+        }
+    }
+    
+    def __init__(self, database=None, snapshot=None):
+        # Database backend; defaults to the shared PostgreSQL service
+        self.database = database or database_service
+        # On-disk last-known-good catalog, preferred over the bundled JSON
+        self.snapshot = snapshot or catalog_snapshot
+        self._snapshot_checked = False
+        # Cold-start snapshot read shared by the requests that wait for it
+        self._snapshot_task: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
         # Keep JSON path for fallback
         self.client_data_path = Path(__file__).parent.parent.parent.parent / "client" / "src" / "data" / "datasets.json"
         self._datasets_cache = None
+        # Lookup structures over _datasets_cache, rebuilt on every swap
+        self._index: Optional[CatalogIndex] = None
+        # Called with the new index on every swap, e.g. to rebuild derived structures
+        self._swap_listeners = []
+        # Positions matching recent searches and filters, per catalog generation
+        self.search_cache = SearchCache()
         self._cache_timestamp = None
         self._cache_duration = 300  # 5 minutes cache
+        self._last_load_source = None
     
     def _convert_enum_values(self, item: dict) -> dict:
         """Convert database string values to Pydantic enum values"""
-        # Mapping from database values to enum values
-        enum_mappings = {
-            'category': {
-                'MARKET_TRADING': DatasetCategory.MARKET_TRADING,
-                'ALTERNATIVE_DATA': DatasetCategory.ALTERNATIVE_DATA,
-                'REFERENCE_DATA': DatasetCategory.REFERENCE_DATA,
-                'RISK_COMPLIANCE': DatasetCategory.RISK_COMPLIANCE,
-                'CUSTOMER_ANALYTICS': DatasetCategory.CUSTOMER_ANALYTICS,
-                'ESG_SUSTAINABILITY': DatasetCategory.ESG_SUSTAINABILITY,
-                'CREDIT_RISK': DatasetCategory.CREDIT_RISK,
-                'FRAUD_DETECTION': DatasetCategory.FRAUD_DETECTION,
-                # Also handle the actual enum values from database
-                'Market Trading': DatasetCategory.MARKET_TRADING,
-                'Alternative Data': DatasetCategory.ALTERNATIVE_DATA,
-                'Reference Data': DatasetCategory.REFERENCE_DATA,
-                'Risk & Compliance': DatasetCategory.RISK_COMPLIANCE,
-                'Customer Analytics': DatasetCategory.CUSTOMER_ANALYTICS,
-                'ESG & Sustainability': DatasetCategory.ESG_SUSTAINABILITY,
-                'Credit Risk': DatasetCategory.CREDIT_RISK,
-                'Fraud Detection': DatasetCategory.FRAUD_DETECTION,
-            },
-            'frequency': {
-                'REAL_TIME': DataFrequency.REAL_TIME,
-                'DAILY': DataFrequency.DAILY,
-                'WEEKLY': DataFrequency.WEEKLY,
-                'MONTHLY': DataFrequency.MONTHLY,
-                'QUARTERLY': DataFrequency.QUARTERLY,
-                'ANNUALLY': DataFrequency.ANNUALLY,
-                # Also handle the actual enum values from database
-                'Real-time': DataFrequency.REAL_TIME,
-                'Daily': DataFrequency.DAILY,
-                'Weekly': DataFrequency.WEEKLY,
-                'Monthly': DataFrequency.MONTHLY,
-                'Quarterly': DataFrequency.QUARTERLY,
-                'Annual': DataFrequency.ANNUALLY,
-            },
-            'pricingModel': {
-                'FREE': PricingModel.FREE,
-                'ONE_TIME': PricingModel.ONE_TIME,
-                'SUBSCRIPTION': PricingModel.SUBSCRIPTION,
-                'PAY_PER_USE': PricingModel.PAY_PER_USE,
-                'CUSTOM': PricingModel.ONE_TIME,  # Map CUSTOM to ONE_TIME
-                # Also handle the actual enum values from database
-                'Free': PricingModel.FREE,
-                'One-time Purchase': PricingModel.ONE_TIME,
-                'Subscription': PricingModel.SUBSCRIPTION,
-                'Pay-per-use': PricingModel.PAY_PER_USE,
-            },
-            'accessLevel': {
-                'PUBLIC': AccessLevel.PUBLIC,
-                'PREMIUM': AccessLevel.PREMIUM,
-                'ENTERPRISE': AccessLevel.ENTERPRISE,
-                'RESTRICTED': AccessLevel.PREMIUM,  # Map RESTRICTED to PREMIUM
-                'PRIVATE': AccessLevel.ENTERPRISE,  # Map PRIVATE to ENTERPRISE
-                # Also handle the actual enum values from database
-                'Public': AccessLevel.PUBLIC,
-                'Premium': AccessLevel.PREMIUM,
-                'Enterprise': AccessLevel.ENTERPRISE,
-            }
-        }
-        
         # Convert enum values
-        for field, mapping in enum_mappings.items():
+        for field, mapping in self.ENUM_MAPPINGS.items():
             if field in item and item[field] in mapping:
                 item[field] = mapping[item[field]]
         
         return item
     
-    async def _load_datasets_from_database(self) -> List[Dataset]:
+    def _decode_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a database row into Dataset keyword arguments"""
+        item = dict(row)
+        
+        # Convert enum values
+        item = self._convert_enum_values(item)
+        
+        # Handle datetime fields
+        if 'lastUpdated' in item and item['lastUpdated']:
+            if isinstance(item['lastUpdated'], str):
+                item['lastUpdated'] = datetime.fromisoformat(item['lastUpdated'])
+        
+        # Handle timeRange - check different possible field names
+        time_range_data = None
+        if 'timeRange' in item and item['timeRange']:
+            time_range_data = item['timeRange']
+        elif 'time_range' in item and item['time_range']:
+            time_range_data = item['time_range']
+        
+        if time_range_data:
+            if isinstance(time_range_data, dict):
+                # Handle JSON format
+                start_key = 'start' if 'start' in time_range_data else 'from'
+                end_key = 'end' if 'end' in time_range_data else 'to'
+                
+                item['timeRange'] = TimeRange(
+                    start=datetime.fromisoformat(time_range_data[start_key]),
+                    end=datetime.fromisoformat(time_range_data[end_key])
+                )
+            else:
+                # Handle string format or other formats
+                item['timeRange'] = None
+        
+        # Handle provider - check if it's already a dict or needs parsing
+        if 'provider' in item and item['provider']:
+            if isinstance(item['provider'], dict):
+                item['provider'] = Provider(**item['provider'])
+            elif isinstance(item['provider'], str):
+                # If provider is just a string, create a basic Provider object
+                item['provider'] = Provider(name=item['provider'], logo=None, verified=True)
+        
+        # Handle array fields that might be JSON strings
+        array_fields = ['tags', 'formats', 'geographicCoverage']
+        for field in array_fields:
+            if field in item and isinstance(item[field], str):
+                try:
+                    item[field] = json.loads(item[field])
+                except (json.JSONDecodeError, TypeError):
+                    # If not valid JSON, split by comma as fallback
+                    item[field] = [tag.strip() for tag in item[field].split(',') if tag.strip()]
+        
+        return item
+    
+    def parse_dataset(self, record: Dict[str, Any]) -> Dataset:
+        """Validate a listing shaped like a database row or a datasets.json entry"""
+        return Dataset(**self._decode_row(record))
+    
+    def _decode_rows(self, rows) -> List[Dict[str, Any]]:
+        """Decode a batch of database rows, skipping rows that fail"""
+        items = []
+        with timing_service.phase('decode'), tracing_service.span("dataset_service.decode_rows", attributes={"rows": len(rows)}):
+            for row in rows:
+                try:
+                    items.append(self._decode_row(row))
+                except Exception as e:
+                    logger.error(f"Error processing dataset row {row.get('id', 'unknown')}: {e}")
+        return items
+    
+    def _validate_items(self, items: List[Dict[str, Any]], catalog: CompactCatalogBuilder):
+        """Validate decoded rows into the catalog being built, skipping rows that fail validation"""
+        with timing_service.phase('validate'), tracing_service.span("dataset_service.validate_rows", attributes={"rows": len(items)}):
+            for item in items:
+                try:
+                    dataset = Dataset(**item)
+                except Exception as e:
+                    logger.error(f"Error processing dataset row {item.get('id', 'unknown')}: {e}")
+                    continue
+                # Compacted right away, so no more than one Dataset model is alive at a time
+                catalog.add(dataset)
+    
+    async def _load_datasets_from_database(self) -> Sequence[Dataset]:
         """Load datasets from PostgreSQL database"""
         try:
             logger.info("Loading datasets from PostgreSQL database")
             
             # Test database connection first
-            if not await database_service.test_connection():
-                logger.warning("Database connection test failed, falling back to JSON")
-                return self._load_datasets_from_json()
+            if not await self.database.test_connection():
+                logger.warning("Database connection test failed, falling back to last known good catalog")
+                return self._load_fallback()
             
-            # Execute the SQL query provided by the user
+            # Execute the SQL query provided by the user, streamed in batches so
+            # decoding overlaps with transfer and raw rows never pile up; each
+            # batch is compacted before the next arrives
             query = "SELECT * FROM elghali_benchekroun.dataset"
-            rows = await database_service.execute_query(query)
-            
-            if not rows:
-                logger.warning("No datasets found in database, falling back to JSON")
-                return self._load_datasets_from_json()
+            catalog = CompactCatalogBuilder()
+            row_count = 0
+            async for rows in self.database.stream_records(query):
+                row_count += len(rows)
+                self._validate_items(self._decode_rows(rows), catalog)
+            datasets = catalog.build()
             
-            logger.info(f"Found {len(rows)} datasets in database")
-            datasets = []
+            if not row_count:
+                logger.warning("No datasets found in database, falling back to last known good catalog")
+                return self._load_fallback()
             
-            for row in rows:
-                try:
-                    # Convert database row to dataset format
-                    item = dict(row)
-                    
-                    # Convert enum values
-                    item = self._convert_enum_values(item)
-                    
-                    # Handle datetime fields
-                    if 'lastUpdated' in item and item['lastUpdated']:
-                        if isinstance(item['lastUpdated'], str):
-                            item['lastUpdated'] = datetime.fromisoformat(item['lastUpdated'])
-                    
-                    # Handle timeRange - check different possible field names
-                    time_range_data = None
-                    if 'timeRange' in item and item['timeRange']:
-                        time_range_data = item['timeRange']
-                    elif 'time_range' in item and item['time_range']:
-                        time_range_data = item['time_range']
-                    
-                    if time_range_data:
-                        if isinstance(time_range_data, dict):
-                            # Handle JSON format
-                            start_key = 'start' if 'start' in time_range_data else 'from'
-                            end_key = 'end' if 'end' in time_range_data else 'to'
-                            
-                            item['timeRange'] = TimeRange(
-                                start=datetime.fromisoformat(time_range_data[start_key]),
-                                end=datetime.fromisoformat(time_range_data[end_key])
-                            )
-                        else:
-                            # Handle string format or other formats
-                            item['timeRange'] = None
-                    
-                    # Handle provider - check if it's already a dict or needs parsing
-                    if 'provider' in item and item['provider']:
-                        if isinstance(item['provider'], dict):
-                            item['provider'] = Provider(**item['provider'])
-                        elif isinstance(item['provider'], str):
-                            # If provider is just a string, create a basic Provider object
-                            item['provider'] = Provider(name=item['provider'], logo=None, verified=True)
-                    
-                    # Handle array fields that might be JSON strings
-                    array_fields = ['tags', 'formats', 'geographicCoverage']
-                    for field in array_fields:
-                        if field in item and isinstance(item[field], str):
-                            try:
-                                item[field] = json.loads(item[field])
-                            except (json.JSONDecodeError, TypeError):
-                                # If not valid JSON, split by comma as fallback
-                                item[field] = [tag.strip() for tag in item[field].split(',') if tag.strip()]
-                    
-                    # Create Dataset instance
-                    dataset = Dataset(**item)
-                    datasets.append(dataset)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing dataset row {row.get('id', 'unknown')}: {e}")
-                    continue
-            
-            logger.info(f"Successfully loaded {len(datasets)} datasets from database")
+            logger.info(f"Successfully loaded {len(datasets)} of {row_count} datasets from database")
+            self._last_load_source = 'database'
             return datasets
             
         except Exception as e:
             logger.error(f"Error loading datasets from database: {e}")
-            logger.info("Falling back to JSON file")
-            return self._load_datasets_from_json()
+            logger.info("Falling back to last known good catalog")
+            return self._load_fallback()
+    
+    def _load_fallback(self) -> List[Dataset]:
+        """Last known good catalog: the one in memory, then the on-disk snapshot, then the bundled JSON"""
+        if self._datasets_cache and self._last_load_source != 'json':
+            # Nothing to re-read; keep serving what we have and retry on the next expiry
+            self._last_load_source = 'stale'
+            return self._datasets_cache
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            return snapshot.datasets
+        if self._datasets_cache:
+            self._last_load_source = 'stale'
+            return self._datasets_cache
+        return self._load_datasets_from_json()
+    
+    def _read_snapshot(self):
+        """Memory-map the on-disk snapshot (None when missing or unusable)"""
+        self._snapshot_checked = True
+        with timing_service.phase('decode'), tracing_service.span("dataset_service.load_snapshot") as span:
+            snapshot = self.snapshot.load()
+            span.set_attribute("catalog.snapshot_found", snapshot is not None)
+        if snapshot is not None:
+            self._last_load_source = 'snapshot'
+        return snapshot
+    
+    def load_snapshot(self) -> bool:
+        """Serve the on-disk snapshot until a database load completes; True if one was loaded"""
+        if self._datasets_cache is not None:
+            return True
+        snapshot = self._read_snapshot()
+        if snapshot is None:
+            return False
+        # Snapshot age counts against the cache duration, so an old one is refreshed right away
+        self._swap_catalog(CatalogIndex(snapshot.datasets, 'snapshot'), snapshot.created_at)
+        return True
+    
+    def _swap_catalog(self, index: CatalogIndex, timestamp: float):
+        """Replace the cached catalog and its index together"""
+        previous = self._index
+        self._index = index
+        self._datasets_cache = index.datasets
+        self._cache_timestamp = timestamp
+        if index is not previous:
+            self.search_cache.clear()
+            for listener in self._swap_listeners:
+                try:
+                    listener(index)
+                except Exception as e:
+                    logger.error(f"Catalog swap listener failed: {e}")
+    
+    def add_swap_listener(self, listener):
+        """Call listener(index) whenever a newly loaded catalog is swapped in"""
+        self._swap_listeners.append(listener)
+    
+    @property
+    def index(self) -> Optional[CatalogIndex]:
+        """Index of the catalog currently served (None until one is loaded)"""
+        return self._index
+    
+    def cache_is_fresh(self) -> bool:
+        """Whether the cached catalog is within the cache duration"""
+        return (self._datasets_cache is not None and
+                self._cache_timestamp is not None and
+                datetime.now().timestamp() - self._cache_timestamp < self._cache_duration)
     
     def _load_datasets_from_json(self) -> List[Dataset]:
         """Fallback method to load datasets from JSON file"""
+        self._last_load_source = 'json'
+        with timing_service.phase('decode'), tracing_service.span("dataset_service.load_json"):
+            return self._read_datasets_json()
+    
+    def _read_datasets_json(self) -> List[Dataset]:
+        """Parse the bundled client catalog into Dataset models"""
         try:
             logger.info("Loading datasets from JSON file (fallback)")
             with open(self.client_data_path, 'r') as file:
@@ -216,93 +340,242 @@ class DatasetService:
     
     async def _get_datasets_with_cache(self) -> List[Dataset]:
         """Get datasets with caching mechanism"""
-        current_time = datetime.now().timestamp()
-        
         # Check if cache is valid
-        if (self._datasets_cache is not None and 
-            self._cache_timestamp is not None and 
-            current_time - self._cache_timestamp < self._cache_duration):
+        with timing_service.phase('cache'):
+            cache_valid = self.cache_is_fresh()
+            if not cache_valid and self._datasets_cache is None and not self._snapshot_checked:
+                # Cold worker: serve the snapshot while the database load runs; decoding
+                # it and building its index take seconds, so both run off the event loop
+                if self._snapshot_task is None:
+                    self._snapshot_task = asyncio.ensure_future(asyncio.to_thread(self.load_snapshot))
+                await asyncio.shield(self._snapshot_task)
+        if cache_valid:
             logger.debug("Using cached datasets")
+            metrics_service.dataset_cache_requests.labels(result='hit').inc()
             return self._datasets_cache
         
-        # Load fresh data
-        datasets = await self._load_datasets_from_database()
+        if self._datasets_cache is not None:
+            # Serve the stale catalog; the reload runs outside this request
+            metrics_service.dataset_cache_requests.labels(result='stale').inc()
+            self.start_background_refresh()
+            return self._datasets_cache
+        
+        # Nothing to serve yet: wait for the (shared) load
+        metrics_service.dataset_cache_requests.labels(result='miss').inc()
+        return await asyncio.shield(self._start_refresh())
+    
+    def _start_refresh(self, context: Optional[contextvars.Context] = None) -> asyncio.Task:
+        """Start a catalog reload unless one is already running"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._reload(), context=context)
+        return self._refresh_task
+    
+    def start_background_refresh(self) -> asyncio.Task:
+        """Reload the catalog detached from the current request's trace and timings"""
+        return self._start_refresh(context=contextvars.Context())
+    
+    async def _reload(self) -> List[Dataset]:
+        """Load the catalog, update the cache and persist a snapshot of database loads"""
+        load_started = time.perf_counter()
+        with tracing_service.span("dataset_service.load_catalog") as span:
+            datasets = await self._load_datasets_from_database()
+            span.set_attribute("catalog.source", self._last_load_source or 'unknown')
+            span.set_attribute("catalog.size", len(datasets))
+        metrics_service.dataset_cache_reload_duration.labels(
+            source=self._last_load_source or 'unknown'
+        ).observe(time.perf_counter() - load_started)
+        
+        if asyncio.current_task() is not self._refresh_task:
+            # Superseded by refresh_datasets while loading
+            return datasets
+        
+        index = self._index
+        if index is None or index.datasets is not datasets:
+            index = await asyncio.to_thread(CatalogIndex, datasets, self._last_load_source)
+            if asyncio.current_task() is not self._refresh_task:
+                return datasets
         
         # Update cache
-        self._datasets_cache = datasets
-        self._cache_timestamp = current_time
+        self._swap_catalog(index, datetime.now().timestamp())
         
-        return datasets
+        if self._last_load_source == 'database':
+            try:
+                await asyncio.to_thread(self.snapshot.write, index.datasets)
+            except Exception as e:
+                logger.warning(f"Failed to write catalog snapshot: {e}")
+        return index.datasets
     
-    async def get_all_datasets(self, page: int = 1, limit: int = 50) -> tuple[List[Dataset], int]:
-        """Get all datasets with pagination"""
+    async def get_index(self) -> CatalogIndex:
+        """Index over the catalog served to this request"""
         datasets = await self._get_datasets_with_cache()
+        index = self._index
+        if index is None or index.datasets is not datasets:
+            # Only when a load was superseded before it could be swapped in
+            index = await asyncio.to_thread(CatalogIndex, datasets, self._last_load_source)
+        return index
+    
+    async def get_all_datasets(self, page: int = 1, limit: int = 50,
+                               sort: Optional[SortKey] = None) -> tuple[List[Dataset], int]:
+        """Get all datasets with pagination, in catalog order or a precomputed sort order"""
         start_idx = (page - 1) * limit
         end_idx = start_idx + limit
+        if sort is not None:
+            index = await self.get_index()
+            return index.sorted_page(sort, start_idx, end_idx), len(index)
+        datasets = await self._get_datasets_with_cache()
         paginated_datasets = datasets[start_idx:end_idx]
         return paginated_datasets, len(datasets)
     
     async def get_dataset_by_id(self, dataset_id: str) -> Optional[Dataset]:
         """Get a specific dataset by ID"""
-        datasets = await self._get_datasets_with_cache()
-        for dataset in datasets:
-            if dataset.id == dataset_id:
-                return dataset
-        return None
+        index = await self.get_index()
+        return index.get(dataset_id)
+    
+    async def get_datasets_by_ids(self, dataset_ids: List[str]) -> tuple[List[Dataset], List[str]]:
+        """Look up many datasets at once, in request order; returns the found datasets and the missing ids"""
+        index = await self.get_index()
+        found = []
+        missing = []
+        # Repeated ids are returned once, at their first position
+        for dataset_id in dict.fromkeys(dataset_ids):
+            dataset = index.get(dataset_id)
+            if dataset is None:
+                missing.append(dataset_id)
+            else:
+                found.append(dataset)
+        return found, missing
     
-    async def get_datasets_by_category(self, category: DatasetCategory, page: int = 1, limit: int = 50) -> tuple[List[Dataset], int]:
+    async def get_datasets_by_category(self, category: DatasetCategory, page: int = 1, limit: int = 50,
+                                       sort: Optional[SortKey] = None) -> tuple[List[Dataset], int]:
         """Get datasets filtered by category"""
-        datasets = await self._get_datasets_with_cache()
-        filtered_datasets = [d for d in datasets if d.category == category]
+        index = await self.get_index()
+        filtered_datasets = index.in_category(category)
         start_idx = (page - 1) * limit
         end_idx = start_idx + limit
+        if sort is not None:
+            return index.sorted_category_page(category, sort, start_idx, end_idx), len(filtered_datasets)
         paginated_datasets = filtered_datasets[start_idx:end_idx]
         return paginated_datasets, len(filtered_datasets)
     
-    async def search_datasets(self, query: str, page: int = 1, limit: int = 50) -> tuple[List[Dataset], int]:
-        """Search datasets by query string"""
-        datasets = await self._get_datasets_with_cache()
-        query_lower = query.lower()
-        filtered_datasets = []
-        
-        for dataset in datasets:
+    async def filter_datasets(self, conditions: CatalogFilter, page: int = 1, limit: int = 50,
+                              sort: Optional[SortKey] = None) -> tuple[List[Dataset], int]:
+        """Get datasets meeting field conditions, evaluated over the catalog columns"""
+        index = await self.get_index()
+        key = (index.generation, None, conditions, sort)
+        positions = self.search_cache.get(key)
+        if positions is None:
+            positions = self.search_cache.put(key, index.filter_positions(conditions, sort))
+        start_idx = (page - 1) * limit
+        end_idx = start_idx + limit
+        return index.page(positions, start_idx, end_idx), len(positions)
+    
+    async def search_datasets(self, query: str, page: int = 1, limit: int = 50,
+                              sort: Optional[SortKey] = None,
+                              conditions: Optional[CatalogFilter] = None) -> tuple[List[Dataset], int]:
+        """Search datasets by query string; all pages of a search share one cached result"""
+        index = await self.get_index()
+        # Case and spacing do not change what a query means, so they share one cache entry
+        query_lower = " ".join(query.lower().split())
+        if conditions is not None and conditions.is_empty():
+            conditions = None
+        key = (index.generation, query_lower, conditions, sort)
+        positions = self.search_cache.get(key)
+        if positions is None:
+            positions = self.search_cache.put(key, self._search_positions(index, query_lower, sort, conditions))
+        start_idx = (page - 1) * limit
+        end_idx = start_idx + limit
+        return index.page(positions, start_idx, end_idx), len(positions)
+    
+    def _search_positions(self, index: CatalogIndex, query_lower: str, sort: Optional[SortKey],
+                          conditions: Optional[CatalogFilter]) -> List[int]:
+        """Catalog positions matching a normalized (lowercased, single-spaced) query, filtered and sorted"""
+        matches = []
+        for position, dataset in enumerate(index.records):
             # Search in title, description, provider name, and tags
             if (query_lower in dataset.title.lower() or
                 query_lower in dataset.description.lower() or
                 query_lower in dataset.provider.name.lower() or
                 any(query_lower in tag.lower() for tag in dataset.tags)):
-                filtered_datasets.append(dataset)
+                matches.append(position)
         
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        paginated_datasets = filtered_datasets[start_idx:end_idx]
-        return paginated_datasets, len(filtered_datasets)
+        if conditions is not None:
+            matches = index.filter_subset(matches, conditions)
+        if sort is not None:
+            matches = index.sort_positions(matches, sort)
+        return matches
+    
+    async def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Type-ahead suggestions (titles, providers, tags) for a partial query, typo tolerant"""
+        index = await self.get_index()
+        return [
+            {
+                "text": suggestion.text,
+                "type": suggestion.kind,
+                "datasetId": suggestion.dataset_id,
+                "score": round(score, 4),
+                "corrected": distance > 0,
+            }
+            for suggestion, distance, score in index.suggestions.suggest(query, limit)
+        ]
     
     async def get_dataset_stats(self) -> Dict[str, Any]:
         """Get dataset statistics"""
-        datasets = await self._get_datasets_with_cache()
-        category_counts = {}
-        providers = set()
-        
-        for dataset in datasets:
-            # Count by category
-            category_key = dataset.category.value
-            category_counts[category_key] = category_counts.get(category_key, 0) + 1
-            
-            # Count unique providers
-            providers.add(dataset.provider.name)
-        
-        return {
-            "totalDatasets": len(datasets),
-            "totalProviders": len(providers),
-            "categoryCounts": category_counts
-        }
+        index = await self.get_index()
+        return index.stats()
+    
+    async def get_bootstrap(self, projection: projections.Projection = projections.FULL,
+                            sort: Optional[SortKey] = None,
+                            limit: int = BOOTSTRAP_PAGE_SIZE) -> BootstrapPayload:
+        """First catalog page, stats, facet counts and categories in one body, with its ETag"""
+        index = await self.get_index()
+        return index.bootstrap(projection, sort, limit)
+    
+    async def get_preview_candidates(self, limit: int) -> List[str]:
+        """Sample tables of the most downloaded listings, for preview warm-up"""
+        index = await self.get_index()
+        listings = sorted(
+            (d for d in index.records if d.sampleAvailable and d.sampleUrl),
+            key=lambda d: d.downloadCount, reverse=True
+        )
+        references = []
+        for dataset in listings:
+            if dataset.sampleUrl not in references:
+                references.append(dataset.sampleUrl)
+            if len(references) >= limit:
+                break
+        return references
+    
+    def render_list(self, datasets: List[Dataset], total: int, page: int, limit: int,
+                    projection: projections.Projection = projections.FULL) -> bytes:
+        """Encode a ProjectedDatasetListResponse, reusing listings already serialized for this load"""
+        with timing_service.phase('serialize'):
+            index = self._index
+            if isinstance(datasets, ListingPage) and index is not None and datasets.catalog is index.datasets:
+                items = index.encode(projection, datasets.positions)
+            else:
+                items = [projection.serialize(dataset) for dataset in datasets]
+            return projections.render_list(items, total, page, limit)
+    
+    def get_cache_age(self) -> float:
+        """Seconds since the catalog was last loaded (0 when nothing is cached)"""
+        if self._cache_timestamp is None:
+            return 0.0
+        return max(0.0, datetime.now().timestamp() - self._cache_timestamp)
+    
+    def get_catalog_size(self) -> int:
+        """Number of datasets in the cached catalog"""
+        return len(self._datasets_cache) if self._datasets_cache is not None else 0
     
     async def refresh_datasets(self):
         """Reload datasets from database (clears cache)"""
         logger.info("Refreshing datasets cache")
         self._datasets_cache = None
+        self._index = None
         self._cache_timestamp = None
+        self._snapshot_checked = True
+        # Start a new load (not one already in flight) in the caller's context
+        self._refresh_task = None
+        await asyncio.shield(self._start_refresh())
 
 # Global instance
 dataset_service = DatasetService() 
\ No newline at end of file
@@ -0,0 +1,318 @@
+"""
+Bulk catalog ingestion: parse, validate in batches, COPY into staging, upsert
+
+Accepts NDJSON, CSV or JSON arrays shaped like client/src/data/datasets.json.
+Validated rows are streamed with COPY into a temporary staging table and
+merged into the catalog table with a single INSERT ... ON CONFLICT (id) per
+load, all inside one transaction.
+"""
+import io
+import csv
+import json
+import time
+import logging
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.models.dataset import Dataset
+from app.services.database_service import database_service
+from app.services.dataset_service import dataset_service
+from app.services.tracing_service import tracing_service
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SCHEMA = "elghali_benchekroun"
+CATALOG_TABLE = "dataset"
+DEFAULT_BATCH_SIZE = 5000
+# Validation errors returned in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 50
+FORMATS = ("ndjson", "csv", "json")
+
+
+class IngestionError(Exception):
+    """Raised when the input cannot be parsed or loaded"""
+
+
+def detect_format(name: Optional[str] = None, content_type: Optional[str] = None, head: bytes = b"") -> str:
+    """
+    Guess the input format from a file name, a content type or the first bytes
+    """
+    name = (name or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonlines" in content_type:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    stripped = head.lstrip()
+    if stripped.startswith(b"["):
+        return "json"
+    if stripped.startswith(b"{"):
+        return "ndjson"
+    if name.endswith(".json") or "json" in content_type:
+        return "json"
+    return "csv"
+
+
+def _parse_csv_value(value: Optional[str]) -> Any:
+    if value is None:
+        return None
+    value = value.strip()
+    if value == "":
+        return None
+    if value[0] in "[{":
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return value
+    return value
+
+
+def _nest_dotted(flat: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn flattened CSV headers like provider.name or timeRange.from into nested dicts
+    """
+    record: Dict[str, Any] = {}
+    for key, value in flat.items():
+        if key is None:
+            continue
+        parts = key.strip().split(".")
+        target = record
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return record
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield raw listing dicts from text lines in the given format
+    """
+    if fmt == "ndjson":
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise IngestionError(f"Invalid JSON on line {line_number}: {e}")
+    elif fmt == "csv":
+        for row in csv.DictReader(lines):
+            yield _nest_dotted({key: _parse_csv_value(value) for key, value in row.items()})
+    elif fmt == "json":
+        try:
+            data = json.loads("".join(lines))
+        except json.JSONDecodeError as e:
+            raise IngestionError(f"Invalid JSON document: {e}")
+        if isinstance(data, dict):
+            data = data.get("data", [data])
+        if not isinstance(data, list):
+            raise IngestionError("JSON input must be an array of listings")
+        yield from data
+    else:
+        raise IngestionError(f"Unsupported format '{fmt}'; expected one of {', '.join(FORMATS)}")
+
+
+def iter_records_from_bytes(payload: bytes, fmt: str) -> Iterator[Dict[str, Any]]:
+    text = payload.decode("utf-8-sig")
+    return iter_records(io.StringIO(text, newline=""), fmt)
+
+
+def _batched(records: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    batch = []
+    for index, record in enumerate(records):
+        batch.append((index, record))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class CatalogIngestionService:
+    """
+    Loads listings into the catalog table with COPY + upsert
+    """
+
+    def __init__(self, database=None, datasets=None):
+        self.database = database or database_service
+        self.datasets = datasets or dataset_service
+        self.table = f"{CATALOG_SCHEMA}.{CATALOG_TABLE}"
+
+    def validate_batch(self, batch: List[Tuple[int, Dict[str, Any]]],
+                       errors: List[Dict[str, Any]]) -> Tuple[List[Dataset], int]:
+        """
+        Validate one batch with the Dataset model; returns the valid rows and the error count
+        """
+        valid = []
+        failed = 0
+        for index, record in batch:
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError("listing must be an object")
+                valid.append(self.datasets.parse_dataset(record))
+            except Exception as e:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({
+                        "row": index,
+                        "id": record.get("id") if isinstance(record, dict) else None,
+                        "error": str(e)[:500],
+                    })
+        return valid, failed
+
+    async def _table_columns(self, connection) -> Dict[str, str]:
+        rows = await connection.fetch(
+            """
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = $1 AND table_name = $2
+            ORDER BY ordinal_position
+            """,
+            CATALOG_SCHEMA, CATALOG_TABLE
+        )
+        if not rows:
+            raise IngestionError(f"Table {self.table} does not exist")
+        return {row["column_name"]: row["data_type"] for row in rows}
+
+    @staticmethod
+    def _column_converter(data_type: str) -> Callable[[Any], Any]:
+        """
+        Converter from a model attribute to what the target column type expects,
+        resolved once per load rather than per value
+        """
+        if data_type in ("json", "jsonb"):
+            return lambda value: value.model_dump(mode="json") if isinstance(value, BaseModel) else value
+        if data_type == "ARRAY":
+            return lambda value: value
+        if data_type == "timestamp without time zone":
+            return lambda value: (
+                value.astimezone(timezone.utc).replace(tzinfo=None) if value is not None and value.tzinfo else value
+            )
+        if data_type.startswith("timestamp"):
+            return lambda value: value
+
+        def to_scalar(value: Any) -> Any:
+            if value is None or type(value) in (str, int, float, bool):
+                return value
+            if isinstance(value, Enum):
+                return value.value
+            if isinstance(value, BaseModel):
+                return json.dumps(value.model_dump(mode="json"))
+            if isinstance(value, (dict, list)):
+                return json.dumps(value)
+            if isinstance(value, datetime):
+                return value.isoformat()
+            return value
+
+        return to_scalar
+
+    async def ingest(self, records: Iterable[Dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE,
+                     dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Validate and upsert listings; returns a load report
+        """
+        started = time.perf_counter()
+        phases = {"validate": 0.0, "copy": 0.0, "upsert": 0.0}
+        errors: List[Dict[str, Any]] = []
+        received = valid_count = invalid_count = 0
+        inserted = updated = 0
+
+        with tracing_service.span("ingestion.load", attributes={"ingestion.dry_run": dry_run}) as span:
+            if dry_run:
+                for batch in _batched(records, batch_size):
+                    received += len(batch)
+                    phase_started = time.perf_counter()
+                    valid, failed = self.validate_batch(batch, errors)
+                    phases["validate"] += time.perf_counter() - phase_started
+                    valid_count += len(valid)
+                    invalid_count += failed
+            else:
+                async with self.database.fast_connection() as connection:
+                    async with connection.transaction():
+                        table_columns = await self._table_columns(connection)
+                        fields = [name for name in Dataset.model_fields if name in table_columns]
+                        if "id" not in fields:
+                            raise IngestionError(f"Table {self.table} has no id column")
+                        column_list = ", ".join(f'"{name}"' for name in fields)
+                        converters = [(name, self._column_converter(table_columns[name])) for name in fields]
+
+                        await connection.execute(
+                            f"CREATE TEMP TABLE catalog_staging (LIKE {self.table} INCLUDING DEFAULTS) ON COMMIT DROP"
+                        )
+                        await connection.execute("ALTER TABLE catalog_staging ADD COLUMN _ingest_seq bigint")
+
+                        for batch in _batched(records, batch_size):
+                            received += len(batch)
+                            phase_started = time.perf_counter()
+                            valid, failed = self.validate_batch(batch, errors)
+                            phases["validate"] += time.perf_counter() - phase_started
+                            invalid_count += failed
+                            if not valid:
+                                continue
+
+                            phase_started = time.perf_counter()
+                            rows = [
+                                tuple([convert(getattr(dataset, name)) for name, convert in converters]
+                                      + [valid_count + offset])
+                                for offset, dataset in enumerate(valid)
+                            ]
+                            await connection.copy_records_to_table(
+                                "catalog_staging", records=rows, columns=fields + ["_ingest_seq"]
+                            )
+                            phases["copy"] += time.perf_counter() - phase_started
+                            valid_count += len(valid)
+
+                        if valid_count:
+                            phase_started = time.perf_counter()
+                            updates = ", ".join(f'"{name}" = EXCLUDED."{name}"' for name in fields if name != "id")
+                            # Later rows win when the input repeats an id
+                            results = await connection.fetch(
+                                f"""
+                                INSERT INTO {self.table} ({column_list})
+                                SELECT DISTINCT ON (id) {column_list}
+                                FROM catalog_staging
+                                ORDER BY id, _ingest_seq DESC
+                                ON CONFLICT (id) DO UPDATE SET {updates}
+                                RETURNING (xmax = 0) AS inserted
+                                """
+                            )
+                            inserted = sum(1 for row in results if row["inserted"])
+                            updated = len(results) - inserted
+                            phases["upsert"] += time.perf_counter() - phase_started
+
+                if valid_count:
+                    # New listings become visible on the next request in this worker;
+                    # read them back from the primary since replicas may lag
+                    with self.database.primary_reads():
+                        await self.datasets.refresh_datasets()
+
+            span.set_attribute("ingestion.received", received)
+            span.set_attribute("ingestion.valid", valid_count)
+            span.set_attribute("ingestion.invalid", invalid_count)
+
+        elapsed = time.perf_counter() - started
+        report = {
+            "dry_run": dry_run,
+            "received": received,
+            "valid": valid_count,
+            "invalid": invalid_count,
+            "inserted": inserted,
+            "updated": updated,
+            "duration_ms": round(elapsed * 1000, 1),
+            "rows_per_second": round(received / elapsed, 1) if elapsed else 0.0,
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in phases.items()},
+            "errors": errors,
+        }
+        logger.info(
+            f"Catalog ingestion{' (dry run)' if dry_run else ''}: {received} received, {valid_count} valid, "
+            f"{invalid_count} invalid, {inserted} inserted, {updated} updated in {elapsed:.2f}s"
+        )
+        return report
+
+
+# Global ingestion service instance
+ingestion_service = CatalogIngestionService()
@@ -0,0 +1,183 @@
+"""
+Prometheus metrics for the marketplace API
+
+Event metrics (request latency, cache hits, reloads, warehouse statements,
+pool waits) are recorded where they happen. Sampled gauges (cache age, pool
+usage, executor depth, credential expiry) are refreshed from the services on
+scrape and, throttled, after requests so every worker keeps its values fresh.
+
+When PROMETHEUS_MULTIPROC_DIR is set (gunicorn), metrics are written to
+per-process files and aggregated across workers on scrape.
+"""
+import os
+import time
+import logging
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS_MODE = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+SAMPLE_INTERVAL_SECONDS = float(os.getenv('METRICS_SAMPLE_INTERVAL_SECONDS', '5'))
+
+# Sub-millisecond cache hits up to multi-second catalog reloads
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# HTTP
+http_request_duration = Histogram(
+    'marketplace_http_request_duration_seconds', 'HTTP request latency by route',
+    ['method', 'route', 'status'], buckets=LATENCY_BUCKETS,
+)
+
+# DatasetService cache
+dataset_cache_requests = Counter(
+    'marketplace_dataset_cache_requests_total', 'Dataset cache lookups', ['result'],
+)
+search_cache_requests = Counter(
+    'marketplace_search_cache_requests_total', 'Search and filter result cache lookups', ['result'],
+)
+dataset_cache_reload_duration = Histogram(
+    'marketplace_dataset_cache_reload_duration_seconds', 'Dataset catalog reload duration', ['source'],
+    buckets=LATENCY_BUCKETS,
+)
+dataset_cache_age = Gauge(
+    'marketplace_dataset_cache_age_seconds', 'Age of the cached dataset catalog', multiprocess_mode='liveall',
+)
+dataset_catalog_size = Gauge(
+    'marketplace_dataset_catalog_size', 'Number of datasets in the cached catalog', multiprocess_mode='liveall',
+)
+
+# DatabaseService / SQLAlchemy pool
+db_pool_size = Gauge('marketplace_db_pool_size', 'Configured pool size', multiprocess_mode='liveall')
+db_pool_checked_out = Gauge('marketplace_db_pool_checked_out', 'Connections checked out', multiprocess_mode='liveall')
+db_pool_overflow = Gauge('marketplace_db_pool_overflow', 'Overflow connections in use', multiprocess_mode='liveall')
+db_pool_max_overflow = Gauge(
+    'marketplace_db_pool_max_overflow', 'Current overflow limit set by the pool manager', multiprocess_mode='liveall',
+)
+db_pool_saturation = Gauge(
+    'marketplace_db_pool_saturation', 'Checked-out connections over current pool capacity', multiprocess_mode='liveall',
+)
+db_pool_wait = Histogram(
+    'marketplace_db_pool_wait_seconds', 'Time waiting to acquire a database connection', buckets=LATENCY_BUCKETS,
+)
+db_query_duration = Histogram(
+    'marketplace_db_query_duration_seconds', 'Database query duration', ['outcome'], buckets=LATENCY_BUCKETS,
+)
+db_routed_queries = Counter(
+    'marketplace_db_routed_queries_total', 'Read queries by target (primary, replica, fallback)', ['target'],
+)
+db_replica_lag = Gauge(
+    'marketplace_db_replica_lag_seconds', 'Replay lag measured on each read replica', ['replica'],
+    multiprocess_mode='liveall',
+)
+db_replica_failovers = Counter(
+    'marketplace_db_replica_failovers_total', 'Replica failures that sent reads back to the primary', ['replica'],
+)
+db_credential_ttl = Gauge(
+    'marketplace_db_credential_expiry_seconds', 'Seconds until cached database credentials expire',
+    multiprocess_mode='liveall',
+)
+
+# DatabricksService / SQL warehouse
+warehouse_statement_duration = Histogram(
+    'marketplace_warehouse_statement_duration_seconds', 'SQL warehouse statement latency', ['state'],
+    buckets=LATENCY_BUCKETS,
+)
+warehouse_statements = Counter(
+    'marketplace_warehouse_statements_total', 'SQL warehouse statements by final state', ['state'],
+)
+executor_queue_depth = Gauge(
+    'marketplace_preview_executor_queue_depth', 'Statements waiting for an executor thread',
+    multiprocess_mode='liveall',
+)
+executor_active = Gauge(
+    'marketplace_preview_executor_active', 'Statements running on executor threads', multiprocess_mode='liveall',
+)
+executor_queue_wait = Histogram(
+    'marketplace_preview_executor_queue_wait_seconds', 'Time a statement waited for an executor thread',
+    buckets=LATENCY_BUCKETS,
+)
+
+# Circuit breakers (database, SQL warehouse)
+circuit_state = Gauge(
+    'marketplace_circuit_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open)', ['circuit'],
+    multiprocess_mode='liveall',
+)
+circuit_rejections = Counter(
+    'marketplace_circuit_rejections_total', 'Calls rejected because a circuit was open', ['circuit'],
+)
+
+_last_sampled = 0.0
+
+
+def route_template(scope) -> str:
+    """
+    Route template for a request scope, e.g. /api/datasets/{dataset_id}
+
+    Rebuilt from the matched path parameters so it does not depend on how the
+    router exposes prefixes of included routers.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    for name, value in (scope.get("path_params") or {}).items():
+        value = str(value)
+        if value:
+            head, separator, tail = path.rpartition(f"/{value}")
+            if separator:
+                path = f"{head}/{{{name}}}{tail}"
+    return path
+
+
+def refresh_sampled_metrics():
+    """
+    Copy point-in-time service state into gauges
+    """
+    global _last_sampled
+    _last_sampled = time.monotonic()
+
+    # Imported lazily: the services record into this module
+    from app.services.dataset_service import dataset_service
+    from app.services.database_service import database_service
+    from app.services.databricks_service import databricks_service
+
+    try:
+        dataset_cache_age.set(dataset_service.get_cache_age())
+        dataset_catalog_size.set(dataset_service.get_catalog_size())
+
+        pool_stats = database_service.get_pool_stats()
+        db_pool_size.set(pool_stats.get('size', 0))
+        db_pool_checked_out.set(pool_stats.get('checked_out', 0))
+        db_pool_overflow.set(pool_stats.get('overflow', 0))
+        db_pool_max_overflow.set(pool_stats.get('max_overflow', 0))
+        db_pool_saturation.set(pool_stats.get('saturation', 0.0))
+        db_credential_ttl.set(database_service.get_credential_info().get('time_remaining', 0))
+
+        executor_stats = databricks_service.get_executor_stats()
+        executor_queue_depth.set(executor_stats['queued'])
+        executor_active.set(executor_stats['active'])
+    except Exception as e:
+        logger.warning(f"Failed to refresh sampled metrics: {e}")
+
+
+def maybe_refresh_sampled_metrics():
+    """
+    Throttled refresh, cheap enough to call after every request
+    """
+    if time.monotonic() - _last_sampled >= SAMPLE_INTERVAL_SECONDS:
+        refresh_sampled_metrics()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render the exposition for this process, or for all workers in multiprocess mode
+    """
+    refresh_sampled_metrics()
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,336 @@
+"""
+Connection pool sizing, liveness and telemetry for DatabaseService
+
+Pool limits come from a connection budget shared by every worker process:
+PG_CONNECTION_BUDGET connections per database server, split evenly across
+WEB_CONCURRENCY workers, then between the asyncpg fast path
+(PG_FAST_POOL_SHARE) and the SQLAlchemy engine. A third of the engine's share
+is kept open as the base pool; the rest is overflow that is opened only while
+observed checkout waits stay above PG_POOL_WAIT_TARGET_MS, and given back
+when they fall well below it. With the defaults and one worker this
+reproduces the previous fixed sizing (5 + 10 overflow, fast pool 5).
+
+Engines are created with the full overflow ceiling as SQLAlchemy's
+max_overflow, which stays fixed; the adaptive limit is enforced in front of
+the pool by a checkout gate (PoolManager.checkout) that admits at most
+pool size + current overflow sessions at a time and queues the rest.
+
+Instead of pinging on every checkout, a connection is only pinged when it
+has sat idle longer than PG_POOL_LIVENESS_SECONDS.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy import exc as sqlalchemy_exc
+
+from app.services import metrics_service
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_BUDGET = int(os.getenv('PG_CONNECTION_BUDGET', '20'))
+FAST_POOL_SHARE = float(os.getenv('PG_FAST_POOL_SHARE', '0.25'))
+WAIT_TARGET_MS = float(os.getenv('PG_POOL_WAIT_TARGET_MS', '20'))
+LIVENESS_SECONDS = float(os.getenv('PG_POOL_LIVENESS_SECONDS', '30'))
+RECYCLE_SECONDS = int(os.getenv('PG_POOL_RECYCLE_SECONDS', '3600'))
+TIMEOUT_SECONDS = float(os.getenv('PG_POOL_TIMEOUT_SECONDS', '30'))
+ADJUST_INTERVAL_SECONDS = float(os.getenv('PG_POOL_ADJUST_INTERVAL_SECONDS', '10'))
+# Checkout waits considered when adjusting overflow and reporting percentiles
+WAIT_WINDOW_SECONDS = 60.0
+WAIT_SAMPLES = 2048
+# Overflow kept available even when waits are negligible
+MIN_OVERFLOW = int(os.getenv('PG_POOL_MIN_OVERFLOW', '2'))
+
+
+def worker_count() -> int:
+    """
+    Number of server processes sharing the budget (gunicorn/uvicorn workers)
+    """
+    for name in ('WEB_CONCURRENCY', 'WORKERS'):
+        value = os.getenv(name)
+        if value and value.isdigit() and int(value) > 0:
+            return int(value)
+    return 1
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+class ManagedPool:
+    """
+    Checkout telemetry for one pool, and the overflow limit for SQLAlchemy pools
+    """
+
+    def __init__(self, name: str, kind: str, pool: Any, size: int, max_overflow: int = 0, ceiling: int = 0):
+        self.name = name
+        self.kind = kind
+        self.pool = pool
+        self.size = size
+        self.max_overflow = max_overflow
+        self.floor = min(MIN_OVERFLOW, ceiling)
+        self.ceiling = ceiling
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.pings = 0
+        self.stale_connections = 0
+        self.adjustments = 0
+        self.last_adjusted = time.monotonic()
+        # Checkout gate: sessions admitted, and futures of those waiting for a slot
+        self.admitted = 0
+        self._waiters: deque = deque()
+
+    async def acquire(self):
+        """
+        Wait for a slot under the current capacity; raises sqlalchemy's TimeoutError after the pool timeout
+        """
+        if self.admitted < self.capacity() and not self._waiters:
+            self.admitted += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the wait ended: give the slot back
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise sqlalchemy_exc.TimeoutError(
+                    f"Pool {self.name}: no connection slot within {TIMEOUT_SECONDS:.0f}s "
+                    f"(limit {self.capacity()})"
+                ) from None
+            raise
+
+    def release(self):
+        self.admitted -= 1
+        self.wake()
+
+    def wake(self):
+        """
+        Admit queued sessions while there is capacity, e.g. after a slot is released or overflow grows
+        """
+        while self._waiters and self.admitted < self.capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.admitted += 1
+                waiter.set_result(None)
+
+    def in_use(self) -> int:
+        if self.kind == 'sqlalchemy':
+            return self.pool.checkedout()
+        return self.pool.get_size() - self.pool.get_idle_size()
+
+    def capacity(self) -> int:
+        if self.kind == 'sqlalchemy':
+            return self.size + self.max_overflow
+        return self.pool.get_max_size()
+
+    def recent_waits(self, now: float):
+        since = now - WAIT_WINDOW_SECONDS
+        return sorted(seconds for timestamp, seconds in self.waits if timestamp >= since)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = self.recent_waits(time.monotonic())
+        capacity = self.capacity()
+        in_use = self.in_use()
+        stats = {
+            "kind": self.kind,
+            "size": self.size,
+            "in_use": in_use,
+            "capacity": capacity,
+            "saturation": round(in_use / capacity, 3) if capacity else 0.0,
+            "checkouts": self.checkouts,
+            "slow_checkouts": self.slow_checkouts,
+            "timeouts": self.timeouts,
+            "wait_p50_ms": round(_percentile(waits, 50) * 1000, 3),
+            "wait_p95_ms": round(_percentile(waits, 95) * 1000, 3),
+            "wait_max_ms": round(waits[-1] * 1000, 3) if waits else 0.0,
+        }
+        if self.kind == 'sqlalchemy':
+            stats.update({
+                "queued": len(self._waiters),
+                "overflow": max(0, self.pool.overflow()),
+                "max_overflow": self.max_overflow,
+                "overflow_ceiling": self.ceiling,
+                "adjustments": self.adjustments,
+                "liveness_pings": self.pings,
+                "stale_connections": self.stale_connections,
+            })
+        return stats
+
+
+class PoolManager:
+    """
+    Derives pool limits from the connection budget and adapts SQLAlchemy overflow
+    """
+
+    def __init__(self):
+        self.workers = worker_count()
+        self.budget = CONNECTION_BUDGET
+        self.wait_target = WAIT_TARGET_MS / 1000
+        self._pools: Dict[str, ManagedPool] = {}
+        self._lock = threading.Lock()
+
+        per_worker = max(2, self.budget // self.workers)
+        fast_path = os.getenv('PG_FAST_PATH', 'true').lower() == 'true'
+        default_fast = max(1, round(per_worker * FAST_POOL_SHARE)) if fast_path else 0
+        self.fast_pool_max = int(os.getenv('PG_FAST_POOL_MAX_SIZE', str(max(1, default_fast))))
+        engine_share = max(1, per_worker - (self.fast_pool_max if fast_path else 0))
+        self.pool_size = int(os.getenv('PG_POOL_SIZE', str(max(1, engine_share // 3))))
+        self.overflow_ceiling = int(os.getenv('PG_POOL_MAX_OVERFLOW', str(max(0, engine_share - self.pool_size))))
+
+        planned = self.pool_size + self.overflow_ceiling + (self.fast_pool_max if fast_path else 0)
+        if planned * self.workers > self.budget:
+            logger.warning(
+                f"Pool limits ({planned} per worker x {self.workers} workers) exceed PG_CONNECTION_BUDGET={self.budget}"
+            )
+        logger.info(
+            f"Connection budget {self.budget} across {self.workers} worker(s): engine pool {self.pool_size} "
+            f"+ up to {self.overflow_ceiling} overflow, fast path pool {self.fast_pool_max}"
+        )
+
+    def engine_options(self) -> Dict[str, Any]:
+        """
+        create_async_engine pooling arguments
+        """
+        return {
+            "pool_size": self.pool_size,
+            # Hard limit; the adaptive limit below it is applied by checkout()
+            "max_overflow": self.overflow_ceiling,
+            "pool_pre_ping": False,
+            "pool_recycle": RECYCLE_SECONDS,
+            "pool_timeout": TIMEOUT_SECONDS,
+            "pool_use_lifo": True,
+        }
+
+    def register_engine(self, name: str, engine) -> ManagedPool:
+        """
+        Track an engine's pool and install idle-time liveness checks on it
+        """
+        sync_engine = engine.sync_engine
+        pool = sync_engine.pool
+        managed = ManagedPool(
+            name, 'sqlalchemy', pool, self.pool_size,
+            max_overflow=min(MIN_OVERFLOW, self.overflow_ceiling), ceiling=self.overflow_ceiling,
+        )
+        dialect = sync_engine.dialect
+
+        def on_connect(dbapi_connection, connection_record):
+            connection_record.info['last_used'] = time.monotonic()
+
+        def on_checkin(dbapi_connection, connection_record):
+            if connection_record is not None:
+                connection_record.info['last_used'] = time.monotonic()
+
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            last_used = connection_record.info.get('last_used')
+            if last_used is None or time.monotonic() - last_used < LIVENESS_SECONDS:
+                return
+            managed.pings += 1
+            try:
+                dialect.do_ping(dbapi_connection)
+            except Exception as e:
+                managed.stale_connections += 1
+                # The pool discards this connection and checks out another
+                raise sqlalchemy_exc.DisconnectionError(f"Idle connection failed liveness check: {e}")
+
+        event.listen(sync_engine, "connect", on_connect)
+        event.listen(sync_engine, "checkin", on_checkin)
+        event.listen(sync_engine, "checkout", on_checkout)
+        with self._lock:
+            self._pools[name] = managed
+        return managed
+
+    @asynccontextmanager
+    async def checkout(self, name: str) -> AsyncIterator[None]:
+        """
+        Hold a slot of an engine's adaptive limit for the life of one session
+        """
+        managed = self._pools.get(name)
+        if managed is None or managed.kind != 'sqlalchemy':
+            yield
+            return
+        await managed.acquire()
+        try:
+            yield
+        finally:
+            managed.release()
+
+    def register_fast_pool(self, name: str, pool) -> ManagedPool:
+        managed = ManagedPool(f"{name}/asyncpg", 'asyncpg', pool, pool.get_max_size())
+        with self._lock:
+            self._pools[managed.name] = managed
+        return managed
+
+    def record_wait(self, name: str, seconds: float, timed_out: bool = False):
+        """
+        Record one checkout wait; periodically resizes overflow for SQLAlchemy pools
+        """
+        metrics_service.db_pool_wait.observe(seconds)
+        managed = self._pools.get(name)
+        if managed is None:
+            return
+        now = time.monotonic()
+        managed.waits.append((now, seconds))
+        managed.checkouts += 1
+        if seconds >= self.wait_target:
+            managed.slow_checkouts += 1
+        if timed_out:
+            managed.timeouts += 1
+        if managed.kind == 'sqlalchemy' and now - managed.last_adjusted >= ADJUST_INTERVAL_SECONDS:
+            self._adjust(managed, now)
+
+    def _adjust(self, managed: ManagedPool, now: float):
+        managed.last_adjusted = now
+        waits = managed.recent_waits(now)
+        if not waits:
+            return
+        p95 = _percentile(waits, 95)
+        current = managed.max_overflow
+        if (p95 >= self.wait_target or managed.timeouts) and current < managed.ceiling:
+            target = min(managed.ceiling, current + max(1, managed.ceiling // 4))
+        elif p95 < self.wait_target / 4 and current > managed.floor and max(0, managed.pool.overflow()) < current:
+            target = current - 1
+        else:
+            return
+        managed.max_overflow = target
+        # Queued sessions may fit under a raised limit; a lowered one drains as sessions finish
+        managed.wake()
+        managed.adjustments += 1
+        managed.timeouts = 0
+        logger.info(
+            f"Pool {managed.name}: max_overflow {current} -> {target} (checkout wait p95 {p95 * 1000:.1f} ms)"
+        )
+
+    def get_stats(self, name: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            pools = dict(self._pools)
+        if name is not None:
+            managed = pools.get(name)
+            return managed.stats() if managed else {}
+        return {
+            "workers": self.workers,
+            "connection_budget": self.budget,
+            "wait_target_ms": WAIT_TARGET_MS,
+            "liveness_seconds": LIVENESS_SECONDS,
+            "pools": {pool_name: managed.stats() for pool_name, managed in pools.items()},
+        }
+
+
+# Global pool manager instance
+pool_manager = PoolManager()
@@ -0,0 +1,173 @@
+"""
+Sparse fieldsets for list responses
+
+List endpoints take `fields=` (comma-separated Dataset fields) or `view=`
+(`full` or `summary`). A Projection turns one Dataset into its JSON bytes.
+The summary view is a flat DatasetSummary rather than a subset of Dataset:
+the provider is folded into two fields, the description is cut to the card's
+two-line clamp and fields the cards do not show are left out.
+
+Encoded listings are kept on the CatalogIndex in an EncodedCache keyed by
+projection and catalog position, so a listing is usually serialized once
+per catalog load and projection and list responses are assembled by joining
+cached bytes. The cache is bounded by ENCODED_CACHE_BYTES; the least
+recently used listings are evicted and serialized again when next requested.
+"""
+import os
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.models.dataset import Dataset, DatasetSummary
+
+# Fields of a DatasetSummary, the shape of view=summary listings
+SUMMARY_FIELDS = tuple(DatasetSummary.model_fields)
+SUMMARY_DESCRIPTION_CHARS = 120
+VIEWS = ("full", "summary")
+
+# Encoded listings kept per catalog load, across all projections
+ENCODED_CACHE_BYTES = int(os.getenv('ENCODED_CACHE_BYTES', str(64 * 2**20)))
+# Approximate memory of one cache entry besides its JSON: key tuple, bytes header, dict slot
+ENTRY_OVERHEAD_BYTES = 160
+
+
+class Projection:
+    """
+    A named set of Dataset fields and how to encode a listing with them
+    """
+
+    def __init__(self, key: str, fields: Optional[Tuple[str, ...]] = None):
+        self.key = key
+        # None means every field
+        self.fields = fields
+        self._include = set(fields) if fields is not None else None
+
+    def serialize(self, dataset: Dataset) -> bytes:
+        return dataset.model_dump_json(include=self._include).encode()
+
+
+class SummaryProjection(Projection):
+    """
+    The flat card view of a listing (DatasetSummary)
+    """
+
+    def __init__(self):
+        super().__init__("summary", SUMMARY_FIELDS)
+
+    def serialize(self, dataset: Dataset) -> bytes:
+        item: Dict[str, Any] = {
+            "id": dataset.id,
+            "title": dataset.title,
+            "description": truncate(dataset.description, SUMMARY_DESCRIPTION_CHARS),
+            "providerName": dataset.provider.name,
+            "providerVerified": dataset.provider.verified,
+            "category": dataset.category.value,
+            "frequency": dataset.frequency.value,
+            # Cards show the day only
+            "lastUpdated": dataset.lastUpdated.date().isoformat(),
+            "pricingModel": dataset.pricingModel.value,
+            "price": dataset.price,
+            "currency": dataset.currency,
+            "rating": dataset.rating,
+            "ratingsCount": dataset.ratingsCount,
+            "downloadCount": dataset.downloadCount,
+            "tags": dataset.tags,
+            "qualityScore": dataset.qualityScore,
+            "verified": dataset.verified,
+        }
+        return json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+FULL = Projection("full")
+SUMMARY = SummaryProjection()
+
+
+def truncate(text: str, limit: int) -> str:
+    """
+    Cut text at a word boundary with an ellipsis
+    """
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0].rstrip(" ,.;:")
+    return f"{cut}…"
+
+
+def resolve_projection(fields: Optional[str] = None, view: Optional[str] = None) -> Projection:
+    """
+    Projection for the fields/view query parameters; fields wins when both are given
+
+    Raises ValueError for unknown fields or views.
+    """
+    if fields:
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in Dataset.model_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        # id is always returned; order follows the model so equal sets share a cache
+        selected = tuple(name for name in Dataset.model_fields if name == "id" or name in requested)
+        return Projection(f"fields:{','.join(selected)}", selected)
+    if view in (None, "full"):
+        return FULL
+    if view == "summary":
+        return SUMMARY
+    raise ValueError(f"Unknown view '{view}'; expected one of {', '.join(VIEWS)}")
+
+
+def render_list(items: List[bytes], total: int, page: int, limit: int) -> bytes:
+    """
+    ProjectedDatasetListResponse JSON from already encoded listings
+    """
+    tail = json.dumps({"total": total, "page": page, "limit": limit}, separators=(",", ":")).encode()
+    return b'{"data":[' + b",".join(items) + b"]," + tail[1:]
+
+
+class EncodedCache:
+    """
+    Encoded listings by projection and catalog position, least recently used evicted past a byte budget
+    """
+
+    def __init__(self, max_bytes: int = ENCODED_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._items: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+
+    def encode(self, projection: Projection, catalog: Sequence[Dataset], positions: Sequence[int]) -> List[bytes]:
+        """
+        Encoded listings at catalog positions, serializing and caching the ones missing
+        """
+        items = []
+        for position in positions:
+            key = (projection.key, int(position))
+            item = self._items.get(key)
+            if item is None:
+                # Only listings missing from the cache are materialized
+                item = projection.serialize(catalog[key[1]])
+                self._store(key, item)
+            else:
+                self._items.move_to_end(key)
+            items.append(item)
+        return items
+
+    def _store(self, key: Tuple[str, int], item: bytes):
+        size = len(item) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        self._items[key] = item
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.bytes -= len(evicted) + ENTRY_OVERHEAD_BYTES
+            self.evictions += 1
+
+    def get_info(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for projection_key, _ in self._items:
+            counts[projection_key] = counts.get(projection_key, 0) + 1
+        return {
+            "listings": len(self._items),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "projections": counts,
+        }
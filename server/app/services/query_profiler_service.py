@@ -0,0 +1,307 @@
+"""
+Query profiling for DatabaseService.execute_query
+
+Every statement is timed and attributed to a normalized fingerprint (literals
+and bind parameters replaced by `?`), with row counts and an estimate of the
+bytes returned. Statements slower than QUERY_SLOW_THRESHOLD_MS go to a
+rolling slow-query log; read-only statements slower than
+QUERY_EXPLAIN_THRESHOLD_MS get an `EXPLAIN (ANALYZE, BUFFERS)` plan captured
+in the background, at most once per fingerprint per interval.
+"""
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import deque, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILER_ENABLED = os.getenv('QUERY_PROFILER_ENABLED', 'true').lower() == 'true'
+SLOW_THRESHOLD_MS = float(os.getenv('QUERY_SLOW_THRESHOLD_MS', '200'))
+# 0 disables plan capture
+EXPLAIN_THRESHOLD_MS = float(os.getenv('QUERY_EXPLAIN_THRESHOLD_MS', '0'))
+EXPLAIN_INTERVAL_SECONDS = float(os.getenv('QUERY_EXPLAIN_INTERVAL_SECONDS', '300'))
+WINDOW_SECONDS = float(os.getenv('QUERY_PROFILER_WINDOW_SECONDS', '900'))
+MAX_FINGERPRINTS = int(os.getenv('QUERY_PROFILER_MAX_FINGERPRINTS', '500'))
+SLOW_LOG_SIZE = 200
+SAMPLES_PER_FINGERPRINT = 512
+# Rows inspected when estimating result size; the rest is extrapolated
+BYTES_SAMPLE_ROWS = 100
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w\"])[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_BIND = re.compile(r"(?<!:):[A-Za-z_]\w*|\$\d+|%\([^)]+\)s|%s")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_READ_ONLY = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Reduce a statement to its shape so calls with different values group together
+    """
+    normalized = _COMMENT.sub(" ", query)
+    normalized = _STRING.sub("?", normalized)
+    normalized = _BIND.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def estimate_result_bytes(rows: List[Dict[str, Any]]) -> int:
+    """
+    Approximate payload size of result rows from their text representation
+    """
+    if not rows:
+        return 0
+    sample = rows[:BYTES_SAMPLE_ROWS]
+    sampled = 0
+    for row in sample:
+        for value in row.values():
+            if value is None:
+                continue
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                sampled += len(value)
+            elif isinstance(value, str):
+                sampled += len(value.encode())
+            else:
+                sampled += len(str(value))
+    return int(sampled * len(rows) / len(sample))
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+class QueryStats:
+    """
+    Aggregates for one normalized statement
+    """
+
+    def __init__(self, normalized: str, example: str):
+        self.fingerprint = fingerprint(normalized)
+        self.normalized = normalized
+        self.example = example[:2000]
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.total_rows = 0
+        self.total_bytes = 0
+        self.last_seen = 0.0
+        # (timestamp, seconds) for the rolling window
+        self.samples = deque(maxlen=SAMPLES_PER_FINGERPRINT)
+        self.plan: Optional[Any] = None
+        self.plan_captured_at: Optional[float] = None
+        self.plan_duration_ms: Optional[float] = None
+        self._explain_pending = False
+
+    def record(self, seconds: float, rows: int, result_bytes: int, error: bool, now: float):
+        self.calls += 1
+        self.errors += int(error)
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.total_rows += rows
+        self.total_bytes += result_bytes
+        self.last_seen = now
+        self.samples.append((now, seconds))
+
+    def window_durations(self, since: float) -> List[float]:
+        return sorted(seconds for timestamp, seconds in self.samples if timestamp >= since)
+
+    def summary(self, since: float) -> Dict[str, Any]:
+        window = self.window_durations(since)
+        return {
+            "fingerprint": self.fingerprint,
+            "query": self.normalized,
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": round(self.total_seconds / self.calls * 1000, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "rows_per_call": round(self.total_rows / self.calls, 1) if self.calls else 0.0,
+            "bytes_per_call": int(self.total_bytes / self.calls) if self.calls else 0,
+            "window": {
+                "calls": len(window),
+                "p50_ms": round(_percentile(window, 50) * 1000, 3),
+                "p95_ms": round(_percentile(window, 95) * 1000, 3),
+                "max_ms": round(window[-1] * 1000, 3) if window else 0.0,
+            },
+            "last_seen": self.last_seen,
+            "has_plan": self.plan is not None,
+        }
+
+
+class QueryProfiler:
+    """
+    Collects per-fingerprint statistics, the slow-query log and captured plans
+    """
+
+    SORT_KEYS = {
+        "p95": lambda summary: summary["window"]["p95_ms"],
+        "max": lambda summary: summary["window"]["max_ms"],
+        "mean": lambda summary: summary["mean_ms"],
+        "total": lambda summary: summary["total_ms"],
+        "calls": lambda summary: summary["calls"],
+    }
+
+    def __init__(self):
+        self.enabled = PROFILER_ENABLED
+        self.slow_threshold_ms = SLOW_THRESHOLD_MS
+        self.explain_threshold_ms = EXPLAIN_THRESHOLD_MS
+        self._stats: "OrderedDict[str, QueryStats]" = OrderedDict()
+        self._slow_log = deque(maxlen=SLOW_LOG_SIZE)
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def record(self, query: str, seconds: float, rows: Optional[List[Dict[str, Any]]] = None,
+               error: Optional[BaseException] = None, params: Optional[Dict[str, Any]] = None,
+               explain: Optional[Callable[..., Awaitable[Any]]] = None,
+               row_count: Optional[int] = None, result_bytes: Optional[int] = None):
+        """
+        Record one execution; `explain` runs EXPLAIN for the statement when a plan is due
+
+        Streamed results pass row_count/result_bytes instead of the rows.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        if row_count is None:
+            row_count = len(rows) if rows else 0
+        if result_bytes is None:
+            result_bytes = estimate_result_bytes(rows) if rows else 0
+        normalized = normalize_query(query)
+        duration_ms = seconds * 1000
+
+        with self._lock:
+            stats = self._stats.get(normalized)
+            if stats is None:
+                stats = QueryStats(normalized, query)
+                self._stats[normalized] = stats
+                if len(self._stats) > MAX_FINGERPRINTS:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(normalized)
+            stats.record(seconds, row_count, result_bytes, error is not None, now)
+
+            if duration_ms >= self.slow_threshold_ms:
+                self._slow_log.append({
+                    "timestamp": now,
+                    "fingerprint": stats.fingerprint,
+                    "query": normalized,
+                    "duration_ms": round(duration_ms, 3),
+                    "rows": row_count,
+                    "bytes": result_bytes,
+                    "error": str(error) if error else None,
+                })
+
+            plan_due = (
+                explain is not None
+                and error is None
+                and self.explain_threshold_ms > 0
+                and duration_ms >= self.explain_threshold_ms
+                and _READ_ONLY.match(query) is not None
+                and not stats._explain_pending
+                and (stats.plan_captured_at is None or now - stats.plan_captured_at >= EXPLAIN_INTERVAL_SECONDS)
+            )
+            if plan_due:
+                stats._explain_pending = True
+
+        if duration_ms >= self.slow_threshold_ms:
+            logger.warning(
+                f"Slow query ({duration_ms:.1f} ms, {row_count} rows, ~{result_bytes} bytes) "
+                f"[{stats.fingerprint}]: {normalized[:300]}"
+            )
+        if plan_due:
+            self._schedule_explain(stats, query, params, explain, duration_ms)
+
+    def _schedule_explain(self, stats: QueryStats, query: str, params: Optional[Dict[str, Any]],
+                          explain: Callable[..., Awaitable[Any]], duration_ms: float):
+        async def capture():
+            try:
+                plan = await explain(query, params)
+                with self._lock:
+                    stats.plan = plan
+                    stats.plan_captured_at = time.time()
+                    stats.plan_duration_ms = round(duration_ms, 3)
+                logger.info(f"Captured query plan for [{stats.fingerprint}] ({duration_ms:.1f} ms)")
+            except Exception as e:
+                logger.warning(f"Failed to capture query plan for [{stats.fingerprint}]: {e}")
+            finally:
+                stats._explain_pending = False
+
+        try:
+            asyncio.get_running_loop().create_task(capture())
+        except RuntimeError:
+            stats._explain_pending = False
+
+    def get_top_queries(self, limit: int = 20, sort: str = "p95") -> List[Dict[str, Any]]:
+        """
+        Slowest normalized statements, ranked over the rolling window
+        """
+        key = self.SORT_KEYS.get(sort, self.SORT_KEYS["p95"])
+        since = time.time() - WINDOW_SECONDS
+        with self._lock:
+            summaries = [stats.summary(since) for stats in self._stats.values()]
+        summaries.sort(key=key, reverse=True)
+        return summaries[:limit]
+
+    def get_slow_queries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._slow_log)
+        return list(reversed(entries))[:limit]
+
+    def get_query(self, query_fingerprint: str) -> Optional[Dict[str, Any]]:
+        since = time.time() - WINDOW_SECONDS
+        with self._lock:
+            for stats in self._stats.values():
+                if stats.fingerprint == query_fingerprint:
+                    summary = stats.summary(since)
+                    summary.update({
+                        "example": stats.example,
+                        "plan": stats.plan,
+                        "plan_captured_at": stats.plan_captured_at,
+                        "plan_duration_ms": stats.plan_duration_ms,
+                    })
+                    return summary
+        return None
+
+    def get_overview(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = sum(stats.calls for stats in self._stats.values())
+            errors = sum(stats.errors for stats in self._stats.values())
+            fingerprints = len(self._stats)
+            slow = len(self._slow_log)
+        return {
+            "enabled": self.enabled,
+            "since": self._started,
+            "window_seconds": WINDOW_SECONDS,
+            "slow_threshold_ms": self.slow_threshold_ms,
+            "explain_threshold_ms": self.explain_threshold_ms,
+            "fingerprints": fingerprints,
+            "calls": calls,
+            "errors": errors,
+            "slow_log_entries": slow,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow_log.clear()
+            self._started = time.time()
+
+
+# Global query profiler instance
+query_profiler = QueryProfiler()
@@ -0,0 +1,163 @@
+"""
+Liveness and readiness for orchestrator probes
+
+Both probes answer from in-memory state only; neither touches the database,
+the SQL warehouse or the disk. A worker is live as long as its event loop
+serves requests. It is ready once the catalog (the on-disk snapshot or a
+database load) is in memory with its index built and, when
+PREVIEW_WARMUP_COUNT is set, once PREVIEW_WARMUP_READY_RATIO of the warm-up
+previews have been cached or the warm-up has given up. It stops being ready
+while the worker shuts down. The catalog load and the warm-up are started by
+the application lifespan, never by a probe.
+"""
+import os
+import time
+import asyncio
+import logging
+import contextvars
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.dataset_service import dataset_service
+from app.services.databricks_service import databricks_service
+
+logger = logging.getLogger(__name__)
+
+# Sample tables of the most downloaded listings to preview at startup (0 disables)
+PREVIEW_WARMUP_COUNT = int(os.getenv('PREVIEW_WARMUP_COUNT', '0'))
+PREVIEW_WARMUP_READY_RATIO = float(os.getenv('PREVIEW_WARMUP_READY_RATIO', '0.8'))
+PREVIEW_WARMUP_TIMEOUT_SECONDS = float(os.getenv('PREVIEW_WARMUP_TIMEOUT_SECONDS', '60'))
+
+
+class PreviewWarmup:
+    """
+    Progress of the startup preview warm-up
+    """
+
+    def __init__(self, target: int):
+        self.target = target
+        self.succeeded = 0
+        self.failed = 0
+        self.finished = False
+        self.started_at: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+
+    def reached_threshold(self) -> bool:
+        if self.target <= 0 or self.finished:
+            return True
+        return self.succeeded >= self.target * PREVIEW_WARMUP_READY_RATIO
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.target > 0,
+            "target": self.target,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "finished": self.finished,
+            "ready_ratio": PREVIEW_WARMUP_READY_RATIO,
+            "duration_ms": self.duration_ms,
+        }
+
+
+class ReadinessService:
+    """
+    Tracks startup progress and answers liveness and readiness probes
+    """
+
+    def __init__(self, datasets=None, databricks=None):
+        self.datasets = datasets or dataset_service
+        self.databricks = databricks or databricks_service
+        self.started_at = time.time()
+        self.ready_since: Optional[float] = None
+        self.shutting_down = False
+        # Warming previews only pays off when they are cached
+        self.preview_warmup = PreviewWarmup(
+            PREVIEW_WARMUP_COUNT if self.databricks.preview_cache_seconds > 0 else 0
+        )
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    def liveness(self) -> Dict[str, Any]:
+        return {
+            "status": "alive",
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+        }
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Whether this worker should receive traffic, with the state of each check
+        """
+        index = self.datasets.index
+        checks = {
+            "catalog_loaded": index is not None and len(index) > 0,
+            "index_built": index is not None,
+            "preview_warmup": self.preview_warmup.reached_threshold(),
+            "accepting_traffic": not self.shutting_down,
+        }
+        ready = all(checks.values())
+        if ready and self.ready_since is None:
+            self.ready_since = time.time()
+            logger.info(f"Worker ready after {self.ready_since - self.started_at:.1f}s")
+        elif not ready:
+            self.ready_since = None
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "checks": checks,
+            "catalog": index.get_info() if index is not None else None,
+            "cache_age_seconds": round(self.datasets.get_cache_age(), 1),
+            "preview_warmup": self.preview_warmup.stats(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+        }
+
+    def start_preview_warmup(self) -> Optional[asyncio.Task]:
+        """
+        Preview the most downloaded sample tables in the background
+        """
+        if self.preview_warmup.target <= 0 or self._warmup_task is not None:
+            return self._warmup_task
+        self._warmup_task = asyncio.get_running_loop().create_task(
+            self._warm_previews(), context=contextvars.Context()
+        )
+        return self._warmup_task
+
+    async def _warm_previews(self):
+        warmup = self.preview_warmup
+        warmup.started_at = time.perf_counter()
+        try:
+            references = await self.datasets.get_preview_candidates(warmup.target)
+            # Fewer sample tables than requested lowers the bar accordingly
+            warmup.target = len(references)
+
+            async def warm(reference: str):
+                result = await self.databricks.get_table_preview(reference)
+                if 'error' in result:
+                    warmup.failed += 1
+                else:
+                    warmup.succeeded += 1
+
+            await asyncio.wait_for(
+                asyncio.gather(*(warm(reference) for reference in references)),
+                timeout=PREVIEW_WARMUP_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Preview warm-up timed out after {PREVIEW_WARMUP_TIMEOUT_SECONDS:.0f}s "
+                f"({warmup.succeeded} of {warmup.target} cached)"
+            )
+        except Exception as e:
+            logger.warning(f"Preview warm-up failed: {e}")
+        finally:
+            warmup.finished = True
+            warmup.duration_ms = round((time.perf_counter() - warmup.started_at) * 1000, 1)
+        logger.info(f"Preview warm-up cached {warmup.succeeded} of {warmup.target} sample tables")
+
+    async def shutdown(self):
+        """
+        Report not ready from now on and stop an unfinished warm-up
+        """
+        self.shutting_down = True
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+
+
+# Global readiness instance
+readiness_service = ReadinessService()
@@ -0,0 +1,466 @@
+"""
+Related datasets from TF-IDF similarity
+
+Each listing becomes a TF-IDF vector over its tags, sub-category, category
+and description words, with tags and sub-category weighted highest. The
+top-k cosine neighbours of every listing are computed once per catalog load
+and stored as small arrays that GET /api/datasets/{id}/related reads in
+constant time.
+
+Comparing every listing with every other one is quadratic in the catalog
+size, so neighbours come from sparse candidate generation instead. Each term
+keeps an inverted list of only the RELATED_POSTINGS_PER_TERM listings that
+weigh it most. A listing's vector multiplied by those truncated lists gives
+partial scores for the listings it shares heavily weighted terms with. The
+RELATED_CANDIDATES best of those are rescored with their exact cosine
+similarity and the top k kept. The work per listing is bounded by its
+number of terms rather than the catalog size. Listings that only share
+common terms with their true neighbours may miss some of them; raising
+the two limits trades build time for recall. Blocks of rows are sized so
+that the intermediate products hold at most RELATED_BLOCK_CELLS values.
+
+When a new catalog differs from the previous one in only a few listings, the
+rebuild is incremental: changed listings are re-vectorized with the
+vocabulary and IDF weights of the last full build, their neighbours are
+recomputed, unchanged listings merge in the changed listings that found
+them as candidates (cosine similarity is symmetric), and only listings that
+lost a neighbour are recomputed in full. A full build runs once the changes
+since the last one exceed RELATED_FULL_REBUILD_RATIO of the catalog. NumPy
+and SciPy are imported on the first build.
+"""
+import os
+import re
+import time
+import asyncio
+import logging
+import contextvars
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.models.dataset import Dataset
+from app.services.compact_catalog import CompactCatalog
+from app.services.dataset_service import dataset_service
+
+logger = logging.getLogger(__name__)
+
+TOP_K = int(os.getenv('RELATED_TOP_K', '10'))
+# Listings kept in each term's inverted list for candidate generation (the heaviest weighted)
+POSTINGS_PER_TERM = int(os.getenv('RELATED_POSTINGS_PER_TERM', '64'))
+# Candidates per listing rescored with their exact similarity
+CANDIDATES = int(os.getenv('RELATED_CANDIDATES', '64'))
+# Values held per block of rows by the candidate and rescoring products
+BLOCK_CELLS = int(os.getenv('RELATED_BLOCK_CELLS', str(1 << 24)))
+FULL_REBUILD_RATIO = float(os.getenv('RELATED_FULL_REBUILD_RATIO', '0.1'))
+
+# Term weight per field, applied on top of IDF
+FIELD_WEIGHTS = {"tag": 3.0, "sub": 2.0, "cat": 1.5, "word": 1.0}
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in into is it its of on or our over that the their this to "
+    "with within".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 1 and word not in STOPWORDS]
+
+
+def document_terms(dataset: Dataset) -> Tuple[str, ...]:
+    """
+    Field-prefixed terms describing a listing
+    """
+    terms = [f"cat:{dataset.category.value.lower()}"]
+    if dataset.subCategory:
+        terms.append(f"sub:{dataset.subCategory.strip().lower()}")
+        terms.extend(f"word:{word}" for word in _words(dataset.subCategory))
+    for tag in dataset.tags:
+        terms.append(f"tag:{tag.strip().lower()}")
+        terms.extend(f"word:{word}" for word in _words(tag))
+    terms.extend(f"word:{word}" for word in _words(dataset.description))
+    return tuple(terms)
+
+
+def _build_vocabulary(documents: Sequence[Tuple[str, ...]]):
+    """
+    Term columns and per-term weights (smoothed IDF times field weight)
+    """
+    import numpy as np
+
+    vocabulary: Dict[str, int] = {}
+    document_frequency: List[int] = []
+    for terms in documents:
+        for term in set(terms):
+            column = vocabulary.get(term)
+            if column is None:
+                vocabulary[term] = len(document_frequency)
+                document_frequency.append(1)
+            else:
+                document_frequency[column] += 1
+    frequency = np.asarray(document_frequency, dtype=np.float32)
+    idf = np.log((1 + len(documents)) / (1 + frequency)) + 1
+    field_weights = np.empty(len(vocabulary), dtype=np.float32)
+    for term, column in vocabulary.items():
+        field_weights[column] = FIELD_WEIGHTS[term.split(":", 1)[0]]
+    return vocabulary, (idf * field_weights).astype(np.float32)
+
+
+def _vectorize(documents: Sequence[Tuple[str, ...]], vocabulary: Dict[str, int], term_weights):
+    """
+    L2-normalized TF-IDF rows (sublinear term frequency); terms outside the vocabulary are ignored
+    """
+    import numpy as np
+    from scipy import sparse
+
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[int] = []
+    for terms in documents:
+        row: Dict[int, int] = {}
+        for term in terms:
+            column = vocabulary.get(term)
+            if column is not None:
+                row[column] = row.get(column, 0) + 1
+        indices.extend(row.keys())
+        counts.extend(row.values())
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(documents), len(vocabulary)),
+    )
+    matrix.data = (1 + np.log(matrix.data)) * term_weights[matrix.indices]
+    lengths = np.diff(matrix.indptr)
+    row_of_entry = np.repeat(np.arange(len(documents)), lengths)
+    norms = np.sqrt(np.bincount(row_of_entry, weights=matrix.data ** 2, minlength=len(documents)))
+    norms[norms == 0] = 1.0
+    matrix.data /= norms[row_of_entry].astype(np.float32)
+    return matrix
+
+
+def _truncated_postings(matrix, per_term: int):
+    """
+    The matrix with each term (column) kept only for the per_term listings that weigh it most
+    """
+    import numpy as np
+    from scipy import sparse
+
+    columns = matrix.tocsc()
+    lengths = np.diff(columns.indptr)
+    column_of_entry = np.repeat(np.arange(columns.shape[1]), lengths)
+    keep = np.ones(columns.nnz, dtype=bool)
+    # Only common terms have more listings than are kept
+    for column in np.flatnonzero(lengths > per_term):
+        start, stop = columns.indptr[column], columns.indptr[column + 1]
+        lightest = np.argpartition(-columns.data[start:stop], per_term)[per_term:]
+        keep[start + lightest] = False
+    return sparse.csr_matrix(
+        (columns.data[keep], (columns.indices[keep], column_of_entry[keep])), shape=matrix.shape
+    )
+
+
+def _candidate_blocks(rows, matrix, self_positions, postings):
+    """
+    Candidate neighbours of `rows` with their exact cosine similarities, a block of rows at a time
+
+    Yields (start, stop, candidates, scores) with CANDIDATES columns per row;
+    missing candidates, and each listing itself, score -1.
+    """
+    import numpy as np
+
+    width = max(1, CANDIDATES)
+    terms_per_row = max(1, rows.nnz // max(1, rows.shape[0]))
+    block = max(1, BLOCK_CELLS // (terms_per_row * max(POSTINGS_PER_TERM, width)))
+    postings_t = postings.T.tocsr()
+    for start in range(0, rows.shape[0], block):
+        stop = min(rows.shape[0], start + block)
+        queries = rows[start:stop]
+        partial = (queries @ postings_t).tocsr()
+        lengths = np.diff(partial.indptr)
+        # Lay the partial scores out as padded rows, so the best of each row is one argpartition
+        padded_width = max(width, int(lengths.max(initial=0)))
+        row_of_entry = np.repeat(np.arange(stop - start), lengths)
+        slot_of_entry = np.arange(partial.nnz) - np.repeat(partial.indptr[:-1], lengths)
+        padded = np.zeros((stop - start, padded_width), dtype=np.float32)
+        padded_columns = np.zeros((stop - start, padded_width), dtype=np.int32)
+        padded[row_of_entry, slot_of_entry] = partial.data
+        padded_columns[row_of_entry, slot_of_entry] = partial.indices
+        best = np.argpartition(-padded, width - 1, axis=1)[:, :width] if padded_width > width else \
+            np.broadcast_to(np.arange(width), (stop - start, width))
+        candidates = np.take_along_axis(padded_columns, best, axis=1)
+        found = np.take_along_axis(padded, best, axis=1) > 0
+        del padded, padded_columns
+
+        # Exact cosine similarity for each (row, candidate) pair
+        pair_rows, pair_slots = np.nonzero(found)
+        exact = np.asarray(
+            queries[pair_rows].multiply(matrix[candidates[pair_rows, pair_slots]]).sum(axis=1)
+        ).ravel()
+        scores = np.full((stop - start, width), -1.0, dtype=np.float32)
+        scores[pair_rows, pair_slots] = exact
+        scores[candidates == np.asarray(self_positions[start:stop])[:, None]] = -1.0
+        yield start, stop, candidates, scores
+
+
+def _select_top(candidates, scores, k: int):
+    """
+    Best k candidates per row, highest score first; non-positive scores become -1 padding
+    """
+    import numpy as np
+
+    width = min(k, scores.shape[1])
+    if width < scores.shape[1]:
+        top = np.argpartition(-scores, width - 1, axis=1)[:, :width]
+    else:
+        top = np.broadcast_to(np.arange(width), (scores.shape[0], width))
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+    top_candidates = np.take_along_axis(np.take_along_axis(candidates, top, axis=1), order, axis=1)
+
+    neighbors = np.full((scores.shape[0], k), -1, dtype=np.int32)
+    best = np.zeros((scores.shape[0], k), dtype=np.float32)
+    keep = top_scores > 0
+    neighbors[:, :width] = np.where(keep, top_candidates, -1)
+    best[:, :width] = np.where(keep, top_scores, 0.0)
+    return neighbors, best
+
+
+def _top_k(rows, matrix, self_positions, k: int, postings):
+    """
+    Top-k neighbours for the given rows among their candidates from the whole catalog
+    """
+    import numpy as np
+
+    neighbors = np.full((rows.shape[0], k), -1, dtype=np.int32)
+    scores = np.zeros((rows.shape[0], k), dtype=np.float32)
+    for start, stop, candidates, similarity in _candidate_blocks(rows, matrix, self_positions, postings):
+        neighbors[start:stop], scores[start:stop] = _select_top(candidates, similarity, k)
+    return neighbors, scores
+
+
+class RelatedIndex:
+    """
+    Top-k related listings for one catalog load
+    """
+
+    def __init__(self, generation: int, catalog: CompactCatalog, rows: List[int], ids: List[str],
+                 signatures: List[int], vocabulary: Dict[str, int], term_weights, matrix, neighbors, scores,
+                 full_build: bool, changes_since_full: int, build_ms: float):
+        self.generation = generation
+        # Matrix row -> catalog position and id
+        self.catalog = catalog
+        self.rows = rows
+        self.ids = ids
+        self.position = {dataset_id: row for row, dataset_id in enumerate(ids)}
+        self.signatures = signatures
+        self.vocabulary = vocabulary
+        self.term_weights = term_weights
+        self.matrix = matrix
+        self.neighbors = neighbors
+        self.scores = scores
+        self.full_build = full_build
+        self.changes_since_full = changes_since_full
+        self.build_ms = build_ms
+
+    def related(self, dataset_id: str, limit: int) -> Optional[List[Tuple[Dataset, float]]]:
+        row = self.position.get(dataset_id)
+        if row is None:
+            return None
+        return [
+            (self.catalog[self.rows[neighbor]], round(float(score), 4))
+            for neighbor, score in zip(self.neighbors[row][:limit], self.scores[row][:limit])
+            if neighbor >= 0
+        ]
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            "generation": self.generation,
+            "datasets": len(self.ids),
+            "terms": len(self.vocabulary),
+            "top_k": self.neighbors.shape[1],
+            "full_build": self.full_build,
+            "changes_since_full_build": self.changes_since_full,
+            "build_ms": self.build_ms,
+        }
+
+
+def build_related(index, previous: Optional[RelatedIndex] = None, k: int = TOP_K) -> RelatedIndex:
+    """
+    Neighbour lists for a CatalogIndex, patched from the previous build when few listings changed
+    """
+    import numpy as np
+    from scipy import sparse
+
+    started = time.perf_counter()
+    records = index.records
+    rows = list(index.by_id.values())
+    ids = [records[position].id for position in rows]
+    documents = [document_terms(records[position]) for position in rows]
+    signatures = [hash(terms) for terms in documents]
+    total = len(rows)
+
+    unchanged_new: List[int] = []
+    unchanged_old: List[int] = []
+    changed: List[int] = []
+    if previous is not None and previous.neighbors.shape[1] == k:
+        for row, dataset_id in enumerate(ids):
+            old = previous.position.get(dataset_id)
+            if old is not None and previous.signatures[old] == signatures[row]:
+                unchanged_new.append(row)
+                unchanged_old.append(old)
+            else:
+                changed.append(row)
+        removed = sum(1 for dataset_id in previous.ids if dataset_id not in index.by_id)
+        changes = len(changed) + removed
+        incremental = changes + previous.changes_since_full <= FULL_REBUILD_RATIO * total
+    else:
+        incremental = False
+
+    if not incremental:
+        vocabulary, term_weights = _build_vocabulary(documents)
+        matrix = _vectorize(documents, vocabulary, term_weights)
+        neighbors, scores = _top_k(matrix, matrix, np.arange(total), k, _truncated_postings(matrix, POSTINGS_PER_TERM))
+        build_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Related datasets: full build over {total} listings and {len(vocabulary)} terms in {build_ms} ms")
+        return RelatedIndex(index.generation, index.datasets, rows, ids, signatures, vocabulary, term_weights,
+                            matrix, neighbors, scores, True, 0, build_ms)
+
+    vocabulary, term_weights = previous.vocabulary, previous.term_weights
+    changed_rows = np.asarray(changed, dtype=np.int64)
+    unchanged_rows = np.asarray(unchanged_new, dtype=np.int64)
+    unchanged_previous = np.asarray(unchanged_old, dtype=np.int64)
+
+    # Reuse unchanged vectors, vectorize the rest, then restore catalog order
+    stacked = sparse.vstack([
+        previous.matrix[unchanged_previous],
+        _vectorize([documents[row] for row in changed], vocabulary, term_weights),
+    ]).tocsr()
+    order = np.empty(total, dtype=np.int64)
+    order[np.concatenate([unchanged_rows, changed_rows])] = np.arange(total)
+    matrix = stacked[order]
+
+    neighbors = np.full((total, k), -1, dtype=np.int32)
+    scores = np.zeros((total, k), dtype=np.float32)
+
+    # Old neighbour lists in new positions; losing a neighbour means a full recompute
+    old_to_new = np.full(len(previous.ids), -1, dtype=np.int64)
+    old_to_new[unchanged_previous] = unchanged_rows
+    old_neighbors = previous.neighbors[unchanged_previous]
+    present = old_neighbors >= 0
+    mapped = np.where(present, old_to_new[np.where(present, old_neighbors, 0)], -1)
+    dirty = (present & (mapped < 0)).any(axis=1)
+    kept_neighbors = np.where(present, mapped, -1).astype(np.int32)
+    kept_scores = np.where(present, previous.scores[unchanged_previous], 0.0).astype(np.float32)
+
+    postings = _truncated_postings(matrix, POSTINGS_PER_TERM)
+    # Unchanged row -> its place in the kept lists
+    kept_slot = np.full(total, -1, dtype=np.int64)
+    kept_slot[unchanged_rows] = np.arange(len(unchanged_rows))
+    for start, stop, candidates, similarity in _candidate_blocks(matrix[changed_rows], matrix, changed_rows, postings):
+        block_rows = changed_rows[start:stop].astype(np.int32)
+        neighbors[block_rows], scores[block_rows] = _select_top(candidates, similarity, k)
+        if len(unchanged_rows):
+            # Unchanged listings: previous top-k plus the changed listings of this block that found them
+            found = (similarity > 0) & (kept_slot[candidates] >= 0)
+            pair_slots = kept_slot[candidates[found]]
+            pair_sources = np.broadcast_to(block_rows[:, None], candidates.shape)[found]
+            pair_scores = similarity[found]
+            order = np.lexsort((-pair_scores, pair_slots))
+            pair_slots, pair_sources, pair_scores = pair_slots[order], pair_sources[order], pair_scores[order]
+            firsts = np.searchsorted(pair_slots, pair_slots)
+            rank = np.arange(len(pair_slots)) - firsts
+            best = rank < k
+            extra_neighbors = np.full((len(unchanged_rows), k), -1, dtype=np.int32)
+            extra_scores = np.zeros((len(unchanged_rows), k), dtype=np.float32)
+            extra_neighbors[pair_slots[best], rank[best]] = pair_sources[best]
+            extra_scores[pair_slots[best], rank[best]] = pair_scores[best]
+            kept_neighbors, kept_scores = _select_top(
+                np.hstack([kept_neighbors, extra_neighbors]), np.hstack([kept_scores, extra_scores]), k
+            )
+    neighbors[unchanged_rows] = kept_neighbors
+    scores[unchanged_rows] = kept_scores
+
+    dirty_rows = unchanged_rows[dirty]
+    if len(dirty_rows):
+        neighbors[dirty_rows], scores[dirty_rows] = _top_k(matrix[dirty_rows], matrix, dirty_rows, k, postings)
+
+    build_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(
+        f"Related datasets: incremental build over {total} listings ({len(changed)} changed, "
+        f"{len(dirty_rows)} recomputed) in {build_ms} ms"
+    )
+    return RelatedIndex(index.generation, index.datasets, rows, ids, signatures, vocabulary, term_weights, matrix,
+                        neighbors, scores, False, previous.changes_since_full + changes, build_ms)
+
+
+class RecommendationService:
+    """
+    Keeps related-dataset lists in step with the catalog served by DatasetService
+    """
+
+    def __init__(self, datasets=None):
+        self.datasets = datasets or dataset_service
+        self._related: Optional[RelatedIndex] = None
+        self._task: Optional[asyncio.Task] = None
+        self.last_error: Optional[str] = None
+        self.datasets.add_swap_listener(self.refresh)
+
+    def refresh(self, index=None) -> Optional[asyncio.Task]:
+        """
+        Start building for the current catalog unless that is done or under way
+
+        Returns the running build, or None when there is nothing to do (or no event loop to run it on).
+        """
+        index = index or self.datasets.index
+        if index is None:
+            return None
+        if self._related is not None and self._related.generation >= index.generation:
+            return None
+        if self._task is not None and not self._task.done():
+            # A newer catalog is picked up by the next refresh after this build
+            return self._task
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        self._task = loop.create_task(self._build(index), context=contextvars.Context())
+        return self._task
+
+    async def _build(self, index):
+        try:
+            related = await asyncio.to_thread(build_related, index, self._related)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Failed to build related datasets: {e}")
+            return
+        self.last_error = None
+        if self._related is None or related.generation > self._related.generation:
+            self._related = related
+
+    async def get_related(self, dataset_id: str, limit: int = TOP_K) -> Optional[List[Tuple[Dataset, float]]]:
+        """
+        Most similar listings with cosine scores; None when the dataset does not exist
+        """
+        index = await self.datasets.get_index()
+        if index.get(dataset_id) is None:
+            return None
+        task = self.refresh(index)
+        related = self._related
+        if (related is None or dataset_id not in related.position) and task is not None:
+            # New listing (or first build): wait for lists that include it
+            await asyncio.shield(task)
+            related = self._related
+        if related is None:
+            if self.last_error:
+                raise RuntimeError(f"Related datasets unavailable: {self.last_error}")
+            return []
+        return related.related(dataset_id, limit) or []
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "building": self._task is not None and not self._task.done(),
+            "last_error": self.last_error,
+            "index": self._related.get_info() if self._related is not None else None,
+        }
+
+
+# Global recommendation service instance
+recommendation_service = RecommendationService()
@@ -0,0 +1,300 @@
+"""
+Read-replica routing for DatabaseService
+
+Replicas are listed in PGREPLICA_HOSTS (comma-separated host[:port]) and share
+the primary's database, credentials and SSL settings. Read-only statements go
+to a replica picked by power-of-two-choices over an EWMA of observed latency
+weighted by in-flight calls. Each replica's replay lag is probed every
+PGREPLICA_CHECK_INTERVAL_SECONDS; replicas whose lag is unknown or above
+PGREPLICA_MAX_STALENESS_SECONDS are skipped, and replicas that fail with a
+connection error are benched for PGREPLICA_RETRY_SECONDS. When no replica is
+eligible the caller reads from the primary.
+"""
+import os
+import re
+import time
+import random
+import asyncio
+import asyncpg
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy import exc as sqlalchemy_exc
+
+from app.services import metrics_service
+
+logger = logging.getLogger(__name__)
+
+MAX_STALENESS_SECONDS = float(os.getenv('PGREPLICA_MAX_STALENESS_SECONDS', '30'))
+CHECK_INTERVAL_SECONDS = float(os.getenv('PGREPLICA_CHECK_INTERVAL_SECONDS', '5'))
+RETRY_SECONDS = float(os.getenv('PGREPLICA_RETRY_SECONDS', '30'))
+# Weight of the newest sample in the latency moving average
+LATENCY_ALPHA = 0.2
+
+_READ_ONLY = re.compile(r"^\s*(select|with|show|values)\b", re.IGNORECASE)
+_WRITES = re.compile(
+    r"\b(insert|update|delete|merge|truncate|nextval|setval)\b|\bfor\s+(no\s+key\s+)?(update|share|key\s+share)\b",
+    re.IGNORECASE,
+)
+
+# Lag is zero while the WAL receiver is streaming and everything received has
+# been replayed, so an idle primary does not make a caught-up replica look
+# stale. Without a streaming receiver, "everything received" says nothing
+# about the primary, so lag is the age of the last replayed transaction, and
+# NULL (nothing replayed yet) counts as stale. Roles without
+# pg_read_all_stats see the receiver row with a NULL status.
+LAG_QUERY = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE COALESCE(status, 'streaming') = 'streaming')
+        AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END AS lag_seconds
+"""
+
+_primary_only: contextvars.ContextVar[bool] = contextvars.ContextVar('primary_only', default=False)
+
+
+def is_read_only(query: str) -> bool:
+    """
+    Whether a statement can safely run on a replica
+    """
+    return _READ_ONLY.match(query) is not None and _WRITES.search(query) is None
+
+
+def is_failover_error(error: BaseException) -> bool:
+    """
+    Errors that mean the replica is unusable rather than the statement being wrong
+    """
+    if isinstance(error, (OSError, ConnectionError, asyncio.TimeoutError,
+                          asyncpg.PostgresConnectionError, asyncpg.InterfaceError,
+                          asyncpg.CannotConnectNowError, asyncpg.TooManyConnectionsError,
+                          sqlalchemy_exc.InterfaceError, sqlalchemy_exc.OperationalError)):
+        return True
+    if isinstance(error, sqlalchemy_exc.DBAPIError) and error.connection_invalidated:
+        return True
+    # Queries cancelled by replay conflicts succeed on the primary
+    return getattr(error, 'sqlstate', None) == '40001' or 'conflict with recovery' in str(error)
+
+
+def parse_hosts(value: str, default_port: int) -> List[tuple]:
+    hosts = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(':')
+        hosts.append((host, int(port) if port else default_port))
+    return hosts
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """
+    Route reads in this context to the primary, e.g. to see a write just made
+    """
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+class Replica:
+    """
+    One read replica with its own engine, fast path pool and health state
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.name = f"{host}:{port}"
+        self.engine = None
+        self.session_factory = None
+        self.fast_pool: Optional[asyncpg.Pool] = None
+        self.latency_ewma: Optional[float] = None
+        self.in_flight = 0
+        self.lag_seconds: Optional[float] = None
+        self.last_checked = 0.0
+        self.failed_until = 0.0
+        self.failures = 0
+        self.queries = 0
+        self._checking = False
+
+    def observe(self, seconds: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += LATENCY_ALPHA * (seconds - self.latency_ewma)
+
+    def score(self) -> float:
+        return (self.latency_ewma or 0.0) * (self.in_flight + 1)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "lag_seconds": round(self.lag_seconds, 3) if self.lag_seconds is not None else None,
+            "latency_ms": round(self.latency_ewma * 1000, 3) if self.latency_ewma is not None else None,
+            "in_flight": self.in_flight,
+            "queries": self.queries,
+            "failures": self.failures,
+            "benched_for_seconds": round(max(0.0, self.failed_until - now), 1),
+            "checked_seconds_ago": round(now - self.last_checked, 1) if self.last_checked else None,
+        }
+
+
+class ReplicaRouter:
+    """
+    Picks a replica for read-only work and tracks replica health
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.max_staleness = MAX_STALENESS_SECONDS
+        default_port = int(os.getenv('PGPORT', '5432'))
+        self.replicas = [Replica(host, port) for host, port in parse_hosts(os.getenv('PGREPLICA_HOSTS', ''), default_port)]
+        self._pool_lock: Optional[asyncio.Lock] = None
+        if self.replicas:
+            logger.info(
+                f"Read replicas configured: {', '.join(replica.name for replica in self.replicas)} "
+                f"(max staleness {self.max_staleness}s)"
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """
+        Pick a replica for a read, or None to use the primary
+        """
+        if not self.replicas or _primary_only.get():
+            return None
+        now = time.monotonic()
+        self._schedule_checks(now)
+        candidates = [
+            replica for replica in self.replicas
+            if replica.failed_until <= now
+            and replica.lag_seconds is not None
+            and replica.lag_seconds <= self.max_staleness
+        ]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = random.sample(candidates, 2)
+        return first if first.score() <= second.score() else second
+
+    def _schedule_checks(self, now: float):
+        for replica in self.replicas:
+            if replica._checking or now - replica.last_checked < CHECK_INTERVAL_SECONDS:
+                continue
+            if replica.failed_until > now:
+                continue
+            replica._checking = True
+            try:
+                asyncio.get_running_loop().create_task(self.check(replica))
+            except RuntimeError:
+                replica._checking = False
+
+    async def check(self, replica: Replica):
+        """
+        Measure replay lag and round-trip latency for one replica
+        """
+        try:
+            # The first probe pays for connection setup, so it is not a latency sample
+            warm = replica.engine is not None
+            started = time.perf_counter()
+            session_factory = await self.session_factory(replica)
+            async with session_factory() as session:
+                result = await session.execute(text(LAG_QUERY))
+                lag = result.scalar()
+            if warm:
+                replica.observe(time.perf_counter() - started)
+            if lag is None:
+                # Not streaming and nothing replayed: lag unknown, so the replica is skipped
+                if replica.lag_seconds is not None:
+                    logger.warning(f"Replica {replica.name} has no replayed WAL to measure lag; routing reads elsewhere")
+                replica.lag_seconds = None
+                return
+            lag = float(lag)
+            if replica.lag_seconds is not None and lag > self.max_staleness >= replica.lag_seconds:
+                logger.warning(f"Replica {replica.name} is {lag:.1f}s behind; routing reads elsewhere")
+            replica.lag_seconds = lag
+            metrics_service.db_replica_lag.labels(replica=replica.name).set(lag)
+        except Exception as e:
+            self.mark_failed(replica, e)
+        finally:
+            replica.last_checked = time.monotonic()
+            replica._checking = False
+
+    def mark_failed(self, replica: Replica, error: BaseException):
+        replica.failures += 1
+        replica.failed_until = time.monotonic() + RETRY_SECONDS
+        replica.lag_seconds = None
+        metrics_service.db_replica_failovers.labels(replica=replica.name).inc()
+        logger.warning(f"Replica {replica.name} failed, reading from the primary for {RETRY_SECONDS:.0f}s: {error}")
+
+    async def session_factory(self, replica: Replica):
+        if replica.session_factory is None:
+            # Building the URL may generate credentials, which blocks
+            replica.engine, replica.session_factory = await asyncio.to_thread(
+                lambda: self.database._create_engine(
+                    self.database._get_database_url(replica.host, replica.port), name=replica.name
+                )
+            )
+        return replica.session_factory
+
+    async def fast_pool(self, replica: Replica) -> asyncpg.Pool:
+        if replica.fast_pool is not None:
+            return replica.fast_pool
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if replica.fast_pool is None:
+                replica.fast_pool = await self.database._create_fast_pool(replica.host, replica.port, name=replica.name)
+        return replica.fast_pool
+
+    def begin(self, replica: Replica):
+        replica.in_flight += 1
+        replica.queries += 1
+        metrics_service.db_routed_queries.labels(target='replica').inc()
+
+    def end(self, replica: Replica, seconds: Optional[float] = None):
+        replica.in_flight -= 1
+        if seconds is not None:
+            replica.observe(seconds)
+
+    @contextmanager
+    def track(self, replica: Replica) -> Iterator[None]:
+        """
+        Count a call against the replica's load and feed its latency estimate
+        """
+        self.begin(replica)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.end(replica, time.perf_counter() - started)
+
+    async def close(self):
+        for replica in self.replicas:
+            if replica.engine is not None:
+                await replica.engine.dispose()
+                replica.engine = replica.session_factory = None
+            if replica.fast_pool is not None:
+                pool, replica.fast_pool = replica.fast_pool, None
+                await pool.close()
+            replica.lag_seconds = None
+            replica.last_checked = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "max_staleness_seconds": self.max_staleness,
+            "replicas": [replica.stats(now) for replica in self.replicas],
+        }
@@ -0,0 +1,93 @@
+"""
+LRU cache of search and filter results
+
+Entries are keyed by the catalog generation, the lowercased query, the
+filters and the sort key, and hold the matching catalog positions as a
+compact NumPy array rather than Dataset objects, so every page of a query
+is sliced from one entry. Positions are only meaningful for the catalog
+load they were computed on; the generation in the key keeps entries from
+older loads from being read, and DatasetService clears the cache whenever
+it swaps in a new catalog. Entries are evicted least recently used first
+once there are SEARCH_CACHE_SIZE of them or they hold more than
+SEARCH_CACHE_MAX_POSITIONS positions together.
+"""
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence
+
+from app.services import metrics_service
+
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '1024'))
+SEARCH_CACHE_MAX_POSITIONS = int(os.getenv('SEARCH_CACHE_MAX_POSITIONS', '4000000'))
+
+
+class SearchCache:
+    """
+    Result positions per normalized search, least recently used evicted first
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_SIZE, max_positions: int = SEARCH_CACHE_MAX_POSITIONS):
+        self.max_entries = max_entries
+        self.max_positions = max_positions
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._positions = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable):
+        """
+        Cached positions for a search, or None
+        """
+        entries = self._entries
+        positions = entries.get(key)
+        if positions is None:
+            self.misses += 1
+            metrics_service.search_cache_requests.labels(result='miss').inc()
+            return None
+        entries.move_to_end(key)
+        self.hits += 1
+        metrics_service.search_cache_requests.labels(result='hit').inc()
+        return positions
+
+    def put(self, key: Hashable, positions: Sequence[int]):
+        """
+        Store the positions of a search and return them as the cached array
+        """
+        import numpy as np
+
+        positions = np.asarray(positions, dtype=np.int32)
+        if self.max_entries <= 0 or len(positions) > self.max_positions:
+            return positions
+        entries = self._entries
+        previous = entries.pop(key, None)
+        if previous is not None:
+            self._positions -= len(previous)
+        entries[key] = positions
+        self._positions += len(positions)
+        while len(entries) > self.max_entries or self._positions > self.max_positions:
+            _, evicted = entries.popitem(last=False)
+            self._positions -= len(evicted)
+            self.evictions += 1
+        return positions
+
+    def clear(self):
+        """
+        Drop every entry; called when a new catalog is swapped in
+        """
+        # Replaced rather than emptied, as a swap can happen on a loader thread
+        self._entries = OrderedDict()
+        self._positions = 0
+
+    def get_stats(self) -> Dict[str, Optional[float]]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "positions": self._positions,
+            "max_positions": self.max_positions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
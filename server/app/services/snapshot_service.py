@@ -0,0 +1,246 @@
+"""
+Last-known-good catalog snapshot on local disk
+
+After every successful database load the catalog is written to
+CATALOG_SNAPSHOT_PATH as a single binary file:
+
+    header    magic, format version, flags, dataset count, creation time,
+              payload length, Dataset schema fingerprint, SHA-256 of payload
+    directory length-prefixed JSON naming each section's dtype, offset
+              and element count
+    sections  the CompactCatalog as flat, uncompressed, 8-byte aligned
+              NumPy arrays (see CompactCatalog.to_arrays)
+
+Workers memory-map the file at startup and read the sections in place with
+numpy.frombuffer, so a restart neither decompresses nor parses JSON; the
+listings are rebuilt straight from the mapped columns while the database
+load runs. The same path serves as the fallback (before the bundled
+datasets.json) when the database is unreachable. Snapshots from another
+format version or Dataset schema, or with a bad checksum, are ignored.
+"""
+import os
+import json
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from app.models.dataset import Dataset
+from app.services.compact_catalog import CompactCatalog
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"MKTCATSN"
+FORMAT_VERSION = 2
+# magic, version, flags, count, created_at, payload length, schema fingerprint, checksum
+HEADER = struct.Struct("<8sHHIdQ16s32s")
+# Length of the JSON section directory that starts the payload
+DIRECTORY_LENGTH = struct.Struct("<I")
+SECTION_ALIGNMENT = 8
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "marketplace-catalog.snapshot")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file cannot be used"""
+
+
+def schema_fingerprint() -> bytes:
+    """
+    Identifies the Dataset model shape; snapshots from another shape are not loaded
+    """
+    schema = json.dumps(Dataset.model_json_schema(), sort_keys=True).encode()
+    return hashlib.sha256(schema).digest()[:16]
+
+
+class CatalogSnapshot:
+    """
+    A catalog read back from disk
+    """
+
+    def __init__(self, datasets: CompactCatalog, created_at: float, checksum: str):
+        self.datasets = datasets
+        self.created_at = created_at
+        self.checksum = checksum
+
+    def age(self) -> float:
+        return max(0.0, time.time() - self.created_at)
+
+
+class CatalogSnapshotStore:
+    """
+    Writes and memory-maps the catalog snapshot file
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        configured = os.getenv('CATALOG_SNAPSHOT_PATH', DEFAULT_PATH) if path is None else path
+        self.path = configured or None
+        self.schema = schema_fingerprint()
+        self._last_checksum: Optional[bytes] = None
+        self._lock = threading.Lock()
+        self.last_write: Optional[Dict[str, Any]] = None
+        self.last_load: Optional[Dict[str, Any]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def write(self, catalog: CompactCatalog) -> bool:
+        """
+        Persist the catalog atomically; skipped when it matches the last snapshot
+
+        Returns True when a new file was written.
+        """
+        if not self.enabled or not len(catalog):
+            return False
+        started = time.perf_counter()
+        sections, length, checksum = _layout(catalog.to_arrays())
+
+        with self._lock:
+            if checksum == self._last_checksum:
+                return False
+            header = HEADER.pack(
+                SNAPSHOT_MAGIC, FORMAT_VERSION, 0, len(catalog), time.time(), length, self.schema, checksum
+            )
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # Write beside the target and rename so readers never see a partial file
+            fd, temp_path = tempfile.mkstemp(prefix=".catalog-", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(header)
+                    for section in sections:
+                        file.write(section)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(temp_path, self.path)
+            except Exception:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+            self._last_checksum = checksum
+
+        self.last_write = {
+            "timestamp": time.time(),
+            "datasets": len(catalog),
+            "bytes": HEADER.size + length,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+        logger.info(
+            f"Wrote catalog snapshot ({len(catalog)} datasets, {HEADER.size + length} bytes) to {self.path}"
+        )
+        return True
+
+    def load(self) -> Optional[CatalogSnapshot]:
+        """
+        Memory-map the snapshot and rebuild the catalog from its sections; None when missing or unusable
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return None
+        import numpy as np
+
+        started = time.perf_counter()
+        try:
+            with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) < HEADER.size:
+                    raise SnapshotError("file is shorter than the header")
+                magic, version, flags, count, created_at, length, schema, checksum = HEADER.unpack_from(mapped, 0)
+                if magic != SNAPSHOT_MAGIC:
+                    raise SnapshotError("not a catalog snapshot")
+                if version != FORMAT_VERSION:
+                    raise SnapshotError(f"format version {version}, expected {FORMAT_VERSION}")
+                if schema != self.schema:
+                    raise SnapshotError("written for a different Dataset schema")
+                if len(mapped) != HEADER.size + length:
+                    raise SnapshotError("payload length does not match the header")
+                with memoryview(mapped) as view, view[HEADER.size:] as payload:
+                    if hashlib.sha256(payload).digest() != checksum:
+                        raise SnapshotError("checksum mismatch")
+                (directory_length,) = DIRECTORY_LENGTH.unpack_from(mapped, HEADER.size)
+                directory_start = HEADER.size + DIRECTORY_LENGTH.size
+                directory = json.loads(mapped[directory_start:directory_start + directory_length])
+                base = HEADER.size + _aligned(DIRECTORY_LENGTH.size + directory_length)
+                arrays = {
+                    name: np.frombuffer(mapped, dtype=np.dtype(dtype), count=size, offset=base + offset)
+                    for name, (dtype, offset, size) in directory.items()
+                }
+                problem = None
+                try:
+                    catalog = CompactCatalog.from_arrays(arrays)
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    # Keep no traceback: its frames would hold the arrays, and with them the mapping
+                    problem = f"unreadable sections: {e}"
+                # The arrays export the mapping's buffer; it cannot close while they are alive
+                del arrays
+            if problem is not None:
+                raise SnapshotError(problem)
+            if len(catalog) != count:
+                raise SnapshotError(f"holds {len(catalog)} datasets, header says {count}")
+        except (SnapshotError, OSError, ValueError, KeyError, TypeError, struct.error) as e:
+            logger.warning(f"Ignoring catalog snapshot at {self.path}: {e}")
+            return None
+
+        with self._lock:
+            self._last_checksum = checksum
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.last_load = {"timestamp": time.time(), "datasets": count, "duration_ms": elapsed_ms}
+        logger.info(f"Loaded catalog snapshot ({count} datasets, {time.time() - created_at:.0f}s old) in {elapsed_ms} ms")
+        return CatalogSnapshot(catalog, created_at, checksum.hex())
+
+    def get_info(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {"enabled": self.enabled, "path": self.path, "exists": False}
+        if self.enabled and os.path.exists(self.path):
+            try:
+                with open(self.path, "rb") as file:
+                    header = file.read(HEADER.size)
+                _, version, _, count, created_at, length, _, checksum = HEADER.unpack(header)
+                info.update({
+                    "exists": True,
+                    "format_version": version,
+                    "datasets": count,
+                    "bytes": HEADER.size + length,
+                    "age_seconds": round(max(0.0, time.time() - created_at), 1),
+                    "checksum": checksum.hex(),
+                })
+            except (OSError, struct.error) as e:
+                info["error"] = str(e)
+        info["last_write"] = self.last_write
+        info["last_load"] = self.last_load
+        return info
+
+
+def _aligned(size: int) -> int:
+    return size + (-size % SECTION_ALIGNMENT)
+
+
+def _layout(arrays: Dict[str, Any]):
+    """
+    The payload chunks for a set of arrays, the payload length and its SHA-256
+    """
+    directory: Dict[str, list] = {}
+    blocks = []
+    offset = 0
+    for name, array in arrays.items():
+        directory[name] = [array.dtype.str, offset, len(array)]
+        blocks.append(memoryview(array).cast("B"))
+        padding = -array.nbytes % SECTION_ALIGNMENT
+        if padding:
+            blocks.append(bytes(padding))
+        offset += array.nbytes + padding
+    encoded = json.dumps(directory, separators=(",", ":")).encode()
+    prefix = DIRECTORY_LENGTH.pack(len(encoded)) + encoded
+    chunks = [prefix + bytes(_aligned(len(prefix)) - len(prefix))] + blocks
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return chunks, len(chunks[0]) + offset, digest.digest()
+
+
+# Global snapshot store instance
+catalog_snapshot = CatalogSnapshotStore()
@@ -0,0 +1,52 @@
+"""
+Server-side sort orders for list endpoints
+
+`sort=` names a field, prefixed with `-` for descending order (`-rating`,
+`price`). Each CatalogIndex precomputes the permutation of the catalog for
+every field and direction when it is built, so an unfiltered sorted page is
+a slice of that permutation, a category page is a slice of the permutation
+restricted to the category (computed once per load and category), and other
+filtered results (search) are ordered by looking up each match's rank
+instead of comparing listings. Ties keep catalog order in both directions.
+"""
+from typing import Dict, NamedTuple, Optional
+
+# Sortable fields and the catalog column (see catalog_columns.py) each is ordered by
+SORT_FIELDS: Dict[str, str] = {
+    "rating": "rating",
+    "downloads": "downloadCount",
+    "price": "price",
+    "qualityScore": "qualityScore",
+    "recency": "lastUpdated",
+}
+
+
+class SortKey(NamedTuple):
+    field: str
+    descending: bool
+
+    @property
+    def key(self) -> str:
+        return f"-{self.field}" if self.descending else self.field
+
+
+SORT_KEYS = tuple(SortKey(field, descending) for field in SORT_FIELDS for descending in (False, True))
+SORT_DESCRIPTION = (
+    f"Sort by {', '.join(SORT_FIELDS)}; prefix with - for descending (e.g. -rating). Default: catalog order"
+)
+
+
+def resolve_sort(sort: Optional[str]) -> Optional[SortKey]:
+    """
+    SortKey for the sort query parameter, None for catalog order
+
+    Raises ValueError for unknown fields.
+    """
+    if not sort or not sort.strip():
+        return None
+    value = sort.strip()
+    descending = value.startswith("-")
+    field = value.lstrip("+-")
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort field '{field}'; expected one of {', '.join(SORT_FIELDS)}")
+    return SortKey(field, descending)
@@ -0,0 +1,391 @@
+"""
+Type-ahead suggestions over titles, provider names and tags
+
+Every suggestion (a listing title, a provider or a tag) is stored under the
+normalized form of its text and of each later word position, so "wea" finds
+"Global Weather Data". The keys are kept in one sorted array: a prefix is a
+contiguous range found by bisection, the flattened form of a prefix trie.
+Suggestions are numbered by popularity (log of downloads scaled by rating,
+summed over the listings of a provider or tag), so the best of a range are
+its smallest numbers. Prefixes whose range is longer than HEAVY_RANGE keys
+have their top MAX_SUGGESTIONS precomputed, and shorter ranges are scanned,
+so a lookup touches at most HEAVY_RANGE keys whatever the catalog size.
+
+Typos are corrected SymSpell-style: the index maps every variant of a
+vocabulary prefix with up to SUGGEST_MAX_EDIT_DISTANCE characters deleted to
+the prefixes it came from, so the candidates for a mistyped word are found by
+generating the deletes of the word itself and looking them up, then checking
+the real edit distance. Corrections are only tried when the exact prefix has
+fewer matches than requested, and their suggestions rank below exact ones.
+Only the last MAX_CORRECTED_WORDS words are corrected, and corrected queries
+are enumerated cheapest first, so a long query costs no more than a short one.
+"""
+import os
+import re
+import math
+import time
+import heapq
+import bisect
+import itertools
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.models.dataset import Dataset
+
+MAX_EDIT_DISTANCE = int(os.getenv('SUGGEST_MAX_EDIT_DISTANCE', '2'))
+MAX_SUGGESTIONS = 20
+# Longest key range scanned per lookup; longer ranges have precomputed top lists
+HEAVY_RANGE = 64
+# Word positions of a text that start a key ("global weather data", "weather data", "data")
+MAX_KEY_WORDS = 8
+# Vocabulary prefixes are indexed from MIN_FUZZY_LENGTH up to PREFIX_LENGTH characters
+MIN_FUZZY_LENGTH = 3
+PREFIX_LENGTH = 7
+# Corrections kept per query word, corrected queries tried, and the score factor per edit
+CORRECTIONS_PER_WORD = 3
+MAX_CORRECTED_QUERIES = 8
+# Only the last words of a query are corrected; earlier ones are taken as typed
+MAX_CORRECTED_WORDS = 3
+CORRECTION_PENALTY = 0.5
+# Words whose corrections are remembered; type-ahead repeats the same words keystroke after keystroke
+CORRECTION_CACHE_SIZE = 4096
+
+DATASET = "dataset"
+PROVIDER = "provider"
+TAG = "tag"
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# Sorts after every character a normalized key can contain
+_END = "\U0010ffff"
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase ASCII words separated by single spaces
+    """
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return _NON_WORD.sub(" ", folded.lower()).strip()
+
+
+def popularity(dataset: Dataset) -> float:
+    return math.log1p(max(dataset.downloadCount, 0)) * (1 + max(0.0, min(dataset.rating, 5.0))) / 6
+
+
+def max_distance(length: int) -> int:
+    """
+    Edits allowed in a word of this length: none below 3 characters, one below 6
+    """
+    if length < MIN_FUZZY_LENGTH:
+        return 0
+    return min(MAX_EDIT_DISTANCE, 1 if length < 6 else 2)
+
+
+def cheapest_combinations(options: Sequence[Sequence[Tuple[str, int]]], count: int):
+    """
+    Up to count choices of one (word, distance) option per position, fewest total edits first
+
+    Each position's options must be sorted by distance. The choice with no
+    edits at all is skipped. Choices are expanded best-first from a heap,
+    so only about count x positions of them are ever built.
+    """
+    if not options or any(not choices for choices in options):
+        return
+    start = (0,) * len(options)
+    heap = [(sum(choices[0][1] for choices in options), start)]
+    queued = {start}
+    produced = 0
+    while heap and produced < count:
+        distance, picks = heapq.heappop(heap)
+        if distance > 0:
+            produced += 1
+            yield distance, [choices[pick] for choices, pick in zip(options, picks)]
+        for position, pick in enumerate(picks):
+            if pick + 1 < len(options[position]):
+                following = picks[:position] + (pick + 1,) + picks[position + 1:]
+                if following not in queued:
+                    queued.add(following)
+                    step = options[position][pick + 1][1] - options[position][pick][1]
+                    heapq.heappush(heap, (distance + step, following))
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """
+    Every string obtained by deleting up to distance characters
+    """
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (adjacent transpositions count once); limit + 1 once it exceeds limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class Suggestion:
+    __slots__ = ("text", "kind", "dataset_id", "score")
+
+    def __init__(self, text: str, kind: str, dataset_id: Optional[str], score: float):
+        self.text = text
+        self.kind = kind
+        self.dataset_id = dataset_id
+        self.score = score
+
+
+class SuggestIndex:
+    """
+    Immutable prefix and typo index over one catalog load
+    """
+
+    def __init__(self, datasets: Sequence[Dataset]):
+        started = time.perf_counter()
+        self.entries = self._collect(datasets)
+        keys: List[Tuple[str, int]] = []
+        for number, entry in enumerate(self.entries):
+            words = normalize(entry.text).split()
+            for position in range(min(len(words), MAX_KEY_WORDS)):
+                keys.append((" ".join(words[position:]), number))
+        keys.sort()
+        self.keys = [key for key, _ in keys]
+        self.key_entries = [number for _, number in keys]
+        self.top: Dict[str, Tuple[int, ...]] = {}
+        self._build_top()
+        self._build_vocabulary()
+        self._corrected: "OrderedDict[Tuple[str, bool], List[Tuple[str, int]]]" = OrderedDict()
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    @staticmethod
+    def _collect(datasets: Sequence[Dataset]) -> List[Suggestion]:
+        """
+        One suggestion per listing title and per distinct provider and tag, best first
+        """
+        suggestions: List[Suggestion] = []
+        grouped: Dict[Tuple[str, str], Suggestion] = {}
+        for dataset in datasets:
+            weight = popularity(dataset)
+            suggestions.append(Suggestion(dataset.title, DATASET, dataset.id, weight))
+            for kind, text in itertools.chain(((PROVIDER, dataset.provider.name),), ((TAG, tag) for tag in dataset.tags)):
+                key = (kind, normalize(text))
+                if not key[1]:
+                    continue
+                # A provider or tag is as popular as its listings together; the first spelling is shown
+                group = grouped.get(key)
+                if group is None:
+                    grouped[key] = Suggestion(text.strip(), kind, None, weight)
+                else:
+                    group.score += weight
+        suggestions.extend(grouped.values())
+        suggestions.sort(key=lambda suggestion: -suggestion.score)
+        return suggestions
+
+    def _build_top(self):
+        """
+        Best suggestion numbers for every prefix matching more than HEAVY_RANGE keys
+        """
+        keys = self.keys
+        # (lo, hi, depth, children visited): ranges are expanded before their top list is merged
+        stack = [(0, len(keys), 0, False)]
+        pending: Dict[Tuple[int, int, int], List[int]] = {}
+        while stack:
+            lo, hi, depth, visited = stack.pop()
+            if not visited:
+                stack.append((lo, hi, depth, True))
+                for child_lo, child_hi in self._children(lo, hi, depth):
+                    if child_hi - child_lo > HEAVY_RANGE:
+                        stack.append((child_lo, child_hi, depth + 1, False))
+                continue
+            candidates: Set[int] = set()
+            start = lo
+            while start < hi and len(keys[start]) == depth:
+                candidates.add(self.key_entries[start])
+                start += 1
+            for child_lo, child_hi in self._children(lo, hi, depth):
+                if child_hi - child_lo > HEAVY_RANGE:
+                    candidates.update(pending.pop((child_lo, child_hi, depth + 1)))
+                else:
+                    candidates.update(self.key_entries[child_lo:child_hi])
+            best = heapq.nsmallest(MAX_SUGGESTIONS, candidates)
+            pending[(lo, hi, depth)] = best
+            if depth > 0:
+                self.top[keys[lo][:depth]] = tuple(best)
+
+    def _children(self, lo: int, hi: int, depth: int):
+        """
+        Ranges of keys below a prefix grouped by their next character
+        """
+        keys = self.keys
+        while lo < hi and len(keys[lo]) == depth:
+            lo += 1
+        while lo < hi:
+            prefix = keys[lo][:depth + 1]
+            end = bisect.bisect_left(keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo, hi)
+            yield lo, end
+            lo = end
+
+    def _build_vocabulary(self):
+        """
+        Words of all keys, ranked by their best suggestion, and the delete index over their prefixes
+        """
+        self.word_rank: Dict[str, int] = {}
+        for number, entry in enumerate(self.entries):
+            for word in normalize(entry.text).split():
+                self.word_rank.setdefault(word, number)
+        self.words = sorted(self.word_rank)
+        # A prefix ranks as its best word
+        prefix_rank: Dict[str, int] = {}
+        for word, rank in self.word_rank.items():
+            for length in range(MIN_FUZZY_LENGTH, min(len(word), PREFIX_LENGTH) + 1):
+                prefix = word[:length]
+                if rank < prefix_rank.get(prefix, len(self.entries)):
+                    prefix_rank[prefix] = rank
+        self.prefix_rank = prefix_rank
+        self.deletes: Dict[str, List[str]] = {}
+        for prefix in prefix_rank:
+            for variant in _deletes(prefix, max_distance(len(prefix))):
+                self.deletes.setdefault(variant, []).append(prefix)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self.keys, prefix)
+        return lo, bisect.bisect_left(self.keys, prefix + _END, lo)
+
+    def _best(self, prefix: str, limit: int) -> List[int]:
+        """
+        Numbers of the best suggestions with a key starting with prefix
+        """
+        top = self.top.get(prefix)
+        if top is not None:
+            return list(top[:limit])
+        lo, hi = self._range(prefix)
+        return heapq.nsmallest(limit, set(self.key_entries[lo:hi]))
+
+    def _corrections(self, word: str, partial: bool) -> List[Tuple[str, int]]:
+        """
+        Vocabulary words (or word prefixes, for the word being typed) within the edit limit, closest first
+        """
+        key = (word, partial)
+        cached = self._corrected.get(key)
+        if cached is not None:
+            self._corrected.move_to_end(key)
+            return cached
+        ranked = self._find_corrections(word, partial)
+        self._corrected[key] = ranked
+        while len(self._corrected) > CORRECTION_CACHE_SIZE:
+            self._corrected.popitem(last=False)
+        return ranked
+
+    def _find_corrections(self, word: str, partial: bool) -> List[Tuple[str, int]]:
+        limit = max_distance(len(word))
+        if limit == 0:
+            return []
+        head = word[:PREFIX_LENGTH]
+        found: Dict[str, int] = {}
+        for variant in _deletes(head, limit):
+            for prefix in self.deletes.get(variant, ()):
+                if len(word) <= PREFIX_LENGTH:
+                    if not partial and prefix not in self.word_rank:
+                        continue
+                    candidates = [(prefix, edit_distance(word, prefix, limit))]
+                elif edit_distance(head, prefix, limit) > limit:
+                    continue
+                else:
+                    # Long words were indexed by their first PREFIX_LENGTH characters only
+                    lo = bisect.bisect_left(self.words, prefix)
+                    hi = bisect.bisect_left(self.words, prefix + _END, lo)
+                    candidates = [self._closest(word, candidate, limit, partial) for candidate in self.words[lo:hi]]
+                for candidate, distance in candidates:
+                    if 0 < distance <= limit and distance < found.get(candidate, limit + 1):
+                        found[candidate] = distance
+        ranked = sorted(
+            found.items(),
+            key=lambda item: (item[1], self.prefix_rank.get(item[0][:PREFIX_LENGTH], len(self.entries)))
+        )
+        return ranked[:CORRECTIONS_PER_WORD]
+
+    @staticmethod
+    def _closest(word: str, candidate: str, limit: int, partial: bool) -> Tuple[str, int]:
+        """
+        The candidate, or for a word being typed its prefix closest to the word, with the distance
+        """
+        if not partial:
+            return candidate, edit_distance(word, candidate, limit)
+        lengths = range(max(1, len(word) - limit), min(len(candidate), len(word) + limit) + 1)
+        return min(
+            ((candidate[:length], edit_distance(word, candidate[:length], limit)) for length in lengths),
+            key=lambda item: item[1], default=(candidate, limit + 1)
+        )
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[Suggestion, int, float]]:
+        """
+        Best suggestions for what has been typed so far, with the edits each needed and its score
+        """
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+        words = normalize(query).split()
+        if not words:
+            return []
+        # A trailing space means the last word is complete
+        partial = not query[-1:].isspace()
+        prefix = " ".join(words) + ("" if partial else " ")
+        results = [(self.entries[number], 0, self.entries[number].score) for number in self._best(prefix, limit)]
+        if len(results) >= limit:
+            return results
+
+        # Too few exact matches: try the closest spellings of the last few words
+        first_corrected = max(0, len(words) - MAX_CORRECTED_WORDS)
+        options = [[(word, 0)] for word in words[:first_corrected]]
+        for position in range(first_corrected, len(words)):
+            word = words[position]
+            last = position == len(words) - 1
+            exact = self._best(word, 1) if last and partial else ([word] if word in self.word_rank else [])
+            options.append(([(word, 0)] if exact else []) + self._corrections(word, last and partial))
+        scored: Dict[int, float] = {}
+        distances: Dict[int, int] = {}
+        seen = {id(entry) for entry, _, _ in results}
+        for distance, combination in cheapest_combinations(options, MAX_CORRECTED_QUERIES):
+            corrected = " ".join(word for word, _ in combination) + ("" if partial else " ")
+            for number in self._best(corrected, limit):
+                entry = self.entries[number]
+                if id(entry) in seen:
+                    continue
+                score = entry.score * CORRECTION_PENALTY ** distance
+                if score > scored.get(number, -1.0):
+                    scored[number] = score
+                    distances[number] = distance
+        ranked = sorted(scored, key=lambda number: (-scored[number], number))
+        results.extend(
+            (self.entries[number], distances[number], scored[number]) for number in ranked[:limit - len(results)]
+        )
+        return results
+
+    def get_info(self):
+        return {
+            "suggestions": len(self.entries),
+            "keys": len(self.keys),
+            "precomputed_prefixes": len(self.top),
+            "vocabulary": len(self.words),
+            "delete_variants": len(self.deletes),
+            "build_ms": self.build_ms,
+        }
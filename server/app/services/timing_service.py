@@ -0,0 +1,139 @@
+"""
+Per-request phase timing, reported as a Server-Timing header
+
+The request middleware starts a RequestTimer in a contextvar; services wrap
+their work in `phase(...)`, which is a no-op outside a request. Phases that
+run on executor threads are recorded as long as the caller's context was
+copied onto the thread (see tracing_service.bind_context).
+"""
+import os
+import json
+import time
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from opentelemetry import trace
+
+logger = logging.getLogger(__name__)
+
+HEADER_ENABLED = os.getenv('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+LOG_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_LOG_SAMPLE_RATE', '0.01'))
+
+# Phase names and the descriptions shown in browser devtools
+PHASES = {
+    'cache': 'Catalog cache lookup',
+    'db': 'PostgreSQL queries',
+    'warehouse': 'SQL warehouse statements',
+    'decode': 'Row decoding',
+    'validate': 'Model validation',
+    'serialize': 'Response serialization',
+}
+
+
+class RequestTimer:
+    """
+    Accumulates time and call counts per phase for a single request
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header_value(self) -> str:
+        entries = []
+        with self._lock:
+            for name, seconds in self.durations.items():
+                description = PHASES.get(name)
+                entry = f"{name};dur={seconds * 1000:.3f}"
+                if description:
+                    entry += f';desc="{description}"'
+                entries.append(entry)
+        entries.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(entries)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {"ms": round(seconds * 1000, 3), "count": self.counts[name]}
+                for name, seconds in self.durations.items()
+            }
+
+
+_current_timer: contextvars.ContextVar[Optional[RequestTimer]] = contextvars.ContextVar(
+    'request_timer', default=None
+)
+
+
+def start_request() -> contextvars.Token:
+    """
+    Install a fresh timer for the current request
+    """
+    return _current_timer.set(RequestTimer())
+
+
+def end_request(token: contextvars.Token):
+    _current_timer.reset(token)
+
+
+def current_timer() -> Optional[RequestTimer]:
+    return _current_timer.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Time a block of work under a phase name
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def record(name: str, seconds: float):
+    """
+    Record an already-measured interval under a phase name
+    """
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+def should_log() -> bool:
+    return LOG_SAMPLE_RATE > 0 and random.random() < LOG_SAMPLE_RATE
+
+
+def log_request(timer: RequestTimer, method: str, route: str, status_code: int):
+    """
+    Emit one JSON log line with the request's phase breakdown
+    """
+    record_line = {
+        "method": method,
+        "route": route,
+        "status": status_code,
+        "total_ms": round(timer.elapsed() * 1000, 3),
+        "phases": timer.as_dict(),
+    }
+    span_context = trace.get_current_span().get_span_context()
+    if span_context.is_valid:
+        record_line["trace_id"] = format(span_context.trace_id, "032x")
+    logger.info(f"request_timing {json.dumps(record_line)}")
@@ -0,0 +1,253 @@
+"""
+OpenTelemetry tracing for the marketplace API
+
+Tracing is off unless TRACING_EXPORTER is set:
+  - memory: keep recent spans in a ring buffer, browsable at /api/traces
+  - file:   append spans as JSON lines to TRACING_FILE_PATH
+  - console: print spans to stdout
+  - otlp:   send to an OTLP collector (requires opentelemetry-exporter-otlp)
+"""
+import os
+import json
+import logging
+import threading
+import contextvars
+import functools
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from opentelemetry import trace, propagate
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor, SpanExporter, SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "databricks-marketplace-api"
+# Long SQL is truncated on span attributes
+MAX_STATEMENT_LENGTH = 2000
+
+
+class RingBufferSpanExporter(SpanExporter):
+    """
+    Keeps the most recent spans in memory for offline inspection
+    """
+
+    def __init__(self, max_spans: int = 5000):
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        with self._lock:
+            self._spans.extend(spans)
+        return SpanExportResult.SUCCESS
+
+    def get_finished_spans(self) -> List[ReadableSpan]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def shutdown(self):
+        self.clear()
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """
+    Appends one JSON object per span to a local file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        try:
+            lines = [json.dumps(_span_to_dict(span), default=str) for span in spans]
+            with self._lock, open(self.path, "a") as file:
+                file.write("\n".join(lines) + "\n")
+            return SpanExportResult.SUCCESS
+        except Exception as e:
+            logger.warning(f"Failed to write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+
+    def shutdown(self):
+        pass
+
+
+def _span_to_dict(span: ReadableSpan) -> Dict[str, Any]:
+    context = span.get_span_context()
+    return {
+        "trace_id": format(context.trace_id, "032x"),
+        "span_id": format(context.span_id, "016x"),
+        "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+        "name": span.name,
+        "kind": span.kind.name,
+        "start_time_ns": span.start_time,
+        "end_time_ns": span.end_time,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3) if span.end_time else None,
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+    }
+
+
+def _build_exporter(kind: str) -> Optional[SpanExporter]:
+    if kind == "memory":
+        return RingBufferSpanExporter(int(os.getenv("TRACING_MEMORY_SPANS", "5000")))
+    if kind == "file":
+        return JsonLinesSpanExporter(os.getenv("TRACING_FILE_PATH", "traces.jsonl"))
+    if kind == "console":
+        return ConsoleSpanExporter()
+    if kind == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            return OTLPSpanExporter()
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otlp requires opentelemetry-exporter-otlp; tracing disabled")
+            return None
+    logger.warning(f"Unknown TRACING_EXPORTER '{kind}'; tracing disabled")
+    return None
+
+
+class TracingService:
+    """
+    Owns the tracer provider and the optional in-memory span buffer
+    """
+
+    def __init__(self):
+        self.exporter_kind = os.getenv("TRACING_EXPORTER", "none").lower()
+        self.memory_exporter: Optional[RingBufferSpanExporter] = None
+        self.enabled = False
+        self._configure()
+        self.tracer = trace.get_tracer("marketplace")
+
+    def _configure(self):
+        if self.exporter_kind in ("", "none", "off"):
+            return
+        exporter = _build_exporter(self.exporter_kind)
+        if exporter is None:
+            return
+
+        ratio = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": SERVICE_NAME}),
+            sampler=ParentBased(TraceIdRatioBased(ratio)),
+        )
+        if isinstance(exporter, RingBufferSpanExporter):
+            self.memory_exporter = exporter
+            provider.add_span_processor(SimpleSpanProcessor(exporter))
+        else:
+            provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+        self.enabled = True
+        logger.info(f"Tracing enabled with '{self.exporter_kind}' exporter (sample ratio {ratio})")
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None, **kwargs) -> Iterator[trace.Span]:
+        """
+        Start a child span of the current context
+        """
+        with self.tracer.start_as_current_span(name, attributes=attributes, **kwargs) as span:
+            yield span
+
+    @contextmanager
+    def request_span(self, method: str, path: str, headers) -> Iterator[trace.Span]:
+        """
+        Start the server span for an incoming request, continuing any W3C traceparent
+
+        FastAPI itself creates no spans, but OpenTelemetry's ASGI/FastAPI
+        instrumentation does when it is installed; a server span that is already
+        current is reused so each request stays a single trace.
+        """
+        current = trace.get_current_span()
+        if current.is_recording() and getattr(current, "kind", None) == SpanKind.SERVER:
+            yield current
+            return
+
+        context = propagate.extract(headers)
+        with self.tracer.start_as_current_span(
+            f"{method} {path}",
+            context=context,
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": path},
+        ) as span:
+            yield span
+
+    def record_span(self, name: str, start_time_ns: int, end_time_ns: int,
+                    attributes: Optional[Dict[str, Any]] = None):
+        """
+        Record an already-finished interval as a child of the current span
+        """
+        span = self.tracer.start_span(name, attributes=attributes, start_time=start_time_ns)
+        span.end(end_time=end_time_ns)
+
+    def db_statement(self, statement: str) -> str:
+        return statement if len(statement) <= MAX_STATEMENT_LENGTH else statement[:MAX_STATEMENT_LENGTH] + "..."
+
+    @staticmethod
+    def record_error(span: trace.Span, error: BaseException):
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, str(error)))
+
+    @staticmethod
+    def bind_context(func: Callable, *args) -> Callable[[], Any]:
+        """
+        Bind func to the current context so spans started in an executor thread
+        keep their parent (run_in_executor does not copy contextvars)
+        """
+        return functools.partial(contextvars.copy_context().run, func, *args)
+
+    def get_recent_traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Group buffered spans into per-trace waterfalls, most recent first
+        """
+        if not self.memory_exporter:
+            return []
+
+        traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        for span in self.memory_exporter.get_finished_spans():
+            item = _span_to_dict(span)
+            traces.setdefault(item["trace_id"], []).append(item)
+
+        waterfalls = []
+        for trace_id, spans in reversed(traces.items()):
+            spans.sort(key=lambda item: item["start_time_ns"])
+            span_ids = {item["span_id"] for item in spans}
+            roots = [item for item in spans if item["parent_id"] not in span_ids]
+            started = spans[0]["start_time_ns"]
+            finished = max(item["end_time_ns"] or started for item in spans)
+            depths: Dict[str, int] = {}
+            for item in spans:
+                depths[item["span_id"]] = depths.get(item["parent_id"], -1) + 1
+            waterfalls.append({
+                "trace_id": trace_id,
+                "root": roots[0]["name"] if roots else spans[0]["name"],
+                "duration_ms": round((finished - started) / 1e6, 3),
+                "spans": [
+                    {
+                        "name": item["name"],
+                        "span_id": item["span_id"],
+                        "parent_id": item["parent_id"],
+                        "depth": depths[item["span_id"]],
+                        "offset_ms": round((item["start_time_ns"] - started) / 1e6, 3),
+                        "duration_ms": item["duration_ms"],
+                        "status": item["status"],
+                        "attributes": item["attributes"],
+                    }
+                    for item in spans
+                ],
+            })
+            if len(waterfalls) >= limit:
+                break
+        return waterfalls
+
+
+# Global tracing service instance
+tracing_service = TracingService()
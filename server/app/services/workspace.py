@@ -0,0 +1,16 @@
+"""
+Databricks workspace settings shared by the SDK clients
+
+DatabaseService (credential generation) and DatabricksService (SQL warehouse
+previews) each create a WorkspaceClient for the same workspace.
+"""
+from typing import Optional
+
+
+def workspace_host(server_hostname: Optional[str]) -> str:
+    """
+    Workspace URL for the SDK client; hosts without a scheme default to HTTPS
+    """
+    if server_hostname and server_hostname.startswith(('http://', 'https://')):
+        return server_hostname
+    return f"https://{server_hostname}"
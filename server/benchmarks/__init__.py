@@ -0,0 +1,3 @@
+"""
+Benchmark suite for the Databricks Marketplace API hot paths
+"""
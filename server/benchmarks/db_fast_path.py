@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark the asyncpg fast path against the SQLAlchemy execute_query path
+
+Runs the catalog query (or --query) against the PostgreSQL instance configured
+through the usual PG* environment variables. --repeat multiplies the result
+set with generate_series so per-row overhead shows up without writing data.
+
+Usage (from the server directory):
+    python -m benchmarks.db_fast_path
+    python -m benchmarks.db_fast_path --repeat 200 --min-time 5
+    python -m benchmarks.db_fast_path --query "SELECT id, title FROM elghali_benchekroun.dataset"
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+# Add the server directory to Python path so we can import the app module
+server_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(server_dir))
+
+from benchmarks.run_benchmarks import measure
+
+CATALOG_QUERY = "SELECT * FROM elghali_benchekroun.dataset"
+
+
+def build_query(base_query: str, repeat: int) -> str:
+    if repeat <= 1:
+        return base_query
+    return f"SELECT base.* FROM ({base_query}) AS base CROSS JOIN generate_series(1, {repeat})"
+
+
+async def drain_stream(database_service, query: str, batch_size: int) -> int:
+    rows = 0
+    async for batch in database_service.stream_records(query, batch_size=batch_size):
+        rows += len(batch)
+    return rows
+
+
+async def run(args) -> Dict[str, Any]:
+    from app.services.database_service import database_service
+
+    query = build_query(args.query, args.repeat)
+    rows = len(await database_service.execute_query(query))
+    print(f"📐 {rows} rows per query")
+
+    paths = {
+        "sqlalchemy_execute_query": lambda _: database_service.execute_query(query),
+        "asyncpg_fetch_records": lambda _: database_service.fetch_records(query),
+        "asyncpg_fetch_columns": lambda _: database_service.fetch_columns(query),
+        "asyncpg_stream_records": lambda _: drain_stream(database_service, query, args.batch_size),
+    }
+    results: Dict[str, Any] = {"query": query, "rows": rows, "paths": {}}
+    for name, operation in paths.items():
+        await operation(0)  # warm up pools and statement caches
+        results["paths"][name] = await measure(operation, args.min_time)
+
+    # PgBouncer-compatible mode: no statement cache, unnamed statements
+    database_service.statement_cache_size = 0
+    await database_service._close_fast_pool()
+    operation = paths["asyncpg_fetch_records"]
+    await operation(0)
+    results["paths"]["asyncpg_fetch_records_pgbouncer"] = await measure(operation, args.min_time)
+
+    await database_service.close()
+    return results
+
+
+def print_results(results: Dict[str, Any]):
+    baseline = results["paths"]["sqlalchemy_execute_query"]["p50_ms"]
+    print(f"\n{'path':<34} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'vs sqlalchemy':>14}")
+    for name, stats in results["paths"].items():
+        speedup = baseline / stats["p50_ms"] if stats["p50_ms"] else 0.0
+        print(f"{name:<34} {stats['throughput_ops']:>10} {stats['p50_ms']:>10} "
+              f"{stats['p95_ms']:>10} {stats['p99_ms']:>10} {speedup:>13.2f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare database read paths")
+    parser.add_argument("--query", default=CATALOG_QUERY, help="Read query to benchmark")
+    parser.add_argument("--repeat", type=int, default=1, help="Multiply the result set this many times")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Batch size for the streaming path")
+    parser.add_argument("--min-time", type=float, default=2.0, help="Minimum seconds per path")
+    parser.add_argument("--output", type=Path, help="Write the JSON results here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    results = asyncio.run(run(args))
+    print_results(results)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
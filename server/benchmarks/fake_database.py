@@ -0,0 +1,46 @@
+"""
+In-memory stand-in for DatabaseService used by the benchmark suite
+"""
+import asyncio
+from typing import List, Dict, Any, Optional
+
+
+class FakeDatabaseService:
+    """
+    Serves pre-generated rows for the catalog query, mimicking the interface
+    DatasetService relies on (test_connection / execute_query / stream_records).
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], latency_seconds: float = 0.0):
+        self.rows = rows
+        self.latency_seconds = latency_seconds
+        self.query_count = 0
+
+    async def _simulate_latency(self):
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Return the catalog rows for any dataset query"""
+        self.query_count += 1
+        await self._simulate_latency()
+        if query.strip().upper().startswith("SELECT 1"):
+            return [{'test': 1}]
+        # DatasetService copies each row before mutating it, so the shared
+        # dicts can be handed out as-is, just like SQLAlchemy row mappings
+        return list(self.rows)
+
+    async def fetch_records(self, query: str, *args: Any) -> List[Dict[str, Any]]:
+        """Fast-path counterpart of execute_query; rows are plain dicts here"""
+        return await self.execute_query(query)
+
+    async def stream_records(self, query: str, *args: Any, batch_size: Optional[int] = None):
+        """Yield the catalog rows in batches, like the server-side cursor path"""
+        rows = await self.execute_query(query)
+        batch_size = batch_size or 2000
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+    async def test_connection(self) -> bool:
+        await self._simulate_latency()
+        return True
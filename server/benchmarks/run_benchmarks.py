@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner for the DatasetService hot paths
+
+Generates synthetic catalogs, serves them through an in-memory database
+stand-in and records throughput and latency percentiles per operation.
+
+Usage (from the server directory):
+    python -m benchmarks.run_benchmarks --sizes 1k,100k,1M
+    python -m benchmarks.run_benchmarks --output benchmarks/results/baseline.json
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Add the server directory to Python path so we can import the app module
+server_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(server_dir))
+
+from benchmarks.fake_database import FakeDatabaseService
+from benchmarks.synthetic_catalog import (
+    TITLE_WORDS, format_size, generate_rows, load_seed_rows, parse_size,
+)
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = "1k,100k,1M"
+PAGE_SIZE = 50
+# Metrics compared against a baseline; higher is worse for all of them
+COMPARED_METRICS = ("p50_ms", "p95_ms")
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sample list"""
+    if not sorted_samples:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_samples))
+    return sorted_samples[max(0, min(len(sorted_samples), rank) - 1)]
+
+
+def summarize(samples: List[float], elapsed: float) -> Dict[str, Any]:
+    """Summarize per-call latencies (seconds) into throughput and percentiles (ms)"""
+    ordered = sorted(samples)
+    return {
+        "iterations": len(samples),
+        "throughput_ops": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+async def measure(
+    operation: Callable[[int], Awaitable[Any]],
+    min_time: float,
+    min_iterations: int = 3,
+    max_iterations: int = 10_000,
+) -> Dict[str, Any]:
+    """Run `operation` repeatedly until both the time and iteration floors are met"""
+    samples = []
+    started = time.perf_counter()
+    iteration = 0
+    while iteration < max_iterations:
+        call_started = time.perf_counter()
+        await operation(iteration)
+        samples.append(time.perf_counter() - call_started)
+        iteration += 1
+        if iteration >= min_iterations and time.perf_counter() - started >= min_time:
+            break
+    return summarize(samples, time.perf_counter() - started)
+
+
+async def benchmark_catalog(size: int, min_time: float, seed: int) -> Dict[str, Any]:
+    """Benchmark every hot path against a catalog of `size` listings"""
+    from app.models.dataset import DatasetCategory, DatasetListResponse
+    from app.services.dataset_service import DatasetService
+    from app.services.snapshot_service import CatalogSnapshotStore
+
+    print(f"\n📦 Catalog size {format_size(size)}: generating rows...")
+    rows = generate_rows(size, seed=seed)
+    # No snapshot: benchmark catalogs must not replace the real one on disk
+    service = DatasetService(database=FakeDatabaseService(rows), snapshot=CatalogSnapshotStore(path=""))
+    rng = random.Random(seed)
+
+    results = {}
+
+    async def catalog_load(_):
+        await service._load_datasets_from_database()
+
+    async def catalog_refresh(_):
+        await service.refresh_datasets()
+        await service.get_all_datasets(1, PAGE_SIZE)
+
+    # Catalog loads are expensive at large sizes; a handful of runs is enough
+    results["catalog_load"] = await measure(catalog_load, min_time, min_iterations=2, max_iterations=5)
+    results["catalog_refresh"] = await measure(catalog_refresh, min_time, min_iterations=2, max_iterations=5)
+
+    # Warm the cache so the remaining operations measure the steady state
+    datasets = await service._get_datasets_with_cache()
+    page_count = max(1, size // PAGE_SIZE)
+    categories = list(DatasetCategory)
+    ids = [str(rng.randint(1, size)) for _ in range(1024)]
+    queries = [word.lower() for word in TITLE_WORDS] + [
+        seed_row['provider']['name'].split()[0].lower() for seed_row in load_seed_rows()
+    ]
+
+    async def get_all_datasets(i):
+        await service.get_all_datasets(rng.randint(1, page_count), PAGE_SIZE)
+
+    async def get_datasets_by_category(i):
+        await service.get_datasets_by_category(categories[i % len(categories)], 1, PAGE_SIZE)
+
+    async def search_datasets(i):
+        await service.search_datasets(queries[i % len(queries)], 1, PAGE_SIZE)
+
+    async def get_dataset_by_id(i):
+        await service.get_dataset_by_id(ids[i % len(ids)])
+
+    async def get_dataset_stats(_):
+        await service.get_dataset_stats()
+
+    async def serialize_page(i):
+        start = (i % page_count) * PAGE_SIZE
+        page = datasets[start:start + PAGE_SIZE]
+        DatasetListResponse(data=page, total=len(datasets), page=1, limit=PAGE_SIZE).model_dump_json()
+
+    operations = {
+        "get_all_datasets": get_all_datasets,
+        "get_datasets_by_category": get_datasets_by_category,
+        "search_datasets": search_datasets,
+        "get_dataset_by_id": get_dataset_by_id,
+        "get_dataset_stats": get_dataset_stats,
+        "serialize_page": serialize_page,
+    }
+    for name, operation in operations.items():
+        results[name] = await measure(operation, min_time)
+
+    for name, stats in results.items():
+        print(
+            f"   {name:<26} {stats['throughput_ops']:>12.1f} ops/s   "
+            f"p50 {stats['p50_ms']:>10.3f} ms   p95 {stats['p95_ms']:>10.3f} ms   "
+            f"p99 {stats['p99_ms']:>10.3f} ms"
+        )
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=server_dir, capture_output=True, text=True, check=True,
+        )
+        return result.stdout.strip()
+    except Exception:
+        return None
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print a comparison table and return the list of regressions"""
+    regressions = []
+    print(f"\n📊 Comparison against baseline ({baseline.get('git_revision') or 'unknown revision'})")
+    print(f"   tolerance: {tolerance:.0%}")
+    for size_label, operations in current["catalogs"].items():
+        baseline_operations = baseline.get("catalogs", {}).get(size_label)
+        if not baseline_operations:
+            print(f"   {size_label}: no baseline, skipped")
+            continue
+        for name, stats in operations.items():
+            baseline_stats = baseline_operations.get(name)
+            if not baseline_stats:
+                continue
+            for metric in COMPARED_METRICS:
+                before, after = baseline_stats[metric], stats[metric]
+                if not before:
+                    continue
+                change = (after - before) / before
+                marker = "✅"
+                if change > tolerance:
+                    marker = "❌"
+                    regressions.append(f"{size_label} {name} {metric}: {before:.3f} -> {after:.3f} ms ({change:+.1%})")
+                elif change < -tolerance:
+                    marker = "🚀"
+                print(f"   {marker} {size_label:>5} {name:<26} {metric:<7} {before:>10.3f} -> {after:>10.3f} ms ({change:+.1%})")
+    return regressions
+
+
+async def run(args) -> Dict[str, Any]:
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "min_time_seconds": args.min_time,
+        "catalogs": {},
+    }
+    for size in sizes:
+        report["catalogs"][format_size(size)] = await benchmark_catalog(size, args.min_time, args.seed)
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark DatasetService hot paths on synthetic catalogs")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated catalog sizes (default: 1k,100k,1M)")
+    parser.add_argument("--min-time", type=float, default=2.0, help="Minimum seconds spent per operation")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for catalog generation")
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown before flagging (default: 0.10)")
+    args = parser.parse_args()
+
+    # Keep per-load info logs out of the measurements
+    logging.basicConfig(level=logging.WARNING)
+
+    print("🚀 Databricks Marketplace API benchmarks")
+    print("=" * 50)
+    report = asyncio.run(run(args))
+
+    output = args.output or RESULTS_DIR / f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\n💾 Results written to {output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare_results(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) detected:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print("\n✅ No regressions detected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Synthetic catalog generator shaped like client/src/data/datasets.json
+"""
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Dict, Any
+
+SEED_DATA_PATH = Path(__file__).parent.parent.parent / "client" / "src" / "data" / "datasets.json"
+
+# Raw values as they appear in the seed file / database rows
+CATEGORIES = [
+    'MARKET_TRADING', 'ALTERNATIVE_DATA', 'REFERENCE_DATA', 'RISK_COMPLIANCE',
+    'CUSTOMER_ANALYTICS', 'ESG_SUSTAINABILITY', 'CREDIT_RISK', 'FRAUD_DETECTION',
+]
+FREQUENCIES = ['REAL_TIME', 'DAILY', 'WEEKLY', 'MONTHLY', 'QUARTERLY']
+PRICING_MODELS = ['SUBSCRIPTION', 'PAY_PER_USE', 'ONE_TIME', 'FREE', 'CUSTOM']
+ACCESS_LEVELS = ['PUBLIC', 'RESTRICTED', 'PRIVATE']
+COVERAGE = ['Global', 'United States', 'Europe', 'North America', 'Canada', 'Asia-Pacific', 'United Kingdom']
+TITLE_WORDS = [
+    'Equity', 'Credit', 'Fixed Income', 'ESG', 'Sentiment', 'Supply Chain', 'Transaction',
+    'Fraud', 'Reference', 'Options', 'FX', 'Commodities', 'Satellite', 'Consumer', 'Risk',
+]
+TITLE_SUFFIXES = ['Intelligence', 'Signals', 'Analytics', 'Feed', 'Monitor', 'Index', 'Panel', 'Scores']
+
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+
+def parse_size(value: str) -> int:
+    """Parse a catalog size such as '1k', '100k' or '1M'"""
+    value = value.strip().lower()
+    if value and value[-1] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    """Format a catalog size back to its short label"""
+    if size >= 1_000_000 and size % 1_000_000 == 0:
+        return f"{size // 1_000_000}M"
+    if size >= 1_000 and size % 1_000 == 0:
+        return f"{size // 1_000}k"
+    return str(size)
+
+
+def load_seed_rows() -> List[Dict[str, Any]]:
+    """Load the real catalog used as templates for synthetic rows"""
+    with open(SEED_DATA_PATH, 'r') as file:
+        return json.load(file)
+
+
+def generate_rows(size: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Generate `size` raw dataset rows in the same shape the database (and the
+    JSON fallback) returns them.
+
+    Long text fields are shared with the seed rows so that a 1M-row catalog
+    stays within a reasonable memory budget while keeping realistic lengths.
+    """
+    rng = random.Random(seed)
+    templates = load_seed_rows()
+    providers = [template['provider'] for template in templates]
+    base_date = date(2024, 12, 31)
+
+    rows = []
+    for index in range(size):
+        template = templates[index % len(templates)]
+        start_year = rng.randint(1985, 2020)
+        time_range = {
+            'from': f"{start_year}-01-01",
+            'to': (base_date - timedelta(days=rng.randint(0, 365))).isoformat(),
+        }
+        rows.append({
+            'id': str(index + 1),
+            'title': f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_SUFFIXES)} {index + 1}",
+            'description': template['description'],
+            'provider': rng.choice(providers),
+            'category': CATEGORIES[rng.randrange(len(CATEGORIES))],
+            'subCategory': template.get('subCategory'),
+            'frequency': rng.choice(FREQUENCIES),
+            'lastUpdated': (base_date - timedelta(days=rng.randint(0, 1500))).isoformat(),
+            'pricingModel': rng.choice(PRICING_MODELS),
+            'price': float(rng.randint(0, 500) * 10),
+            'currency': 'USD',
+            'accessLevel': rng.choice(ACCESS_LEVELS),
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'ratingsCount': rng.randint(0, 5000),
+            'downloadCount': rng.randint(0, 100000),
+            'tags': rng.sample(template['tags'], k=len(template['tags'])),
+            'formats': template['formats'],
+            'geographicCoverage': rng.sample(COVERAGE, k=rng.randint(1, 3)),
+            'timeRange': time_range,
+            'sampleAvailable': template.get('sampleAvailable', False),
+            'sampleUrl': template.get('sampleUrl'),
+            'previewImage': template.get('previewImage'),
+            'qualityScore': rng.randint(60, 100),
+            'verified': rng.random() < 0.7,
+        })
+    return rows
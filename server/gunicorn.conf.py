@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration for production deployments
+
+Prepares the Prometheus multiprocess directory shared by all workers so that
+/metrics aggregates every worker, not just the one serving the scrape, and
+tells workers how many of them share the database connection budget.
+"""
+import os
+import shutil
+import tempfile
+
+prometheus_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "marketplace-prometheus")
+)
+
+
+def on_starting(server):
+    # Files left by a previous master would be aggregated into this one
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+    # Workers split PG_CONNECTION_BUDGET by this count (see pool_service)
+    os.environ["WEB_CONCURRENCY"] = str(server.cfg.workers)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Bulk catalog ingestion for Databricks Marketplace
+
+Loads listings from NDJSON, CSV or JSON array files into
+elghali_benchekroun.dataset using COPY into a staging table and an upsert.
+
+Usage:
+    python ingest_catalog.py ../client/src/data/datasets.json
+    python ingest_catalog.py listings.ndjson --batch-size 10000
+    python ingest_catalog.py listings.csv --dry-run
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from itertools import chain
+from pathlib import Path
+
+# Add the server directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.database_service import database_service
+from app.services.ingestion_service import (
+    DEFAULT_BATCH_SIZE, FORMATS, IngestionError, detect_format, ingestion_service, iter_records,
+)
+
+def open_records(path: Path, fmt: str = None):
+    """
+    Stream raw listings from a file without reading it all up front (except JSON arrays)
+    """
+    with open(path, 'rb') as file:
+        head = file.read(64)
+    fmt = fmt or detect_format(name=path.name, head=head)
+    handle = open(path, 'r', encoding='utf-8-sig', newline='')
+    return fmt, handle, iter_records(handle, fmt)
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk load listings into the marketplace catalog")
+    parser.add_argument("files", nargs="+", type=Path, help="NDJSON, CSV or JSON array files")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (detected from the file when omitted)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows validated and copied per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, without writing")
+    parser.add_argument("--report", type=Path, help="Write the JSON load report here")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    print("🚀 Databricks Marketplace Catalog Ingestion")
+    print("=" * 50)
+    
+    handles = []
+    try:
+        sources = []
+        for path in args.files:
+            fmt, handle, records = open_records(path, args.format)
+            handles.append(handle)
+            sources.append(records)
+            print(f"📄 {path} ({fmt})")
+        
+        report = await ingestion_service.ingest(chain(*sources), args.batch_size, args.dry_run)
+    except (IngestionError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        for handle in handles:
+            handle.close()
+        await database_service.close()
+    
+    print(f"\n{'🔎 Dry run' if report['dry_run'] else '✅ Load complete'}: "
+          f"{report['received']} received, {report['valid']} valid, {report['invalid']} invalid")
+    if not report['dry_run']:
+        print(f"   {report['inserted']} inserted, {report['updated']} updated")
+    print(f"   {report['duration_ms']} ms ({report['rows_per_second']} rows/s), phases: {report['phases_ms']}")
+    for error in report['errors'][:10]:
+        print(f"   ⚠️  row {error['row']} (id {error['id']}): {error['error']}")
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Report written to {args.report}")
+    return 0 if report['valid'] or not report['received'] else 1
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Local fake of the Databricks SQL Statement Execution API
+
+Implements just enough of /api/2.0/sql/statements for DatabricksService to
+run previews against it, with configurable latency, failures, statement
+states and result sizes.
+
+Usage (from the server directory):
+    python -m loadtest.fake_warehouse --port 8899 --latency-distribution lognormal --latency-ms 250
+
+Then point the API at it:
+    DATABRICKS_HOST=http://127.0.0.1:8899 DATABRICKS_ACCESS_TOKEN=fake DATABRICKS_WAREHOUSE_ID=fake
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+STATEMENT_PATH = re.compile(r"^/api/2\.0/sql/statements/?$")
+STATEMENT_ID_PATH = re.compile(r"^/api/2\.0/sql/statements/([^/]+)/?$")
+CANCEL_PATH = re.compile(r"^/api/2\.0/sql/statements/([^/]+)/cancel/?$")
+
+
+@dataclass
+class WarehouseProfile:
+    """Behaviour of the fake warehouse"""
+    latency_distribution: str = "constant"
+    latency_ms: float = 100.0
+    # Spread: half-width for uniform, sigma for lognormal; ignored otherwise
+    latency_spread: float = 0.5
+    failure_rate: float = 0.0
+    pending_rate: float = 0.0
+    canceled_rate: float = 0.0
+    http_error_rate: float = 0.0
+    result_rows: int = 100
+    result_columns: int = 8
+    seed: Optional[int] = None
+
+    def validate(self):
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+        if self.failure_rate + self.pending_rate + self.canceled_rate > 1:
+            raise ValueError("failure, pending and canceled rates must add up to at most 1")
+
+
+class FakeWarehouse:
+    """Statement state machine shared by all request handler threads"""
+
+    def __init__(self, profile: WarehouseProfile):
+        profile.validate()
+        self.profile = profile
+        self._rng = random.Random(profile.seed)
+        self._lock = threading.Lock()
+        self._statements: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"requests": 0, "statements": 0, "http_errors": 0, "states": {}}
+
+    def _random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def sample_latency(self) -> float:
+        """Sample one statement latency in seconds"""
+        profile = self.profile
+        with self._lock:
+            if profile.latency_distribution == "uniform":
+                spread = profile.latency_ms * profile.latency_spread
+                value = self._rng.uniform(profile.latency_ms - spread, profile.latency_ms + spread)
+            elif profile.latency_distribution == "exponential":
+                value = self._rng.expovariate(1 / profile.latency_ms) if profile.latency_ms else 0.0
+            elif profile.latency_distribution == "lognormal":
+                # latency_ms is the median of the distribution
+                value = self._rng.lognormvariate(math.log(max(profile.latency_ms, 1e-3)), profile.latency_spread)
+            else:
+                value = profile.latency_ms
+        return max(0.0, value) / 1000
+
+    def pick_state(self) -> str:
+        roll = self._random()
+        profile = self.profile
+        if roll < profile.failure_rate:
+            return "FAILED"
+        if roll < profile.failure_rate + profile.pending_rate:
+            return "PENDING"
+        if roll < profile.failure_rate + profile.pending_rate + profile.canceled_rate:
+            return "CANCELED"
+        return "SUCCEEDED"
+
+    def _record(self, key: str, state: Optional[str] = None):
+        with self._lock:
+            self.stats[key] += 1
+            if state:
+                self.stats["states"][state] = self.stats["states"].get(state, 0) + 1
+
+    def _result_for(self, statement: str) -> Tuple[List[Dict[str, Any]], List[List[str]]]:
+        """Build a schema and rows for the statement"""
+        profile = self.profile
+        if statement.strip().upper().startswith("DESCRIBE"):
+            columns = [
+                {"name": "col_name", "type_name": "STRING", "type_text": "string", "position": 0},
+                {"name": "data_type", "type_name": "STRING", "type_text": "string", "position": 1},
+                {"name": "comment", "type_name": "STRING", "type_text": "string", "position": 2},
+            ]
+            rows = [[f"column_{i}", "string", None] for i in range(profile.result_columns)]
+            return columns, rows
+
+        if re.match(r"^\s*SELECT\s+1\b", statement, re.IGNORECASE):
+            return [{"name": "test", "type_name": "INT", "type_text": "int", "position": 0}], [["1"]]
+
+        row_count = profile.result_rows
+        limit = re.search(r"\bLIMIT\s+(\d+)", statement, re.IGNORECASE)
+        if limit:
+            row_count = min(row_count, int(limit.group(1)))
+        columns = [
+            {"name": f"column_{i}", "type_name": "STRING", "type_text": "string", "position": i}
+            for i in range(profile.result_columns)
+        ]
+        rows = [[f"value_{r}_{c}" for c in range(profile.result_columns)] for r in range(row_count)]
+        return columns, rows
+
+    def _response(self, statement_id: str, state: str, statement: str) -> Dict[str, Any]:
+        response = {"statement_id": statement_id, "status": {"state": state}}
+        if state == "FAILED":
+            response["status"]["error"] = {"error_code": "INTERNAL_ERROR", "message": "Injected failure from fake warehouse"}
+        if state == "SUCCEEDED":
+            columns, rows = self._result_for(statement)
+            response["manifest"] = {
+                "format": "JSON_ARRAY",
+                "schema": {"column_count": len(columns), "columns": columns},
+                "total_row_count": len(rows),
+                "total_chunk_count": 1,
+                "chunks": [{"chunk_index": 0, "row_offset": 0, "row_count": len(rows)}],
+                "truncated": False,
+            }
+            response["result"] = {"chunk_index": 0, "row_offset": 0, "row_count": len(rows), "data_array": rows}
+        return response
+
+    def execute(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Handle POST /api/2.0/sql/statements"""
+        self._record("requests")
+        if self._random() < self.profile.http_error_rate:
+            self._record("http_errors")
+            return 503, {"error_code": "TEMPORARILY_UNAVAILABLE", "message": "Injected HTTP error from fake warehouse"}
+
+        statement = body.get("statement", "")
+        statement_id = str(uuid.uuid4())
+        latency = self.sample_latency()
+        state = self.pick_state()
+        wait_timeout = _parse_wait_timeout(body.get("wait_timeout", "10s"))
+
+        # Statements slower than wait_timeout come back as PENDING, like the real API
+        if state == "SUCCEEDED" and wait_timeout and latency > wait_timeout:
+            time.sleep(wait_timeout)
+            state = "PENDING"
+        else:
+            time.sleep(latency)
+
+        with self._lock:
+            self._statements[statement_id] = {
+                "statement": statement,
+                "state": state,
+                "ready_at": time.monotonic() + max(0.0, latency - wait_timeout) if state == "PENDING" else 0.0,
+            }
+        self._record("statements", state)
+        return 200, self._response(statement_id, state, statement)
+
+    def get(self, statement_id: str) -> Tuple[int, Dict[str, Any]]:
+        """Handle GET /api/2.0/sql/statements/{id}"""
+        self._record("requests")
+        with self._lock:
+            entry = self._statements.get(statement_id)
+            if not entry:
+                return 404, {"error_code": "NOT_FOUND", "message": f"Statement {statement_id} not found"}
+            if entry["state"] == "PENDING" and time.monotonic() >= entry["ready_at"]:
+                entry["state"] = "SUCCEEDED"
+            state, statement = entry["state"], entry["statement"]
+        return 200, self._response(statement_id, state, statement)
+
+    def cancel(self, statement_id: str) -> Tuple[int, Dict[str, Any]]:
+        with self._lock:
+            entry = self._statements.get(statement_id)
+            if entry and entry["state"] == "PENDING":
+                entry["state"] = "CANCELED"
+        return 200, {}
+
+
+def _parse_wait_timeout(value: str) -> float:
+    match = re.match(r"^(\d+)s$", str(value))
+    return float(match.group(1)) if match else 0.0
+
+
+def _make_handler(warehouse: FakeWarehouse):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_POST(self):
+            body = self._read_json()
+            if STATEMENT_PATH.match(self.path):
+                self._send(*warehouse.execute(body))
+                return
+            match = CANCEL_PATH.match(self.path)
+            if match:
+                self._send(*warehouse.cancel(match.group(1)))
+                return
+            self._send(404, {"error_code": "NOT_FOUND", "message": self.path})
+
+        def do_GET(self):
+            match = STATEMENT_ID_PATH.match(self.path)
+            if match:
+                self._send(*warehouse.get(match.group(1)))
+                return
+            if self.path.startswith("/fake/stats"):
+                with warehouse._lock:
+                    self._send(200, json.loads(json.dumps(warehouse.stats)))
+                return
+            # Includes /.well-known/databricks-config: the SDK falls back to explicit config
+            self._send(404, {"error_code": "NOT_FOUND", "message": self.path})
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return Handler
+
+
+def start_fake_warehouse(profile: WarehouseProfile, host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the fake warehouse on a background thread.
+
+    Returns (server, warehouse); the bound port is server.server_address[1].
+    """
+    warehouse = FakeWarehouse(profile)
+    server = ThreadingHTTPServer((host, port), _make_handler(warehouse))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="fake-warehouse", daemon=True)
+    thread.start()
+    return server, warehouse
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """Register WarehouseProfile options on a parser (shared with the load driver)"""
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="constant")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Mean (median for lognormal) statement latency")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="Uniform half-width ratio or lognormal sigma")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of statements returning FAILED")
+    parser.add_argument("--pending-rate", type=float, default=0.0, help="Fraction of statements returning PENDING")
+    parser.add_argument("--canceled-rate", type=float, default=0.0, help="Fraction of statements returning CANCELED")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503")
+    parser.add_argument("--result-rows", type=int, default=100, help="Rows available per table")
+    parser.add_argument("--result-columns", type=int, default=8, help="Columns per table")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def profile_from_args(args) -> WarehouseProfile:
+    return WarehouseProfile(
+        latency_distribution=args.latency_distribution,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        failure_rate=args.failure_rate,
+        pending_rate=args.pending_rate,
+        canceled_rate=args.canceled_rate,
+        http_error_rate=args.http_error_rate,
+        result_rows=args.result_rows,
+        result_columns=args.result_columns,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Databricks SQL Statement Execution API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server, _ = start_fake_warehouse(profile_from_args(args), args.host, args.port)
+    print(f"🏭 Fake SQL warehouse listening on http://{args.host}:{server.server_address[1]}")
+    print("   Stats: GET /fake/stats — press Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Load driver for the preview endpoints
+
+Hammers /api/preview and /api/preview/test at a fixed concurrency and reports
+throughput, latency percentiles, executor queue time and thread usage.
+
+Usage (from the server directory):
+    # Self-contained: starts the fake warehouse and the API in-process
+    python -m loadtest.preview_load --in-process --concurrency 16 --requests 500 --latency-ms 200
+
+    # Against an already running API
+    python -m loadtest.preview_load --base-url http://127.0.0.1:8000 --concurrency 16 --duration 30
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add the server directory to Python path so we can import the app module
+server_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(server_dir))
+
+from benchmarks.run_benchmarks import summarize
+from loadtest.fake_warehouse import add_profile_arguments, profile_from_args, start_fake_warehouse
+
+DEFAULT_TABLE_REFERENCES = [
+    "/samples/msci-esg-sample.csv",
+    "/samples/sp500-sample.csv",
+    "/samples/moody-credit-sample.csv",
+    "solacc_var.market_data",
+]
+
+
+def start_api_in_process(warehouse_url: str, port: int, executor_workers: Optional[int]):
+    """Start the FastAPI app with uvicorn on a background thread, wired to the fake warehouse"""
+    os.environ["DATABRICKS_HOST"] = warehouse_url
+    os.environ["DATABRICKS_ACCESS_TOKEN"] = "fake-token"
+    os.environ["DATABRICKS_WAREHOUSE_ID"] = "fake-warehouse"
+    os.environ.pop("DATABRICKS_CLIENT_ID", None)
+    os.environ.pop("DATABRICKS_CLIENT_SECRET", None)
+    if executor_workers:
+        os.environ["PREVIEW_EXECUTOR_WORKERS"] = str(executor_workers)
+
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config("app.main:app", host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="api-server", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 60
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+    return server
+
+
+def fetch_json(url: str, timeout: float) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+class ExecutorSampler(threading.Thread):
+    """Polls /api/preview/stats to capture peak queue depth and thread usage"""
+
+    def __init__(self, base_url: str, interval: float = 0.25):
+        super().__init__(name="executor-sampler", daemon=True)
+        self.url = f"{base_url}/api/preview/stats"
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.peaks = {"queued": 0, "active": 0, "executor_threads": 0, "process_threads": 0}
+        self.samples = 0
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                stats = fetch_json(self.url, timeout=5)
+                self.samples += 1
+                for key in self.peaks:
+                    self.peaks[key] = max(self.peaks[key], stats.get(key, 0))
+            except Exception:
+                pass
+            self.stop_event.wait(self.interval)
+
+
+def run_load(args, base_url: str) -> Dict[str, Any]:
+    references = args.table_reference or DEFAULT_TABLE_REFERENCES
+    endpoints = ["preview", "test"] if args.endpoint == "mixed" else [args.endpoint]
+    latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in endpoints}
+    outcomes: Dict[str, Dict[str, int]] = {endpoint: {} for endpoint in endpoints}
+    lock = threading.Lock()
+    counter = iter(range(sys.maxsize))
+    deadline = time.monotonic() + args.duration if args.duration else None
+
+    def next_request() -> Optional[int]:
+        with lock:
+            index = next(counter)
+        if deadline is not None:
+            return index if time.monotonic() < deadline else None
+        return index if index < args.requests else None
+
+    def classify(endpoint: str, payload: Dict[str, Any]) -> str:
+        if endpoint == "preview":
+            return "preview_error" if "error" in payload else "ok"
+        return "ok" if payload.get("status") == "connected" else "disconnected"
+
+    def worker():
+        while True:
+            index = next_request()
+            if index is None:
+                return
+            endpoint = endpoints[index % len(endpoints)]
+            if endpoint == "preview":
+                query = urllib.parse.urlencode({"table_reference": references[index % len(references)]})
+                url = f"{base_url}/api/preview?{query}"
+            else:
+                url = f"{base_url}/api/preview/test"
+            started = time.perf_counter()
+            try:
+                outcome = classify(endpoint, fetch_json(url, timeout=args.timeout))
+            except urllib.error.HTTPError as e:
+                outcome = f"http_{e.code}"
+            except Exception as e:
+                outcome = type(e).__name__
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[endpoint].append(elapsed)
+                outcomes[endpoint][outcome] = outcomes[endpoint].get(outcome, 0) + 1
+
+    sampler = ExecutorSampler(base_url)
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="load") as pool:
+        for _ in range(args.concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+    sampler.stop_event.set()
+    sampler.join()
+
+    report = {
+        "concurrency": args.concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "endpoints": {},
+        "executor": fetch_json(f"{base_url}/api/preview/stats", timeout=args.timeout),
+        "executor_peaks": sampler.peaks,
+    }
+    total = 0
+    for endpoint in endpoints:
+        if not latencies[endpoint]:
+            continue
+        total += len(latencies[endpoint])
+        stats = summarize(latencies[endpoint], elapsed)
+        stats["outcomes"] = outcomes[endpoint]
+        report["endpoints"][endpoint] = stats
+    report["total_requests"] = total
+    report["throughput_rps"] = round(total / elapsed, 2) if elapsed else 0.0
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n📊 {report['total_requests']} requests in {report['elapsed_seconds']} s "
+          f"at concurrency {report['concurrency']} → {report['throughput_rps']} req/s")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"   /api/{'preview' if endpoint == 'preview' else 'preview/test':<14} "
+              f"p50 {stats['p50_ms']:>9.1f} ms   p95 {stats['p95_ms']:>9.1f} ms   "
+              f"p99 {stats['p99_ms']:>9.1f} ms   outcomes {stats['outcomes']}")
+    executor = report["executor"]
+    peaks = report["executor_peaks"]
+    wait = executor["queue_wait_ms"]
+    print(f"\n🧵 Executor: {executor['max_workers']} workers, {executor['completed']} statements completed")
+    print(f"   queue wait p50 {wait['p50']} ms   p95 {wait['p95']} ms   p99 {wait['p99']} ms   max {wait['max']} ms")
+    print(f"   peak queued {peaks['queued']}   peak active {peaks['active']}   "
+          f"peak executor threads {peaks['executor_threads']}   peak process threads {peaks['process_threads']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the preview endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API base URL (ignored with --in-process)")
+    parser.add_argument("--in-process", action="store_true", help="Start the fake warehouse and the API locally")
+    parser.add_argument("--api-port", type=int, default=8765, help="Port for the in-process API")
+    parser.add_argument("--executor-workers", type=int, help="PREVIEW_EXECUTOR_WORKERS for the in-process API")
+    parser.add_argument("--endpoint", choices=["preview", "test", "mixed"], default="mixed")
+    parser.add_argument("--table-reference", action="append", help="Table reference to preview (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Total requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead of a request count")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    base_url = args.base_url.rstrip("/")
+    warehouse_server = api_server = None
+    if args.in_process:
+        warehouse_server, _ = start_fake_warehouse(profile_from_args(args))
+        warehouse_url = f"http://127.0.0.1:{warehouse_server.server_address[1]}"
+        print(f"🏭 Fake SQL warehouse on {warehouse_url}")
+        api_server = start_api_in_process(warehouse_url, args.api_port, args.executor_workers)
+        base_url = f"http://127.0.0.1:{args.api_port}"
+        print(f"🚀 API on {base_url}")
+
+    try:
+        report = run_load(args, base_url)
+    finally:
+        if api_server:
+            api_server.should_exit = True
+        if warehouse_server:
+            warehouse_server.shutdown()
+
+    print_report(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the in-memory catalog
+
+Decodes a synthetic catalog built from the bundled client datasets.json,
+one listing at a time as a database load does (so no strings are shared
+between listings), and reports the bytes each listing retains as a list of
+Dataset models, as a CompactCatalog and as a CompactCatalog with compressed
+descriptions, together with the cost of materializing listings back into
+Dataset models. Sizes are extrapolated to the 1M listings a worker should
+hold; build times include tracemalloc overhead.
+
+It also reports how far the peak RSS of a fresh process grows while each
+layout is built, which is what a worker needs free during a load.
+"CompactCatalog via List[Dataset]" decodes every listing before compacting,
+as loads did before listings were compacted batch by batch. The peaks are
+measured in forked processes, so this needs a Unix system.
+
+Usage (from the server directory):
+    python scripts/benchmark_catalog_memory.py
+    python scripts/benchmark_catalog_memory.py --count 1000000
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the server directory to Python path so we can import the app module
+server_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(server_dir))
+
+from app.models.dataset import Dataset
+from app.services.compact_catalog import CompactCatalog
+from app.services.dataset_service import dataset_service
+
+TARGET_LISTINGS = 1_000_000
+
+
+def listing_payloads(count: int):
+    """
+    JSON documents for count listings, cycling through the bundled catalog with unique ids and titles
+    """
+    templates = [json.loads(dataset.model_dump_json()) for dataset in dataset_service._read_datasets_json()]
+    for number in range(count):
+        item = dict(templates[number % len(templates)])
+        item["id"] = f"bench-{number}"
+        item["title"] = f"{item['title']} #{number}"
+        yield json.dumps(item)
+
+
+def decode(count: int):
+    for payload in listing_payloads(count):
+        yield Dataset.model_validate_json(payload)
+
+
+def retained(build, count: int):
+    """
+    Bytes still allocated once build() has consumed count freshly decoded listings
+    """
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    catalog = build(decode(count))
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return catalog, size, elapsed
+
+
+def peak_rss_growth(build, count: int) -> float:
+    """
+    MB by which a forked process's peak RSS grows while build() consumes count freshly decoded listings
+    """
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+
+    def measure():
+        gc.collect()
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        catalog = build(decode(count))
+        sender.send((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * unit / 2**20)
+        del catalog
+
+    process = multiprocessing.get_context("fork").Process(target=measure)
+    process.start()
+    growth = receiver.recv()
+    process.join()
+    return growth
+
+
+def materialize_us(catalog, count: int) -> float:
+    started = time.perf_counter()
+    for position in range(count):
+        catalog[position]
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure the memory held per catalog listing")
+    parser.add_argument("--count", type=int, default=100_000, help="Listings to generate")
+    parser.add_argument("--sample", type=int, default=10_000, help="Listings to materialize when timing reads")
+    args = parser.parse_args()
+    count = max(1, args.count)
+    sample = min(count, args.sample)
+
+    print(f"🧪 Decoding {count} listings per layout...")
+    layouts = (
+        ("List[Dataset]", list),
+        ("CompactCatalog via List[Dataset]", lambda datasets: CompactCatalog(list(datasets), compress=False)),
+        ("CompactCatalog", lambda datasets: CompactCatalog(datasets, compress=False)),
+        ("CompactCatalog (compressed)", lambda datasets: CompactCatalog(datasets, compress=True)),
+    )
+    # Measured first, while this process has not yet allocated (and freed) a catalog its children would reuse
+    peaks = {name: peak_rss_growth(build, count) for name, build in layouts}
+    baseline = None
+    for name, build in layouts:
+        catalog, size, elapsed = retained(build, count)
+        per_listing = size / count
+        baseline = baseline or per_listing
+        read_us = materialize_us(catalog, sample)
+        print(f"📦 {name}")
+        print(f"   {per_listing:>10.0f} bytes/listing ({per_listing / baseline:.0%} of List[Dataset])")
+        print(f"   {per_listing * TARGET_LISTINGS / 2**20:>10.0f} MB for {TARGET_LISTINGS:,} listings")
+        print(f"   {peaks[name]:>10.0f} MB peak RSS growth while building {count:,} listings")
+        print(f"   {elapsed / count * 1e6:>10.1f} µs/listing to decode and build")
+        print(f"   {read_us:>10.1f} µs/listing to read as a Dataset")
+        del catalog
+    print("✅ Done (index structures such as columns and sort orders are not included)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
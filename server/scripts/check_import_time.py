@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for app.main
+
+Imports the application in fresh interpreters (STARTUP_MODE=lazy, as workers
+start it) and fails when the fastest import exceeds the budget or when a
+module that should be deferred is loaded at import time. Run it in CI or
+before merging changes that add imports to the request path.
+
+Usage (from the server directory):
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 1200 --repeat 5 --show 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add the server directory to Python path so we can import the app module
+server_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(server_dir))
+
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+# Only needed once a client is created or never at all
+DEFERRED_MODULES = ("pandas", "databricks.sdk", "numpy", "scipy")
+
+PROBE = """
+import json, sys, time
+before = set(sys.modules)
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "modules": sorted(set(sys.modules) - before)}))
+"""
+
+
+def run_probe(env) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=server_dir, env=env, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing app.main failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env, limit: int):
+    """
+    Cumulative import time per top-level package, from python -X importtime
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=server_dir, env=env, capture_output=True, text=True, timeout=120
+    )
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line.split("|")
+            package = name.strip().split(".")[0]
+            totals[package] = max(totals.get(package, 0), int(cumulative.strip()))
+        except ValueError:
+            continue
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the import-time budget of app.main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Maximum import time")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters to try (fastest counts)")
+    parser.add_argument("--show", type=int, default=10, help="Slowest packages to list")
+    args = parser.parse_args()
+
+    env = dict(os.environ, STARTUP_MODE="lazy", PYTHONPATH=os.pathsep.join(
+        filter(None, [str(server_dir), os.getenv("PYTHONPATH")])
+    ))
+
+    print("⏱️  Measuring app.main import time...")
+    runs = [run_probe(env) for _ in range(max(1, args.repeat))]
+    best_ms = min(run["seconds"] for run in runs) * 1000
+    loaded = set(runs[0]["modules"])
+
+    print(f"📦 {len(loaded)} modules loaded by app.main")
+    for package, microseconds in slowest_imports(env, args.show):
+        print(f"   {package:<28} {microseconds / 1000:>8.1f} ms")
+
+    failed = False
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    if eager:
+        print(f"❌ Deferred modules imported at startup: {', '.join(eager)}")
+        failed = True
+    if best_ms > args.budget_ms:
+        print(f"❌ Import took {best_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print(f"✅ Import took {best_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
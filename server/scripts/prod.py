@@ -70,6 +70,8 @@ if __name__ == "__main__":
     print(f"📦 App module: {app_module}")
     print(f"🌍 Environment: {os.getenv('ENVIRONMENT', 'production')}")
     print(f"👥 Workers: {workers}")
+    # Worker processes split the database connection budget by this count
+    os.environ["WEB_CONCURRENCY"] = str(workers)
     print(f"📋 Log level: {log_level}")
     
     # Production configuration